@@ -0,0 +1,93 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+颜色量化算法对比：速度、质量（量化误差）与结果是否可复现
+
+用法:
+    python benchmarks/bench_color_quantization.py [--colors 5] [--repeat 5]
+"""
+
+import os
+import sys
+import time
+import argparse
+import statistics
+import numpy as np
+from PIL import Image
+
+root_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(root_dir, 'src'))
+
+from utils.color_quantizer import available_quantizers, quantize_colors
+
+
+def load_samples() -> dict:
+    """合成图片 + data/artworks 中的真实作品，统一缩放到 150x150 以内"""
+    rng = np.random.default_rng(42)
+    samples = {}
+
+    gradient = np.zeros((150, 150, 3), dtype=np.uint8)
+    gradient[..., 0] = np.linspace(0, 255, 150)[None, :]
+    gradient[..., 1] = np.linspace(0, 255, 150)[:, None]
+    gradient[..., 2] = 128
+    samples["synthetic_gradient"] = gradient
+
+    blocks = rng.integers(0, 256, (6, 3), dtype=np.uint8)[rng.integers(0, 6, (150, 150))]
+    noise = rng.normal(0, 12, blocks.shape)
+    samples["synthetic_blocks"] = np.clip(blocks + noise, 0, 255).astype(np.uint8)
+
+    artworks_dir = os.path.join(root_dir, "data", "artworks")
+    for dirpath, _, filenames in os.walk(artworks_dir):
+        for filename in sorted(filenames):
+            if filename.endswith(".png"):
+                image = Image.open(os.path.join(dirpath, filename)).convert('RGB')
+                image.thumbnail((150, 150))
+                samples[filename[:16]] = np.array(image)
+
+    return samples
+
+
+def quantization_error(pixels: np.ndarray, colors: list) -> float:
+    """每个像素替换为最近代表色后的均方误差（越小越好）"""
+    palette = np.array([c for c, _ in colors], dtype=np.float32)
+    data = pixels.astype(np.float32)
+    distances = ((data[:, None, :] - palette[None, :, :]) ** 2).sum(axis=2)
+    return float(distances.min(axis=1).mean())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="颜色量化算法对比")
+    parser.add_argument("--colors", type=int, default=5, help="提取颜色数量")
+    parser.add_argument("--repeat", type=int, default=5, help="每个样本重复次数")
+    args = parser.parse_args()
+
+    samples = load_samples()
+    methods = available_quantizers()
+
+    print(f"{'样本':<20}{'算法':<18}{'耗时(ms)':>10}{'误差(MSE)':>12}{'可复现':>8}")
+    summary = {m: {"time": [], "error": []} for m in methods}
+
+    for sample_name, image in samples.items():
+        pixels = image.reshape(-1, 3)
+        for method in methods:
+            timings, results = [], []
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                results.append(quantize_colors(pixels, args.colors, method))
+                timings.append((time.perf_counter() - start) * 1000)
+
+            elapsed = statistics.median(timings)
+            error = quantization_error(pixels, results[0])
+            deterministic = all(r == results[0] for r in results)
+            summary[method]["time"].append(elapsed)
+            summary[method]["error"].append(error)
+            print(f"{sample_name:<20}{method:<18}{elapsed:>10.2f}{error:>12.1f}{'是' if deterministic else '否':>8}")
+
+    print("\n汇总（中位数）")
+    for method, values in summary.items():
+        print(f"{method:<18}耗时 {statistics.median(values['time']):.2f}ms  "
+              f"误差 {statistics.median(values['error']):.1f}")
+
+
+if __name__ == "__main__":
+    main()
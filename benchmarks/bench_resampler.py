@@ -0,0 +1,111 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+重采样算法对比：原线性插值实现 vs 分块多相重采样
+指标：耗时、峰值内存、带内信噪比（SNR）与混叠抑制
+
+用法:
+    python benchmarks/bench_resampler.py [--seconds 30] [--repeat 3]
+"""
+
+import os
+import sys
+import time
+import argparse
+import statistics
+import tracemalloc
+import numpy as np
+
+root_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(root_dir, 'src'))
+
+from utils.resampler import resample
+
+CASES = [(44100, 16000), (48000, 16000), (24000, 16000), (16000, 22050), (16000, 48000)]
+
+# 带内测试音（低于所有目标采样率的奈奎斯特频率的 80%）
+TONES_HZ = (220.0, 1000.0, 3150.0, 5500.0)
+
+
+def legacy_resample(samples: np.ndarray, orig_sr: int, target_sr: int) -> np.ndarray:
+    """原 convert_audio_format 中的实现：整段线性插值"""
+    ratio = target_sr / orig_sr
+    new_length = int(len(samples) * ratio)
+    indices = np.linspace(0, len(samples) - 1, new_length)
+    return np.interp(indices, np.arange(len(samples)), samples)
+
+
+def polyphase_resample(samples: np.ndarray, orig_sr: int, target_sr: int) -> np.ndarray:
+    return resample(samples, orig_sr, target_sr)
+
+
+METHODS = {"linear": legacy_resample, "polyphase": polyphase_resample}
+
+
+def tones(sample_rate: int, seconds: float, frequencies) -> np.ndarray:
+    t = np.arange(int(sample_rate * seconds)) / sample_rate
+    return sum(0.2 * np.sin(2 * np.pi * f * t) for f in frequencies).astype(np.float32)
+
+
+def snr_db(output: np.ndarray, reference: np.ndarray, margin: int) -> float:
+    """去掉首尾边缘后的信噪比"""
+    n = min(len(output), len(reference))
+    signal = reference[margin:n - margin].astype(np.float64)
+    noise = output[margin:n - margin] - signal
+    return float(10 * np.log10((signal ** 2).sum() / max((noise ** 2).sum(), 1e-20)))
+
+
+def alias_db(output: np.ndarray, input_power: float, margin: int) -> float:
+    """高于目标奈奎斯特频率的输入音在输出中的残留（相对输入功率，越低越好）"""
+    residual = output[margin:len(output) - margin].astype(np.float64)
+    return float(10 * np.log10(max((residual ** 2).mean(), 1e-20) / input_power))
+
+
+def measure(func, *args, repeat: int):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(*args)
+        timings.append((time.perf_counter() - start) * 1000)
+
+    tracemalloc.start()
+    func(*args)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, statistics.median(timings), peak / 1024 / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description="重采样算法对比")
+    parser.add_argument("--seconds", type=float, default=30, help="测试音频时长（秒）")
+    parser.add_argument("--repeat", type=int, default=3, help="重复次数")
+    args = parser.parse_args()
+
+    print(f"{'转换':<16}{'算法':<12}{'耗时(ms)':>10}{'峰值内存(MB)':>14}{'SNR(dB)':>10}{'混叠(dB)':>10}")
+
+    for orig_sr, target_sr in CASES:
+        source = tones(orig_sr, args.seconds, TONES_HZ)
+        reference = tones(target_sr, args.seconds, TONES_HZ)
+        margin = target_sr // 10
+
+        # 降采样时加一个高于目标奈奎斯特频率的测试音，理想输出为 0
+        alias_source = None
+        if target_sr < orig_sr:
+            alias_freq = min(0.75 * target_sr, 0.45 * orig_sr)
+            alias_source = tones(orig_sr, args.seconds, (alias_freq,))
+
+        for name, func in METHODS.items():
+            output, elapsed, peak_mb = measure(func, source, orig_sr, target_sr, repeat=args.repeat)
+            snr = snr_db(output, reference, margin)
+
+            alias = "-"
+            if alias_source is not None:
+                alias_output = func(alias_source, orig_sr, target_sr)
+                alias = f"{alias_db(alias_output, float((alias_source.astype(np.float64) ** 2).mean()), margin):.1f}"
+
+            label = f"{orig_sr}->{target_sr}"
+            print(f"{label:<16}{name:<12}{elapsed:>10.1f}{peak_mb:>14.1f}{snr:>10.1f}{alias:>10}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,355 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+离线压测：多个虚拟用户并发重放页面中的真实调用流程，统计 p50/p95/p99 延迟与吞吐
+
+流程直接调用 CozeService / MultimodalService / VoiceService / VideoService，
+接口地址通过 DASHSCOPE_BASE_URL / COZE_BASE_URL / HUOSHAN_BASE_URL 指向本地桩服务（benchmarks/stub_servers.py），
+默认在进程内启动桩服务，不会访问任何线上接口。
+
+用法:
+    python benchmarks/load_test.py --users 20 --duration 60 --time-scale 0.1
+    python benchmarks/load_test.py --users 50 --iterations 10 --error-rate 0.05 --error-status 429
+    python benchmarks/load_test.py --flows drawing_feedback,voice_stream
+    python benchmarks/load_test.py --target http://127.0.0.1:8765     # 使用单独启动的桩服务
+"""
+
+import os
+import io
+import sys
+import json
+import time
+import base64
+import random
+import argparse
+import threading
+import platform
+from datetime import datetime
+from collections import defaultdict
+import numpy as np
+from PIL import Image, ImageDraw
+
+root_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(root_dir, 'src'))
+sys.path.insert(0, os.path.join(root_dir, 'benchmarks'))
+
+from stub_servers import StubConfig, start_stub_server
+from services.multimodal_service import MultimodalService
+from services.voice_service import VoiceService
+from services.video_service import VideoService
+from services.coze_service import CozeService
+from utils.lazy_import import is_available
+
+# 未安装 cozepy 时跳过 Coze 相关流程
+COZE_AVAILABLE = is_available("cozepy")
+
+DEFAULT_OUTPUT = os.path.join(root_dir, "benchmarks", "results", "load_test.json")
+
+# 各流程被选中的相对权重（大致对应页面中的使用频率）
+FLOW_WEIGHTS = {
+    "drawing_feedback": 4,
+    "drawing_analysis": 2,
+    "voice_stream": 1,
+    "coze_music": 2,
+    "coze_comment": 1,
+    "coze_video": 1,
+    "seedance_video": 1,
+}
+
+COZE_FLOWS = ("coze_music", "coze_comment", "coze_video")
+
+DRAWING_INFO = {"duration": 180, "stroke_count": 42, "revision_count": 3}
+
+
+def make_drawing(width: int = 800, height: int = 600, seed: int = 0) -> bytes:
+    """合成一张画板尺寸的 PNG"""
+    rng = np.random.default_rng(seed)
+    image = Image.new('RGB', (width, height), (255, 255, 255))
+    draw = ImageDraw.Draw(image)
+    for _ in range(30):
+        points = [tuple(int(v) for v in rng.integers(0, (width, height))) for _ in range(5)]
+        color = tuple(int(c) for c in rng.integers(0, 256, 3))
+        draw.line(points, fill=color, width=int(rng.integers(2, 12)))
+    output = io.BytesIO()
+    image.save(output, format='PNG')
+    return output.getvalue()
+
+
+class Recorder:
+    """线程安全地记录每一步和每个流程的耗时与成败"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.timings = defaultdict(list)
+        self.errors = defaultdict(int)
+
+    def record(self, name: str, elapsed_ms: float, ok: bool) -> None:
+        with self._lock:
+            self.timings[name].append(elapsed_ms)
+            if not ok:
+                self.errors[name] += 1
+
+    def step(self, name: str, func, check=bool):
+        """执行一步并计时；check(结果) 为假时记为失败"""
+        start = time.perf_counter()
+        try:
+            result = func()
+            ok = bool(check(result))
+        except Exception as e:
+            print(f"{name} 异常: {str(e)}")
+            result, ok = None, False
+        self.record(name, (time.perf_counter() - start) * 1000, ok)
+        return result, ok
+
+    def summary(self) -> dict:
+        with self._lock:
+            rows = {}
+            for name, values in self.timings.items():
+                values = np.array(values)
+                rows[name] = {
+                    "count": int(len(values)),
+                    "errors": int(self.errors[name]),
+                    "error_rate": round(self.errors[name] / len(values), 4),
+                    "mean_ms": round(float(values.mean()), 2),
+                    "p50_ms": round(float(np.percentile(values, 50)), 2),
+                    "p95_ms": round(float(np.percentile(values, 95)), 2),
+                    "p99_ms": round(float(np.percentile(values, 99)), 2),
+                    "max_ms": round(float(values.max()), 2),
+                }
+            return rows
+
+
+class VirtualUser:
+    """一个虚拟用户：持有自己的服务实例，按权重随机选择流程重放"""
+
+    def __init__(self, user_id: int, recorder: Recorder, image: bytes, poll_interval: float, poll_timeout: float):
+        self.user_id = user_id
+        self.recorder = recorder
+        self.image = image
+        self.image_url = f"data:image/png;base64,{base64.b64encode(image).decode('ascii')}"
+        self.poll_interval = poll_interval
+        self.poll_timeout = poll_timeout
+
+        self.multimodal = MultimodalService()
+        self.voice = VoiceService()
+        self.video = VideoService()
+        self.coze = CozeService() if COZE_AVAILABLE else None
+        self._default_analysis = self.multimodal._get_default_analysis()
+
+    def run_flow(self, flow: str) -> bool:
+        start = time.perf_counter()
+        ok = getattr(self, f"_flow_{flow}")()
+        self.recorder.record(f"flow.{flow}", (time.perf_counter() - start) * 1000, ok)
+        return ok
+
+    def _flow_drawing_feedback(self) -> bool:
+        """画板：实时小精灵反馈 + 语音"""
+        step = self.recorder.step
+        feedback, ok = step("multimodal.generate_spirit_feedback",
+                            lambda: self.multimodal.generate_spirit_feedback(self.image, DRAWING_INFO))
+        if not ok:
+            return False
+        _, ok = step("voice.text_to_speech", lambda: self.voice.text_to_speech(feedback),
+                     check=lambda audio: audio is not None)
+        return ok
+
+    def _flow_drawing_analysis(self) -> bool:
+        """画板：完成作品后的五维度分析 + 反馈 + 语音"""
+        step = self.recorder.step
+        _, ok = step("multimodal.analyze_drawing",
+                     lambda: self.multimodal.analyze_drawing(self.image, DRAWING_INFO),
+                     check=lambda analysis: analysis != self._default_analysis)
+        if not ok:
+            return False
+        return self._flow_drawing_feedback()
+
+    def _flow_voice_stream(self) -> bool:
+        """流式语音直接写入内存流"""
+        _, ok = self.recorder.step(
+            "voice.stream_text_to_speech_to_file",
+            lambda: self.voice.stream_text_to_speech_to_file("你画的小房子好温暖！里面住着谁呀？", io.BytesIO())
+        )
+        return ok
+
+    def _coze_flow(self, name: str, method) -> bool:
+        step = self.recorder.step
+        file_id, ok = step("coze.upload_image_to_coze", lambda: self.coze.upload_image_to_coze(self.image))
+        if not ok:
+            return False
+        _, ok = step(f"coze.{name}", lambda: method(file_id),
+                     check=lambda result: result and result.get("status") == "success")
+        return ok
+
+    def _flow_coze_music(self) -> bool:
+        return self._coze_flow("generate_music_from_image", self.coze.generate_music_from_image)
+
+    def _flow_coze_comment(self) -> bool:
+        return self._coze_flow("generate_voice_comment", self.coze.generate_voice_comment)
+
+    def _flow_coze_video(self) -> bool:
+        return self._coze_flow("generate_video_from_image", self.coze.generate_video_from_image)
+
+    def _flow_seedance_video(self) -> bool:
+        """火山引擎首尾帧视频：提交后轮询到完成"""
+        step = self.recorder.step
+        task, ok = step("video.create_transition_video",
+                        lambda: self.video.create_transition_video(self.image_url, self.image_url),
+                        check=lambda result: result.get("status") == "processing")
+        if not ok:
+            return False
+
+        deadline = time.monotonic() + self.poll_timeout
+        while time.monotonic() < deadline:
+            time.sleep(self.poll_interval)
+            result, ok = step("video.query_video_task", lambda: self.video.query_video_task(task["task_id"]),
+                              check=lambda result: result.get("status") in ("processing", "completed"))
+            if not ok:
+                return False
+            if result["status"] == "completed":
+                return True
+        return False
+
+
+def run_load(users: int, flows: dict, duration: float, iterations: int, ramp_up: float,
+             think_time: float, poll_interval: float, poll_timeout: float, seed: int) -> tuple:
+    """
+    并发运行虚拟用户
+
+    Returns:
+        (Recorder, 实际耗时秒数, 完成的流程数)
+    """
+    recorder = Recorder()
+    image = make_drawing()
+    names, weights = list(flows), list(flows.values())
+    completed = [0]
+    lock = threading.Lock()
+    start = time.monotonic()
+    deadline = start + duration if duration else None
+
+    def worker(user_id: int):
+        rng = random.Random(seed * 100003 + user_id)
+        time.sleep(ramp_up * user_id / max(users, 1))
+        user = VirtualUser(user_id, recorder, image, poll_interval, poll_timeout)
+
+        count = 0
+        while (iterations and count < iterations) or (not iterations and time.monotonic() < deadline):
+            user.run_flow(rng.choices(names, weights)[0])
+            count += 1
+            with lock:
+                completed[0] += 1
+            if think_time:
+                time.sleep(rng.uniform(0, 2 * think_time))
+
+    threads = [threading.Thread(target=worker, args=(i,), name=f"vu-{i}") for i in range(users)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    return recorder, time.monotonic() - start, completed[0]
+
+
+def print_report(rows: dict, elapsed: float, completed: int) -> None:
+    print(f"\n{'名称':<44}{'次数':>7}{'错误率':>8}{'p50(ms)':>10}{'p95(ms)':>10}{'p99(ms)':>10}{'max(ms)':>10}")
+    for name in sorted(rows, key=lambda n: (not n.startswith("flow."), n)):
+        row = rows[name]
+        print(f"{name:<44}{row['count']:>7}{row['error_rate']:>8.1%}{row['p50_ms']:>10.1f}"
+              f"{row['p95_ms']:>10.1f}{row['p99_ms']:>10.1f}{row['max_ms']:>10.1f}")
+
+    requests_count = sum(row["count"] for name, row in rows.items() if not name.startswith("flow."))
+    print(f"\n总耗时 {elapsed:.1f}s，完成流程 {completed} 个（{completed / elapsed:.2f} 个/秒），"
+          f"服务调用 {requests_count} 次（{requests_count / elapsed:.2f} 次/秒）")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="DreamWeaver 外部接口离线压测")
+    parser.add_argument("--users", type=int, default=10, help="并发虚拟用户数")
+    parser.add_argument("--duration", type=float, default=30, help="压测时长（秒），指定 --iterations 时忽略")
+    parser.add_argument("--iterations", type=int, default=0, help="每个用户运行的流程数")
+    parser.add_argument("--flows", default="", help="只运行这些流程（逗号分隔），默认全部按权重混合")
+    parser.add_argument("--ramp-up", type=float, default=0.0, help="所有用户在这段时间内逐个启动（秒）")
+    parser.add_argument("--think-time", type=float, default=0.0, help="两个流程之间的平均停顿（秒）")
+    parser.add_argument("--poll-interval", type=float, default=None, help="视频任务轮询间隔（秒），默认 5 x time-scale")
+    parser.add_argument("--poll-timeout", type=float, default=600, help="视频任务最长等待（秒）")
+    parser.add_argument("--target", default="", help="已启动的桩服务地址；不指定时在进程内启动")
+    parser.add_argument("--time-scale", type=float, default=0.1, help="桩服务延迟缩放系数")
+    parser.add_argument("--jitter", type=float, default=0.2, help="桩服务延迟的随机浮动比例")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="桩服务注入错误的比例")
+    parser.add_argument("--error-status", type=int, default=500, help="注入错误的 HTTP 状态码")
+    parser.add_argument("--seed", type=int, default=0, help="随机种子")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT, help="结果 JSON 路径")
+    args = parser.parse_args()
+
+    flows = dict(FLOW_WEIGHTS)
+    if args.flows:
+        selected = [f.strip() for f in args.flows.split(",") if f.strip()]
+        unknown = [f for f in selected if f not in FLOW_WEIGHTS]
+        if unknown:
+            parser.error(f"未知流程: {', '.join(unknown)}（可选: {', '.join(FLOW_WEIGHTS)}）")
+        flows = {name: FLOW_WEIGHTS[name] for name in selected}
+    if not COZE_AVAILABLE:
+        print("⚠️ 未安装 cozepy，跳过 Coze 流程")
+        flows = {name: weight for name, weight in flows.items() if name not in COZE_FLOWS}
+    if not flows:
+        parser.error("没有可运行的流程")
+
+    server = None
+    if args.target:
+        base_url = args.target.rstrip('/')
+        service_urls = {
+            "DASHSCOPE_BASE_URL": f"{base_url}/compatible-mode/v1",
+            "COZE_BASE_URL": base_url,
+            "HUOSHAN_BASE_URL": f"{base_url}/video",
+        }
+    else:
+        config = StubConfig(args.time_scale, args.jitter, args.error_rate, args.error_status, seed=args.seed)
+        server = start_stub_server(config=config)
+        service_urls = server.service_urls()
+        print(f"桩服务已启动: {server.base_url}")
+
+    # 覆盖 .env 中的地址和密钥，保证压测流量只会到达桩服务
+    os.environ.update(service_urls)
+    for key in ("DASHSCOPE_API_KEY", "COZE_API_TOKEN", "HUOSHAN_ACCESS_KEY"):
+        os.environ[key] = "loadtest"
+
+    poll_interval = args.poll_interval if args.poll_interval is not None else 5.0 * args.time_scale
+    mode = f"每用户 {args.iterations} 个流程" if args.iterations else f"{args.duration:.0f}s"
+    print(f"{args.users} 个虚拟用户，{mode}，流程: {', '.join(flows)}")
+
+    try:
+        recorder, elapsed, completed = run_load(
+            args.users, flows, args.duration, args.iterations, args.ramp_up,
+            args.think_time, poll_interval, args.poll_timeout, args.seed
+        )
+    finally:
+        if server:
+            server.shutdown()
+            server.server_close()
+
+    rows = recorder.summary()
+    print_report(rows, elapsed, completed)
+
+    report = {
+        "environment": {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+        },
+        "settings": {k: v for k, v in vars(args).items() if k != "output"},
+        "elapsed_s": round(elapsed, 3),
+        "flows_completed": completed,
+        "flows_per_second": round(completed / elapsed, 3),
+        "results": rows,
+    }
+    if server:
+        report["stub_stats"] = server.stats()
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"结果已写入 {args.output}")
+
+
+if __name__ == "__main__":
+    main()
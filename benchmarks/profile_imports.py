@@ -0,0 +1,152 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+导入耗时分析：每个页面（以及批量分析的工作进程）在 streamlit 之外额外导入了哪些模块、各花多少时间
+
+对每个目标在新的 Python 进程中用 -X importtime 执行它顶层的 import 语句（streamlit 先导入，不计入），
+汇总总耗时，并列出自身耗时最高的模块。
+
+用法:
+    python benchmarks/profile_imports.py                      # 所有页面 + 批量分析工作进程
+    python benchmarks/profile_imports.py --targets 5_         # 只看文件名包含 5_ 的页面
+    python benchmarks/profile_imports.py --modules utils.image_processor,cv2
+    python benchmarks/profile_imports.py --top 20 --repeat 5 --output benchmarks/results/imports.json
+"""
+
+import os
+import sys
+import ast
+import json
+import argparse
+import statistics
+import subprocess
+
+root_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+src_dir = os.path.join(root_dir, 'src')
+
+# 没有对应页面文件、但启动时同样要导入的入口
+EXTRA_TARGETS = {
+    "worker:batch_analyzer": ["from utils.batch_analyzer import analyze_image_chunk"],
+}
+
+
+def page_targets() -> dict:
+    """src/app.py 和 src/pages/*.py：{名称: 顶层 import 语句列表}"""
+    files = [os.path.join(src_dir, 'app.py')]
+    pages_dir = os.path.join(src_dir, 'pages')
+    files += [os.path.join(pages_dir, name) for name in sorted(os.listdir(pages_dir))
+              if name.endswith('.py') and name != '__init__.py']
+
+    targets = {}
+    for path in files:
+        with open(path, 'r', encoding='utf-8') as f:
+            source = f.read()
+        statements = [ast.get_source_segment(source, node) for node in ast.parse(source).body
+                      if isinstance(node, (ast.Import, ast.ImportFrom))]
+        targets[os.path.relpath(path, src_dir)] = statements
+    return targets
+
+
+def build_script(statements: list) -> str:
+    """先导入 streamlit，再逐条执行 import；缺失的依赖打印出来而不是中断"""
+    lines = ["import sys", "import streamlit", "print('@@START', file=sys.stderr, flush=True)"]
+    for statement in statements:
+        lines += [
+            "try:",
+            f"    {statement}",
+            "except ImportError as e:",
+            "    print('@@MISSING', e, file=sys.stderr, flush=True)",
+        ]
+    return "\n".join(lines)
+
+
+def parse_importtime(stderr: str) -> dict:
+    """
+    解析 -X importtime 输出中 @@START 之后的部分
+
+    Returns:
+        {"total_ms", "modules": [(模块, 自身ms, 累计ms, 层级)], "missing": [...]}
+    """
+    started = False
+    modules, missing = [], []
+    for line in stderr.splitlines():
+        if line.startswith('@@START'):
+            started = True
+        elif line.startswith('@@MISSING'):
+            missing.append(line[len('@@MISSING'):].strip())
+        elif started and line.startswith('import time:'):
+            parts = line[len('import time:'):].split('|')
+            if len(parts) != 3 or not parts[0].strip().isdigit():
+                continue
+            name = parts[2].rstrip()
+            depth = (len(name) - len(name.lstrip())) // 2
+            modules.append((name.strip(), int(parts[0]) / 1000, int(parts[1]) / 1000, depth))
+
+    # 顶层模块的累计耗时之和即为 streamlit 之外的全部导入耗时
+    total = sum(cumulative for _, _, cumulative, depth in modules if depth == 0)
+    return {"total_ms": total, "modules": modules, "missing": missing}
+
+
+def profile(statements: list, repeat: int) -> dict:
+    runs = []
+    for _ in range(repeat):
+        result = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', build_script(statements)],
+            cwd=src_dir, capture_output=True, text=True,
+            env={**os.environ, "PYTHONPATH": src_dir, "PYTHONDONTWRITEBYTECODE": "1"}
+        )
+        runs.append(parse_importtime(result.stderr))
+
+    # 取总耗时居中的一次，避免单次抖动
+    runs.sort(key=lambda run: run["total_ms"])
+    run = runs[len(runs) // 2]
+    run["all_totals_ms"] = [round(r["total_ms"], 1) for r in runs]
+    return run
+
+
+def main():
+    parser = argparse.ArgumentParser(description="页面导入耗时分析")
+    parser.add_argument("--targets", default="", help="只分析名称包含这些字符串的目标（逗号分隔）")
+    parser.add_argument("--modules", default="", help="改为分析这些模块（逗号分隔）")
+    parser.add_argument("--top", type=int, default=10, help="每个目标列出自身耗时最高的模块数")
+    parser.add_argument("--repeat", type=int, default=3, help="每个目标运行次数，取中位数")
+    parser.add_argument("--output", default="", help="结果 JSON 路径（可选）")
+    args = parser.parse_args()
+
+    if args.modules:
+        targets = {name: [f"import {name}"] for name in args.modules.split(",") if name.strip()}
+    else:
+        targets = {**page_targets(), **EXTRA_TARGETS}
+        if args.targets:
+            keys = [k.strip() for k in args.targets.split(",") if k.strip()]
+            targets = {name: s for name, s in targets.items() if any(k in name for k in keys)}
+
+    report = {}
+    for name, statements in targets.items():
+        run = profile(statements, args.repeat)
+        report[name] = {
+            "total_ms": round(run["total_ms"], 1),
+            "all_totals_ms": run["all_totals_ms"],
+            "missing": run["missing"],
+            "top_self_ms": [
+                {"module": module, "self_ms": round(self_ms, 2), "cumulative_ms": round(cumulative, 2)}
+                for module, self_ms, cumulative, _ in sorted(run["modules"], key=lambda m: m[1], reverse=True)[:args.top]
+            ],
+        }
+
+        print(f"\n{name}: {run['total_ms']:.0f} ms（不含 streamlit，{args.repeat} 次: {run['all_totals_ms']}）")
+        for missing in run["missing"]:
+            print(f"  ⚠️ 未安装: {missing}")
+        print(f"  {'模块':<56}{'自身(ms)':>10}{'累计(ms)':>10}")
+        for row in report[name]["top_self_ms"]:
+            print(f"  {row['module']:<56}{row['self_ms']:>10.1f}{row['cumulative_ms']:>10.1f}")
+
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"\n结果已写入 {args.output}")
+
+
+if __name__ == "__main__":
+    main()
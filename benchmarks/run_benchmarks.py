@@ -0,0 +1,243 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+ImageProcessor / AudioProcessor 离线基准测试
+
+覆盖两个类的全部公开方法，在 small / medium / large 三档合成数据上计时（不访问任何外部接口），
+结果写入 JSON，并与基线对比标记性能回退。
+
+用法:
+    python benchmarks/run_benchmarks.py                       # 运行并与 benchmarks/baseline.json 对比
+    python benchmarks/run_benchmarks.py --sizes small,medium  # 只跑部分档位
+    python benchmarks/run_benchmarks.py --filter audio.       # 只跑名称包含 audio. 的用例
+    python benchmarks/run_benchmarks.py --save-baseline       # 把本次结果保存为基线
+
+存在回退（耗时超过基线 x threshold）时退出码为 1。
+"""
+
+import os
+import io
+import sys
+import json
+import time
+import platform
+import argparse
+import statistics
+from datetime import datetime
+import numpy as np
+from PIL import Image, ImageDraw
+
+root_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(root_dir, 'src'))
+
+import cv2
+from utils.image_processor import ImageProcessor
+from utils.audio_processor import AudioProcessor
+from utils.audio_buffer import AudioBuffer
+from utils.tiled_effects import available_effects, get_effect
+
+DEFAULT_BASELINE = os.path.join(root_dir, "benchmarks", "baseline.json")
+DEFAULT_OUTPUT = os.path.join(root_dir, "benchmarks", "results", "latest.json")
+
+# 各档位：图片尺寸 (宽, 高)、音频时长（秒）
+SIZES = {
+    "small": {"image": (256, 256), "seconds": 1},
+    "medium": {"image": (1024, 768), "seconds": 10},
+    "large": {"image": (4000, 3000), "seconds": 60},
+}
+
+# 单次耗时较长的档位减少重复次数
+MAX_REPEAT = {"small": 10, "medium": 5, "large": 3}
+
+
+def make_image(width: int, height: int, seed: int = 0) -> bytes:
+    """合成一幅"儿童画"：白底、渐变天空、几块色块与线条，再加少量噪点"""
+    rng = np.random.default_rng(seed)
+    image = Image.new('RGB', (width, height), (255, 255, 255))
+    draw = ImageDraw.Draw(image)
+
+    for y in range(0, height // 3, max(1, height // 300)):
+        shade = int(200 + 55 * y / max(height // 3, 1))
+        draw.line([(0, y), (width, y)], fill=(120, 170, shade))
+
+    for _ in range(12):
+        x0, y0 = rng.integers(0, width), rng.integers(height // 4, height)
+        w, h = rng.integers(width // 20, width // 4), rng.integers(height // 20, height // 4)
+        color = tuple(int(c) for c in rng.integers(0, 256, 3))
+        if rng.random() < 0.5:
+            draw.ellipse([x0, y0, x0 + w, y0 + h], fill=color, outline=(0, 0, 0), width=max(1, width // 300))
+        else:
+            draw.rectangle([x0, y0, x0 + w, y0 + h], fill=color, outline=(0, 0, 0), width=max(1, width // 300))
+
+    for _ in range(20):
+        points = [tuple(int(v) for v in rng.integers(0, (width, height))) for _ in range(4)]
+        draw.line(points, fill=(30, 30, 30), width=max(1, width // 200))
+
+    pixels = np.array(image, dtype=np.int16) + rng.integers(-6, 7, (height, width, 3))
+    output = io.BytesIO()
+    Image.fromarray(np.clip(pixels, 0, 255).astype(np.uint8)).save(output, format='PNG')
+    return output.getvalue()
+
+
+def make_audio(seconds: float, sample_rate: int = 16000, seed: int = 0) -> bytes:
+    """合成语音样的音频：几个谐波音 + 音节状包络 + 轻微噪声"""
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(seconds * sample_rate)) / sample_rate
+    tone = sum(np.sin(2 * np.pi * f * t) / (i + 1) for i, f in enumerate((220, 440, 660, 1320)))
+    envelope = 0.5 + 0.5 * np.sin(2 * np.pi * 3 * t) ** 2
+    signal = 0.15 * tone * envelope + 0.01 * rng.standard_normal(len(t))
+    return AudioBuffer(signal.astype(np.float32), sample_rate).to_wav_bytes()
+
+
+def build_cases(size: str) -> dict:
+    """生成某一档位的所有用例：{名称: 无参函数}"""
+    spec = SIZES[size]
+    image = make_image(*spec["image"])
+    batch = [make_image(*spec["image"], seed=i) for i in range(4)]
+    audio = make_audio(spec["seconds"])
+    audio_44k = make_audio(spec["seconds"], sample_rate=44100)
+
+    pcm = audio[44:]
+    chunk_size = max(len(pcm) // 100, 2) // 2 * 2
+    chunks = [pcm[i:i + chunk_size] for i in range(0, len(pcm), chunk_size)]
+    num_samples = len(pcm) // 2
+
+    ip, ap = ImageProcessor, AudioProcessor
+    cases = {
+        "image.extract_dominant_colors": lambda: ip.extract_dominant_colors(image),
+        "image.extract_weighted_colors": lambda: ip.extract_weighted_colors(image),
+        "image.detect_focus_point": lambda: ip.detect_focus_point(image),
+        "image.detect_focus_region": lambda: ip.detect_focus_region(image),
+        "image.calculate_balance_score": lambda: ip.calculate_balance_score(image),
+        "image.analyze_composition": lambda: ip.analyze_composition(image),
+        "image.create_thumbnail": lambda: ip.create_thumbnail(image),
+        "image.add_watermark": lambda: ip.add_watermark(image),
+        "image.add_watermark_batch": lambda: ip.add_watermark_batch(batch),
+        "image.detect_scene_type": lambda: ip.detect_scene_type(image),
+        "image.generate_palette": lambda: ip.generate_palette(image),
+        "audio.create_wav_header": lambda: ap.create_wav_header(1, 16000, num_samples),
+        "audio.merge_audio_chunks": lambda: ap.merge_audio_chunks(chunks),
+        "audio.adjust_audio_volume": lambda: ap.adjust_audio_volume(audio, 0.8),
+        "audio.add_fade_in_out": lambda: ap.add_fade_in_out(audio, 0.5),
+        "audio.get_audio_duration": lambda: ap.get_audio_duration(audio),
+        "audio.get_audio_info": lambda: ap.get_audio_info(audio),
+        "audio.validate_audio": lambda: ap.validate_audio(audio),
+        "audio.normalize_audio": lambda: ap.normalize_audio(audio),
+        "audio.normalize_loudness": lambda: ap.normalize_loudness(audio),
+        "audio.convert_audio_format": lambda: ap.convert_audio_format(audio_44k, 16000),
+        "audio.process_audio": lambda: ap.process_audio(audio, ["normalize_loudness", ("fade", {"fade_in": 0.5})]),
+    }
+
+    # 每个已注册的艺术效果各自计时（原图与预览）
+    for effect in available_effects():
+        cases[f"image.apply_artistic_effect[{effect}]"] = \
+            lambda effect=effect: ip.apply_artistic_effect(image, effect)
+        cases[f"image.apply_artistic_effect[{effect}][preview]"] = \
+            lambda effect=effect: ip.apply_artistic_effect(image, effect, preview=True)
+    return cases
+
+
+def time_case(func, repeat: int) -> dict:
+    func()  # 预热（加载模型表、滤波器设计等一次性开销）
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+    return {
+        "median_ms": round(statistics.median(timings), 4),
+        "min_ms": round(min(timings), 4),
+        "repeat": repeat
+    }
+
+
+def check_effects() -> list:
+    """计时前的正确性检查：白底图片经过每种艺术效果后仍应是浅色（防止数值溢出回绕），返回不通过的效果"""
+    white = np.full((64, 64, 3), 255, dtype=np.uint8)
+    # 卡通效果只保留边缘处的颜色，白底本来就会变黑
+    names = [name for name in available_effects() if name != "cartoon"]
+    return [name for name in names if get_effect(name).apply(white).mean() < 200]
+
+
+def environment() -> dict:
+    return {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "numpy": np.__version__,
+        "opencv": cv2.__version__,
+        "pillow": Image.__version__,
+    }
+
+
+def compare(results: dict, baseline: dict, threshold: float, min_delta_ms: float) -> list:
+    """返回 [(名称, 基线ms, 本次ms, 比值)]，只包含超过阈值的用例（亚毫秒级的抖动不计）"""
+    regressions = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if not base:
+            continue
+        ratio = result["median_ms"] / max(base["median_ms"], 1e-6)
+        if ratio > threshold and result["median_ms"] - base["median_ms"] > min_delta_ms:
+            regressions.append((name, base["median_ms"], result["median_ms"], ratio))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ImageProcessor / AudioProcessor 基准测试")
+    parser.add_argument("--sizes", default="small,medium,large", help="档位，逗号分隔")
+    parser.add_argument("--filter", default="", help="只运行名称包含该字符串的用例")
+    parser.add_argument("--repeat", type=int, default=None, help="重复次数（默认按档位 10/5/3）")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT, help="结果 JSON 路径")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="基线 JSON 路径")
+    parser.add_argument("--threshold", type=float, default=1.25, help="耗时超过基线的倍数视为回退")
+    parser.add_argument("--min-delta-ms", type=float, default=0.5, help="耗时增加少于该值时不视为回退")
+    parser.add_argument("--save-baseline", action="store_true", help="把本次结果写入基线")
+    args = parser.parse_args()
+
+    sizes = [s.strip() for s in args.sizes.split(",") if s.strip()]
+    baseline = {}
+    if os.path.exists(args.baseline) and not args.save_baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f).get("results", {})
+
+    broken = check_effects()
+    if broken:
+        print(f"⚠️ 白底图片经过以下艺术效果后变暗: {', '.join(broken)}")
+        sys.exit(1)
+
+    results = {}
+    print(f"{'用例':<60}{'中位数(ms)':>12}{'最小(ms)':>12}{'基线(ms)':>12}{'比值':>8}")
+    for size in sizes:
+        cases = build_cases(size)
+        for name, func in cases.items():
+            if args.filter and args.filter not in name:
+                continue
+            key = f"{name}[{size}]"
+            result = time_case(func, args.repeat or MAX_REPEAT[size])
+            results[key] = result
+
+            base = baseline.get(key)
+            base_text = f"{base['median_ms']:.2f}" if base else "-"
+            ratio_text = f"{result['median_ms'] / max(base['median_ms'], 1e-6):.2f}" if base else "-"
+            print(f"{key:<60}{result['median_ms']:>12.2f}{result['min_ms']:>12.2f}{base_text:>12}{ratio_text:>8}")
+
+    report = {"environment": environment(), "results": results}
+    target = args.baseline if args.save_baseline else args.output
+    os.makedirs(os.path.dirname(os.path.abspath(target)), exist_ok=True)
+    with open(target, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"\n结果已写入 {target}")
+
+    regressions = compare(results, baseline, args.threshold, args.min_delta_ms)
+    if regressions:
+        print(f"\n⚠️ {len(regressions)} 个用例比基线慢 {args.threshold:.2f} 倍以上:")
+        for name, base_ms, current_ms, ratio in regressions:
+            print(f"  {name}: {base_ms:.2f}ms -> {current_ms:.2f}ms (x{ratio:.2f})")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,418 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Coze / DashScope / 火山引擎视频接口的本地桩服务（离线压测用）
+
+一个端口同时提供三类接口，按路径后缀路由，可以挂在任意前缀下：
+    POST .../chat/completions             DashScope 兼容模式（文本 / JSON 分析 / 文本+音频，支持 SSE 流式）
+    POST .../v1/files/upload              Coze 文件上传
+    POST .../v1/workflow/stream_run       Coze 工作流流式执行（SSE）
+    POST .../v1/video-generation/submit   火山引擎视频任务提交
+    POST .../v1/video-generation/query    火山引擎视频任务查询
+    GET  /stub/stats                      各接口的请求数 / 注入错误数
+
+各接口默认按线上的典型耗时延迟响应，可整体缩放、加抖动，并按比例注入错误。
+
+用法:
+    python benchmarks/stub_servers.py --port 8765 --time-scale 0.1 --error-rate 0.02
+
+    # 让应用或 load_test.py 使用桩服务
+    DASHSCOPE_BASE_URL=http://127.0.0.1:8765/compatible-mode/v1
+    COZE_BASE_URL=http://127.0.0.1:8765
+    HUOSHAN_BASE_URL=http://127.0.0.1:8765/video
+"""
+
+import os
+import sys
+import json
+import time
+import uuid
+import base64
+import random
+import argparse
+import threading
+import numpy as np
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+root_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(root_dir, 'src'))
+
+from utils.wav_stream import build_wav_header
+
+# 各接口的典型耗时（秒）：非流式为整体耗时，流式为首包前的等待
+ROUTE_LATENCY = {
+    "chat": 1.5,
+    "chat_audio": 2.0,
+    "upload": 0.3,
+    "workflow": 2.0,
+    "video_submit": 0.5,
+    "video_query": 0.2,
+}
+
+# 流式接口相邻两个事件之间的间隔（秒）
+STREAM_INTERVAL = {
+    "chat": 0.05,
+    "chat_audio": 0.1,
+    "workflow": 1.0,
+}
+
+# 视频任务从提交到完成的时长（秒）
+VIDEO_RENDER_SECONDS = 30.0
+
+# 语音：每个字对应的时长（秒）与采样率
+SPEECH_SECONDS_PER_CHAR = 0.2
+SPEECH_SAMPLE_RATE = 24000
+
+ANALYSIS_RESULT = {
+    "theme_analysis": {"main_theme": "森林里的小房子", "elements": ["房子", "树", "太阳"], "story_hint": "小兔子回家了"},
+    "color_analysis": {"dominant_colors": ["绿色", "黄色"], "emotional_tone": "温暖", "color_psychology": "明亮的颜色表达愉快心情"},
+    "composition_analysis": {"composition_type": "中心构图", "balance_score": 78, "focus_point": "画面中央的房子"},
+    "emotional_analysis": {"primary_emotions": ["快乐", "安心"], "expression_style": "大胆", "confidence_level": "有信心"},
+    "development_analysis": {"stage": "图式期", "age_range": "5-7岁", "milestones": ["出现基底线"], "suggestions": ["尝试添加人物"]}
+}
+
+FEEDBACK_TEXT = "哇，你画的小房子好温暖！里面住着谁呀？"
+
+
+class StubConfig:
+    """桩服务的延迟与错误注入配置"""
+
+    def __init__(
+        self,
+        time_scale: float = 1.0,
+        jitter: float = 0.2,
+        error_rate: float = 0.0,
+        error_status: int = 500,
+        video_seconds: float = VIDEO_RENDER_SECONDS,
+        seed: int = None
+    ):
+        """
+        Args:
+            time_scale: 所有延迟的缩放系数（0 表示不延迟）
+            jitter: 延迟的随机浮动比例（0.2 表示 ±20%）
+            error_rate: 注入错误的比例
+            error_status: 注入错误时返回的 HTTP 状态码（如 500、429、503）
+            video_seconds: 视频任务完成所需时长（同样受 time_scale 缩放）
+            seed: 随机种子
+        """
+        self.time_scale = time_scale
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.video_seconds = video_seconds
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def delay(self, seconds: float) -> float:
+        with self._lock:
+            factor = 1 + self._random.uniform(-self.jitter, self.jitter)
+        return max(0.0, seconds * self.time_scale * factor)
+
+    def sleep(self, route: str) -> None:
+        time.sleep(self.delay(ROUTE_LATENCY[route]))
+
+    def should_fail(self) -> bool:
+        if self.error_rate <= 0:
+            return False
+        with self._lock:
+            return self._random.random() < self.error_rate
+
+
+def speech_wav(text: str) -> bytes:
+    """按文本长度合成一段"语音"：带音节包络的谐波音，16bit 单声道 WAV"""
+    seconds = max(0.5, len(text) * SPEECH_SECONDS_PER_CHAR)
+    t = np.arange(int(seconds * SPEECH_SAMPLE_RATE)) / SPEECH_SAMPLE_RATE
+    tone = np.sin(2 * np.pi * 240 * t) + 0.5 * np.sin(2 * np.pi * 480 * t)
+    envelope = np.sin(np.pi * 4 * t) ** 2
+    pcm = (tone * envelope * 6000).astype('<i2').tobytes()
+    return build_wav_header(1, SPEECH_SAMPLE_RATE, 2, len(pcm)) + pcm
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    server_version = "DreamWeaverStub/1.0"
+
+    # 路径后缀 -> (统计名称, 处理方法)
+    ROUTES = (
+        ("/chat/completions", "chat", "_chat_completions"),
+        ("/v1/files/upload", "upload", "_coze_upload"),
+        ("/v1/workflow/stream_run", "workflow", "_coze_workflow_stream"),
+        ("/v1/video-generation/submit", "video_submit", "_video_submit"),
+        ("/v1/video-generation/query", "video_query", "_video_query"),
+    )
+
+    def log_message(self, format, *args):
+        # 压测时每秒上百条访问日志没有意义
+        pass
+
+    @property
+    def config(self) -> StubConfig:
+        return self.server.config
+
+    def do_GET(self):
+        if self.path.split('?')[0] == "/stub/stats":
+            self._send_json(200, self.server.stats())
+        else:
+            self._send_json(404, {"error": "not found"})
+
+    def do_POST(self):
+        path = self.path.split('?')[0]
+        body = self.rfile.read(int(self.headers.get('Content-Length') or 0))
+
+        for suffix, name, method in self.ROUTES:
+            if path.endswith(suffix):
+                self.server.count(name)
+                if self.config.should_fail():
+                    self.server.count(name, failed=True)
+                    self.config.sleep(name)
+                    self._send_json(self.config.error_status, {"code": self.config.error_status, "message": "injected error"})
+                    return
+                getattr(self, method)(body)
+                return
+
+        self._send_json(404, {"error": f"unknown path {path}"})
+
+    # ---- DashScope ----
+
+    def _chat_completions(self, body: bytes):
+        payload = json.loads(body or b'{}')
+        wants_audio = "audio" in (payload.get("modalities") or [])
+        stream = bool(payload.get("stream"))
+
+        prompt = self._last_user_text(payload.get("messages") or [])
+        if wants_audio:
+            content = prompt
+        elif "JSON数组" in prompt:
+            # 多图打包分析：每幅图一个带序号的结果
+            images = self._image_count(payload.get("messages") or [])
+            content = json.dumps([{"index": i, **ANALYSIS_RESULT} for i in range(1, images + 1)], ensure_ascii=False)
+        elif "JSON" in prompt:
+            content = json.dumps(ANALYSIS_RESULT, ensure_ascii=False)
+        else:
+            content = FEEDBACK_TEXT
+
+        route = "chat_audio" if wants_audio else "chat"
+        self.config.sleep(route)
+
+        if not stream:
+            message = {"role": "assistant", "content": content}
+            if wants_audio:
+                message["audio"] = base64.b64encode(speech_wav(content)).decode('ascii')
+            self._send_json(200, {
+                "id": f"chatcmpl-{uuid.uuid4().hex}",
+                "object": "chat.completion",
+                "model": payload.get("model"),
+                "choices": [{"index": 0, "message": message, "finish_reason": "stop"}]
+            })
+            return
+
+        self._start_sse()
+        if wants_audio:
+            wav = speech_wav(content)
+            chunk_size = SPEECH_SAMPLE_RATE // 5 * 2  # 每块 200ms
+            for start in range(0, len(wav), chunk_size):
+                delta = {"audio": {"data": base64.b64encode(wav[start:start + chunk_size]).decode('ascii')}}
+                self._send_chat_delta(delta, STREAM_INTERVAL["chat_audio"])
+        else:
+            for start in range(0, len(content), 8):
+                self._send_chat_delta({"content": content[start:start + 8]}, STREAM_INTERVAL["chat"])
+        self._send_sse_lines(["data: [DONE]"])
+
+    @staticmethod
+    def _last_user_text(messages) -> str:
+        for message in reversed(messages):
+            content = message.get("content")
+            if isinstance(content, str):
+                return content
+            if isinstance(content, list):
+                texts = [part.get("text", "") for part in content if part.get("type") == "text"]
+                if texts:
+                    return "".join(texts)
+        return ""
+
+    @staticmethod
+    def _image_count(messages) -> int:
+        content = messages[-1].get("content") if messages else None
+        if not isinstance(content, list):
+            return 0
+        return sum(1 for part in content if part.get("type") == "image_url")
+
+    def _send_chat_delta(self, delta: dict, interval: float):
+        time.sleep(self.config.delay(interval))
+        chunk = {"object": "chat.completion.chunk", "choices": [{"index": 0, "delta": delta}]}
+        self._send_sse_lines([f"data: {json.dumps(chunk, ensure_ascii=False)}"])
+
+    # ---- Coze ----
+
+    def _coze_upload(self, body: bytes):
+        self.config.sleep("upload")
+        self._send_json(200, {
+            "code": 0,
+            "msg": "",
+            "data": {
+                "id": str(uuid.uuid4().int)[:19],
+                "bytes": len(body),
+                "created_at": int(time.time()),
+                "file_name": "drawing.png"
+            }
+        })
+
+    def _coze_workflow_stream(self, body: bytes):
+        payload = json.loads(body or b'{}')
+        self.config.sleep("workflow")
+
+        result = {
+            "AudioUrl": "https://example.com/stub/music.mp3",
+            "emotion": "开心",
+            "comment_audio": "https://example.com/stub/comment.mp3",
+            "comment_text": "你的画色彩好明亮，看得出你画的时候很开心！",
+            "video_url": "https://example.com/stub/video.mp4",
+            "workflow_id": payload.get("workflow_id")
+        }
+
+        # 中间节点输出非 JSON 文本，最后一个节点输出结果 JSON
+        self._start_sse()
+        nodes = ["识别画面", "生成内容"]
+        for seq, title in enumerate(nodes):
+            self._send_workflow_event(seq, "Message", {
+                "content": f"{title}完成", "node_title": title, "node_seq_id": str(seq), "node_is_finish": True
+            })
+        self._send_workflow_event(len(nodes), "Message", {
+            "content": json.dumps(result, ensure_ascii=False),
+            "node_title": "End", "node_seq_id": str(len(nodes)), "node_is_finish": True
+        })
+        self._send_sse_lines([f"id: {len(nodes) + 1}", "event: Done", "data: {}"])
+
+    def _send_workflow_event(self, event_id: int, event: str, data: dict):
+        time.sleep(self.config.delay(STREAM_INTERVAL["workflow"]))
+        self._send_sse_lines([f"id: {event_id}", f"event: {event}", f"data: {json.dumps(data, ensure_ascii=False)}"])
+
+    # ---- 火山引擎视频 ----
+
+    def _video_submit(self, body: bytes):
+        self.config.sleep("video_submit")
+        task_id = f"cgt-{uuid.uuid4().hex[:16]}"
+        self.server.video_tasks[task_id] = time.monotonic()
+        self._send_json(200, {"code": 0, "message": "success", "data": {"task_id": task_id}})
+
+    def _video_query(self, body: bytes):
+        task_id = json.loads(body or b'{}').get("task_id")
+        self.config.sleep("video_query")
+
+        submitted = self.server.video_tasks.get(task_id)
+        if submitted is None:
+            self._send_json(200, {"code": 40004, "message": f"task {task_id} not found"})
+            return
+
+        total = self.config.video_seconds * self.config.time_scale
+        progress = 100 if total <= 0 else min(100, int((time.monotonic() - submitted) / total * 100))
+        data = {"task_id": task_id, "status": "success" if progress >= 100 else "running", "progress": progress}
+        if progress >= 100:
+            data["output"] = {"video_url": f"https://example.com/stub/{task_id}.mp4"}
+            data["cost"] = 0.0
+        self._send_json(200, {"code": 0, "message": "success", "data": data})
+
+    # ---- 输出 ----
+
+    def _send_json(self, status: int, data: dict):
+        body = json.dumps(data, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _start_sse(self):
+        # HTTP/1.0 响应不带长度，连接关闭即表示流结束
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream; charset=utf-8')
+        self.send_header('Cache-Control', 'no-cache')
+        self.end_headers()
+
+    def _send_sse_lines(self, lines):
+        self.wfile.write(("\n".join(lines) + "\n\n").encode('utf-8'))
+        self.wfile.flush()
+
+
+class StubServer(ThreadingHTTPServer):
+    """每个请求一个线程的桩服务，记录各接口的请求数和注入错误数"""
+
+    daemon_threads = True
+
+    def __init__(self, address, config: StubConfig = None):
+        super().__init__(address, StubHandler)
+        self.config = config or StubConfig()
+        self.video_tasks = {}
+        self._counts = Counter()
+        self._failures = Counter()
+        self._lock = threading.Lock()
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def service_urls(self) -> dict:
+        """供 ConfigLoader 使用的接口地址环境变量"""
+        return {
+            "DASHSCOPE_BASE_URL": f"{self.base_url}/compatible-mode/v1",
+            "COZE_BASE_URL": self.base_url,
+            "HUOSHAN_BASE_URL": f"{self.base_url}/video",
+        }
+
+    def count(self, route: str, failed: bool = False) -> None:
+        with self._lock:
+            (self._failures if failed else self._counts)[route] += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"requests": dict(self._counts), "injected_errors": dict(self._failures)}
+
+
+def start_stub_server(host: str = "127.0.0.1", port: int = 0, config: StubConfig = None) -> StubServer:
+    """
+    在后台线程启动桩服务
+
+    Args:
+        host: 监听地址
+        port: 端口，0 表示自动分配
+        config: 延迟与错误注入配置
+
+    Returns:
+        已启动的服务，用完调用 shutdown()
+    """
+    server = StubServer((host, port), config)
+    thread = threading.Thread(target=server.serve_forever, name="stub-server", daemon=True)
+    thread.start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Coze / DashScope / 火山引擎接口桩服务")
+    parser.add_argument("--host", default="127.0.0.1", help="监听地址")
+    parser.add_argument("--port", type=int, default=8765, help="端口")
+    parser.add_argument("--time-scale", type=float, default=1.0, help="延迟缩放系数，0 表示不延迟")
+    parser.add_argument("--jitter", type=float, default=0.2, help="延迟的随机浮动比例")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="注入错误的比例")
+    parser.add_argument("--error-status", type=int, default=500, help="注入错误的 HTTP 状态码")
+    parser.add_argument("--video-seconds", type=float, default=VIDEO_RENDER_SECONDS, help="视频任务完成所需时长")
+    parser.add_argument("--seed", type=int, default=None, help="随机种子")
+    args = parser.parse_args()
+
+    config = StubConfig(args.time_scale, args.jitter, args.error_rate, args.error_status, args.video_seconds, args.seed)
+    server = StubServer((args.host, args.port), config)
+    print(f"桩服务已启动: {server.base_url}")
+    for name, url in server.service_urls().items():
+        print(f"  {name}={url}")
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print(json.dumps(server.stats(), ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -7,9 +7,11 @@ if src_dir not in sys.path:
     sys.path.insert(0, src_dir)
 
 import streamlit as st
-import base64
 from utils.session_manager import init_session_state
 from utils.config_loader import ConfigLoader
+from utils.asset_loader import get_background_css, get_image_data_uri
+from utils.telemetry import start_metrics_server
+from services.registry import get_registry
 
 # 页面配置
 st.set_page_config(
@@ -22,47 +24,31 @@ st.set_page_config(
 # 初始化会话状态
 init_session_state()
 
-# 获取背景图片路径并转换为base64
-script_dir = os.path.dirname(os.path.abspath(__file__))
-project_root = os.path.dirname(script_dir)
-bg_img_path = os.path.join(project_root, "assets", "背景.png")
-
-def get_base64_image(image_path):
-    """将图片转换为base64编码"""
-    try:
-        with open(image_path, "rb") as img_file:
-            return base64.b64encode(img_file.read()).decode()
-    except:
-        return None
-
-bg_base64 = get_base64_image(bg_img_path)
-
-# 自定义CSS样式（含背景图片）
-if bg_base64:
-    bg_css = f"""
-    .stApp {{
-        background-image: url("data:image/png;base64,{bg_base64}");
-        background-size: cover;
-        background-position: center;
-        background-repeat: no-repeat;
-        background-attachment: fixed;
-    }}
-    
+# 后台构造共享服务并预加载 OpenCV 等依赖（进程内只执行一次）
+get_registry().warm_up_async()
+
+# 配置了 TELEMETRY_METRICS_PORT 时提供 /metrics 供 Prometheus 抓取
+if os.getenv("TELEMETRY_METRICS_PORT"):
+    start_metrics_server(int(os.getenv("TELEMETRY_METRICS_PORT")))
+
+# 背景图片（进程内只编码一次的 WebP data URI）
+bg_css = get_background_css(
+    "背景.png",
+    container_css="""
     /* 让内容区域有半透明白色背景，提高可读性 */
-    .main .block-container {{
+    .main .block-container {
         background-color: rgba(255, 255, 255, 0.85);
         border-radius: 20px;
         padding: 0 2rem 2rem 2rem;
         margin-top: -12rem;
-    }}
+    }
     
     /* 侧边栏半透明效果 */
-    [data-testid="stSidebar"] {{
+    [data-testid="stSidebar"] {
         background-color: rgba(255, 255, 255, 0.9);
-    }}
+    }
     """
-else:
-    bg_css = ""
+)
 
 st.markdown(f"""
 <style>
@@ -185,40 +171,36 @@ with st.sidebar:
     st.caption(f"版本: {config['version']}")
 
 # 主页面内容
-# 获取角色图片路径
-img_path = os.path.join(project_root, "assets", "球球角色透明背景.png")
-title_img_path = os.path.join(project_root, "assets", "绘梦精灵.png")
-
-# 读取角色图片并转为base64
-char_base64 = get_base64_image(img_path) if os.path.exists(img_path) else None
-title_img_base64 = get_base64_image(title_img_path) if os.path.exists(title_img_path) else None
+# 角色图片与标题图片
+char_uri = get_image_data_uri("球球角色透明背景.png", max_size=1024)
+title_img_uri = get_image_data_uri("绘梦精灵.png", max_size=1280)
 
 # 标题区域 - 文字居中，图片在右侧
-if char_base64 and title_img_base64:
+if char_uri and title_img_uri:
     st.markdown(f"""
     <div style="display: flex; justify-content: center; align-items: center; gap: 8px;">
         <div style="text-align: center; display: flex; flex-direction: column; align-items: center; margin-left: 280px;">
-            <img src="data:image/png;base64,{title_img_base64}" style="height: 360px; width: auto; margin: 0 auto 10px auto;">
+            <img src="{title_img_uri}" style="height: 360px; width: auto; margin: 0 auto 10px auto;">
             <p style="color: #666; font-size: 1.2em;">让每个孩子的画都能被看见、被听见、被记住</p>
         </div>
-        <img src="data:image/png;base64,{char_base64}" style="width: 300px; height: auto;">
+        <img src="{char_uri}" style="width: 300px; height: auto;">
     </div>
     """, unsafe_allow_html=True)
-elif title_img_base64:
+elif title_img_uri:
     st.markdown(f"""
     <div style="text-align: center; display: flex; flex-direction: column; align-items: center; margin-left: 280px;">
-        <img src="data:image/png;base64,{title_img_base64}" style="height: 360px; width: auto; margin: 0 auto 10px auto;">
+        <img src="{title_img_uri}" style="height: 360px; width: auto; margin: 0 auto 10px auto;">
         <p style="color: #666; font-size: 1.2em;">让每个孩子的画都能被看见、被听见、被记住</p>
     </div>
     """, unsafe_allow_html=True)
-elif char_base64:
+elif char_uri:
     st.markdown(f"""
     <div style="display: flex; justify-content: center; align-items: center; gap: 8px;">
         <div style="text-align: center; display: flex; flex-direction: column; align-items: center;">
             <h1 style="margin-bottom: 10px; font-size: 3em;">绘梦精灵</h1>
             <p style="color: #666; font-size: 1.2em;">让每个孩子的画都能被看见、被听见、被记住</p>
         </div>
-        <img src="data:image/png;base64,{char_base64}" style="width: 300px; height: auto;">
+        <img src="{char_uri}" style="width: 300px; height: auto;">
     </div>
     """, unsafe_allow_html=True)
 else:
@@ -233,13 +215,12 @@ else:
 col1, col2 = st.columns(2)
 
 with col1:
-    card1_img_path = os.path.join(project_root, "assets", "背景1.png")
-    card1_base64 = get_base64_image(card1_img_path)
-    if card1_base64:
+    card1_uri = get_image_data_uri("背景1.png", max_size=1280)
+    if card1_uri:
         st.markdown(f"""
         <div class="card" style="padding: 0;">
             <div class="card-img-wrap" style="border: 3px solid #FFD700;">
-                <img src="data:image/png;base64,{card1_base64}" alt="智能画板">
+                <img src="{card1_uri}" alt="智能画板">
             </div>
         </div>
         """, unsafe_allow_html=True)
@@ -253,13 +234,12 @@ with col1:
             st.info("👈 请从左侧边栏选择「智能画板」进入")
 
 with col2:
-    card2_img_path = os.path.join(project_root, "assets", "背景2.png")
-    card2_base64 = get_base64_image(card2_img_path)
-    if card2_base64:
+    card2_uri = get_image_data_uri("背景2.png", max_size=1280)
+    if card2_uri:
         st.markdown(f"""
         <div class="card" style="padding: 0;">
             <div class="card-img-wrap" style="border: 3px solid #4A90E2;">
-                <img src="data:image/png;base64,{card2_base64}" alt="作品工坊">
+                <img src="{card2_uri}" alt="作品工坊">
             </div>
         </div>
         """, unsafe_allow_html=True)
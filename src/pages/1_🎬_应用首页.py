@@ -1,48 +1,27 @@
 import streamlit as st
 from utils.session_manager import init_session_state
-import os
-import base64
+from utils.asset_loader import get_background_css, get_image_data_uri, get_optimized_asset_path
 
 init_session_state()
 
-def get_base64_image(image_path):
-    """将图片转换为 base64 编码"""
-    try:
-        with open(image_path, "rb") as f:
-            return base64.b64encode(f.read()).decode()
-    except Exception:
-        return None
-
 st.set_page_config(page_title="首页", page_icon="🎬", layout="wide")
 
-# 构建背景图片路径（用于本页底层背景）
-script_dir = os.path.dirname(os.path.abspath(__file__))
-project_root = os.path.dirname(os.path.dirname(script_dir))
-bg_img_path = os.path.join(project_root, "assets", "背景01.png")
-bg_base64 = get_base64_image(bg_img_path) if os.path.exists(bg_img_path) else None
-
-if bg_base64:
-    bg_css = f"""
-    .stApp {{
-        background-image: url("data:image/png;base64,{bg_base64}");
-        background-size: cover;
-        background-position: center;
-        background-repeat: no-repeat;
-        background-attachment: fixed;
-    }}
-    
-    .main .block-container {{
+# 本页底层背景（进程内只编码一次的 WebP data URI）
+bg_css = get_background_css(
+    "背景01.png",
+    container_css="""
+    .main .block-container {
         background-color: rgba(255, 255, 255, 0.85);
         border-radius: 20px;
         padding: 2rem;
-    }}
-    """
-else:
-    bg_css = """
+    }
+    """,
+    fallback_css="""
     .stApp {
         background: linear-gradient(135deg, #fdfbfb 0%, #ebedee 100%);
     }
     """
+)
 
 # 自定义 CSS 样式，打造童趣感
 st.markdown(f"""
@@ -160,39 +139,32 @@ st.markdown(f"""
 """, unsafe_allow_html=True)
 
 # 顶部欢迎区
-# 构建角色图片和标题图片路径
-img_path = os.path.join(project_root, "assets", "球球角色透明背景.png")
-welcome_title_path = os.path.join(project_root, "assets", "欢迎来到绘梦精灵.png")
-welcome_title_base64 = get_base64_image(welcome_title_path) if os.path.exists(welcome_title_path) else None
-
-# 功能卡片 / 装饰图片路径
-canvas_card_path = os.path.join(project_root, "assets", "背景1.png")
-canvas_card_base64 = get_base64_image(canvas_card_path) if os.path.exists(canvas_card_path) else None
-workshop_card_path = os.path.join(project_root, "assets", "背景2.png")
-workshop_card_base64 = get_base64_image(workshop_card_path) if os.path.exists(workshop_card_path) else None
-artist_bg_path = os.path.join(project_root, "assets", "艺术家背景.png")
-artist_bg_base64 = get_base64_image(artist_bg_path) if os.path.exists(artist_bg_path) else None
-zero_bg_path = os.path.join(project_root, "assets", "0门槛背景.png")
-zero_bg_base64 = get_base64_image(zero_bg_path) if os.path.exists(zero_bg_path) else None
-vis_bg_path = os.path.join(project_root, "assets", "视听背景.png")
-vis_bg_base64 = get_base64_image(vis_bg_path) if os.path.exists(vis_bg_path) else None
-companion_bg_path = os.path.join(project_root, "assets", "陪伴背景.png")
-companion_bg_base64 = get_base64_image(companion_bg_path) if os.path.exists(companion_bg_path) else None
+# 角色图片和标题图片
+img_path = get_optimized_asset_path("球球角色透明背景.png", max_size=1024)
+welcome_title_uri = get_image_data_uri("欢迎来到绘梦精灵.png")
+
+# 功能卡片 / 装饰图片
+canvas_card_uri = get_image_data_uri("背景1.png", max_size=1280)
+workshop_card_uri = get_image_data_uri("背景2.png", max_size=1280)
+artist_bg_uri = get_image_data_uri("艺术家背景.png", max_size=800)
+zero_bg_uri = get_image_data_uri("0门槛背景.png", max_size=800)
+vis_bg_uri = get_image_data_uri("视听背景.png", max_size=800)
+companion_bg_uri = get_image_data_uri("陪伴背景.png", max_size=800)
 
 # 使用列布局显示标题和角色图片
 col_title, col_img = st.columns([3, 1])
 
 with col_title:
-    if welcome_title_base64:
+    if welcome_title_uri:
         st.markdown(
-            f'<div style="text-align: center;"><img src="data:image/png;base64,{welcome_title_base64}" style="height: 600px; width: auto; display: inline-block; margin-left: 80px;" alt="欢迎来到绘梦精灵" /></div>',
+            f'<div style="text-align: center;"><img src="{welcome_title_uri}" style="height: 600px; width: auto; display: inline-block; margin-left: 80px;" alt="欢迎来到绘梦精灵" /></div>',
             unsafe_allow_html=True
         )
     else:
         st.markdown('<h1 class="hero-title">欢迎来到绘梦精灵</h1>', unsafe_allow_html=True)
 
 with col_img:
-    if os.path.exists(img_path):
+    if img_path:
         st.image(img_path, width=380)
 
 st.markdown('<p class="hero-subtitle">在这里，每一片云朵都能变成你的画笔，每一颗星星都能讲述你的故事</p>', unsafe_allow_html=True)
@@ -201,10 +173,10 @@ st.markdown('<p class="hero-subtitle">在这里，每一片云朵都能变成你
 col1, col2 = st.columns(2)
 
 with col1:
-    if canvas_card_base64:
+    if canvas_card_uri:
         st.markdown(f"""
         <div class="feature-card card-canvas" style="padding: 0; overflow: hidden;">
-            <img src="data:image/png;base64,{canvas_card_base64}" style="width: 100%; height: auto; display: block; border-radius: 26px;">
+            <img src="{canvas_card_uri}" style="width: 100%; height: auto; display: block; border-radius: 26px;">
         </div>
         """, unsafe_allow_html=True)
     else:
@@ -225,10 +197,10 @@ with col1:
             st.info("👈 请从左侧边栏选择「智能画板」进入")
 
 with col2:
-    if workshop_card_base64:
+    if workshop_card_uri:
         st.markdown(f"""
         <div class="feature-card card-workshop" style="padding: 0; overflow: hidden;">
-            <img src="data:image/png;base64,{workshop_card_base64}" style="width: 100%; height: auto; display: block; border-radius: 26px;">
+            <img src="{workshop_card_uri}" style="width: 100%; height: auto; display: block; border-radius: 26px;">
         </div>
         """, unsafe_allow_html=True)
     else:
@@ -252,21 +224,21 @@ st.markdown("---")
 
 # 项目亮点
 st.markdown('### 🌟 绘梦精灵的小秘密')
-if artist_bg_base64 and zero_bg_base64 and vis_bg_base64 and companion_bg_base64:
+if artist_bg_uri and zero_bg_uri and vis_bg_uri and companion_bg_uri:
     st.markdown(
         f"""
 <div class="highlight-grid">
     <div class="highlight-item" style="padding: 0; border: none; background: transparent;">
-        <img src="data:image/png;base64,{companion_bg_base64}" style="width: 100%; height: auto; display: block; border-radius: 20px;" alt="AI 伙伴全程陪伴" />
+        <img src="{companion_bg_uri}" style="width: 100%; height: auto; display: block; border-radius: 20px;" alt="AI 伙伴全程陪伴" />
     </div>
     <div class="highlight-item" style="padding: 0; border: none; background: transparent;">
-        <img src="data:image/png;base64,{vis_bg_base64}" style="width: 100%; height: auto; display: block; border-radius: 20px;" alt="视听动全方位体验" />
+        <img src="{vis_bg_uri}" style="width: 100%; height: auto; display: block; border-radius: 20px;" alt="视听动全方位体验" />
     </div>
     <div class="highlight-item" style="padding: 0; border: none; background: transparent;">
-        <img src="data:image/png;base64,{zero_bg_base64}" style="width: 100%; height: auto; display: block; border-radius: 20px;" alt="零门槛释放想象力" />
+        <img src="{zero_bg_uri}" style="width: 100%; height: auto; display: block; border-radius: 20px;" alt="零门槛释放想象力" />
     </div>
     <div class="highlight-item" style="padding: 0; border: none; background: transparent;">
-        <img src="data:image/png;base64,{artist_bg_base64}" style="width: 100%; height: auto; display: block; border-radius: 20px;" alt="每个孩子都是艺术家" />
+        <img src="{artist_bg_uri}" style="width: 100%; height: auto; display: block; border-radius: 20px;" alt="每个孩子都是艺术家" />
     </div>
 </div>
 """,
@@ -5,17 +5,18 @@ import uuid
 from datetime import datetime
 from PIL import Image
 import io
-import base64
 import numpy as np
 from streamlit_drawable_canvas import st_canvas
 
-from utils.session_manager import init_session_state
-from utils.file_handler import FileHandler
+from utils.session_manager import init_session_state, get_state, set_state
 from utils.image_processor import ImageProcessor
+from utils.asset_loader import get_background_css, get_optimized_asset_path
 from models.drawing_model import DrawingData, Artwork, Stroke
-from services.multimodal_service import MultimodalService
-from services.voice_service import VoiceService
-from services.coze_service import CozeService
+from services.registry import get_registry
+from utils.resilience import ANALYSIS_DEADLINE, INTERACTIVE_DEADLINE, WORKFLOW_DEADLINE, deadline
+
+# streamlit-drawable-canvas 使用的 fabric.js 版本（恢复画布时 initial_drawing 需要）
+CANVAS_FABRIC_VERSION = "4.4.0"
 
 st.set_page_config(
     page_title="智能画板",
@@ -26,34 +27,8 @@ st.set_page_config(
 
 init_session_state()
 
-# 添加背景图片
-import os
-script_dir = os.path.dirname(os.path.abspath(__file__))
-project_root = os.path.dirname(os.path.dirname(script_dir))
-bg_img_path = os.path.join(project_root, "assets", "背景01.png")
-
-def get_base64_image(image_path):
-    with open(image_path, "rb") as f:
-        return base64.b64encode(f.read()).decode()
-
-if os.path.exists(bg_img_path):
-    bg_base64 = get_base64_image(bg_img_path)
-    bg_css = f"""
-    .stApp {{
-        background-image: url("data:image/png;base64,{bg_base64}");
-        background-size: cover;
-        background-position: center;
-        background-repeat: no-repeat;
-        background-attachment: fixed;
-    }}
-    .main .block-container {{
-        background-color: rgba(255, 255, 255, 0.85);
-        border-radius: 16px;
-        padding: 2rem;
-    }}
-    """
-else:
-    bg_css = ""
+# 添加背景图片（进程内只编码一次的 WebP data URI）
+bg_css = get_background_css("背景01.png")
 
 # 按钮蓝色样式
 button_css = """
@@ -77,53 +52,61 @@ button_css = """
 
 st.markdown(f"<style>{bg_css}{button_css}</style>", unsafe_allow_html=True)
 
-# 初始化服务
-@st.cache_resource
-def get_services():
-    return {
-        'multimodal': MultimodalService(),
-        'voice': VoiceService(),
-        'coze': CozeService()
-    }
-
-services = get_services()
-file_handler = FileHandler()
+# 服务由进程内的注册表统一构造，页面重新运行时直接复用
+registry = get_registry()
+services = registry.services('multimodal', 'voice', 'coze')
+file_handler = registry.get('file_handler')
 
 st.markdown("# 智能画板")
 st.markdown("*在画板上自由绘画，小精灵球球会实时陪伴与反馈*")
 
-# 初始化触发计数器
+# 画板状态保存在服务端会话存储
+drawing_data = get_state('drawing_data')
+
+# 打开页面时把已保存的笔画交给画布恢复。只在本次浏览器会话第一次运行时生成：
+# initial_drawing 一旦变化，画布会重新加载并丢掉之后画的内容
+if 'canvas_initial_drawing' not in st.session_state:
+    st.session_state.canvas_initial_drawing = {
+        'version': drawing_data.get('canvas_version', CANVAS_FABRIC_VERSION),
+        'objects': list(drawing_data['strokes']),
+    }
+    # 画布还没加载完恢复的笔画时，不用它返回的结果覆盖已保存的笔画
+    st.session_state.canvas_restored = not drawing_data['strokes']
+
+# 初始化触发计数器（恢复的笔画不触发互动）
 if 'last_trigger_count' not in st.session_state:
-    st.session_state.last_trigger_count = 0
+    st.session_state.last_trigger_count = len(drawing_data['strokes'])
 
 # 侧边栏设置
+
 with st.sidebar:
     st.markdown("## 画笔设置")
 
     # 笔刷设置
     stroke_color = st.color_picker(
         "选择笔刷颜色",
-        value=st.session_state.drawing_data.get('stroke_color', '#000000'),
+        value=drawing_data.get('stroke_color', '#000000'),
         key="color_picker"
     )
-    st.session_state.drawing_data['stroke_color'] = stroke_color
+    drawing_data['stroke_color'] = stroke_color
 
     stroke_width = st.slider(
         "笔刷粗细",
         min_value=1,
         max_value=20,
-        value=st.session_state.drawing_data.get('stroke_width', 5),
+        value=drawing_data.get('stroke_width', 5),
         key="stroke_width"
     )
-    st.session_state.drawing_data['stroke_width'] = stroke_width
+    drawing_data['stroke_width'] = stroke_width
 
     st.markdown("### 背景设置")
     bg_color = st.color_picker(
         "背景颜色",
-        value=st.session_state.drawing_data.get('background_color', '#FFFFFF'),
+        value=drawing_data.get('background_color', '#FFFFFF'),
         key="bg_color"
     )
-    st.session_state.drawing_data['background_color'] = bg_color
+    drawing_data['background_color'] = bg_color
+    set_state('drawing_data', drawing_data)
 
     st.divider()
     st.markdown("### 工具")
@@ -167,14 +150,15 @@ with canvas_col:
         height=canvas_height,
         width=canvas_width,
         drawing_mode="freedraw",
+        initial_drawing=st.session_state.canvas_initial_drawing,
         key="canvas",
         display_toolbar=True,
     )
 
 with spirit_col:
     # 显示小精灵图片
-    spirit_img_path = os.path.join(project_root, "assets", "小精灵3.png")
-    if os.path.exists(spirit_img_path):
+    spirit_img_path = get_optimized_asset_path("小精灵3.png", max_size=1024)
+    if spirit_img_path:
         st.image(spirit_img_path, use_container_width=True)
     else:
         st.info("小精灵球球在这里陪你画画~")
@@ -183,15 +167,23 @@ with spirit_col:
 if canvas_result.json_data is not None:
     objects = canvas_result.json_data["objects"]
     current_count = len(objects)
-    
-    # 更新session state中的笔画数据（简化存储）
-    st.session_state.drawing_data['strokes'] = objects
+
+    # 返回的笔画已包含恢复的笔画，说明画布加载完成，之后才同步到会话存储
+    if not st.session_state.canvas_restored:
+        st.session_state.canvas_restored = current_count >= len(st.session_state.canvas_initial_drawing['objects'])
+
+    # 更新会话存储中的笔画数据（简化存储）
+    if st.session_state.canvas_restored:
+        drawing_data['strokes'] = objects
+        drawing_data['canvas_version'] = canvas_result.json_data.get('version', CANVAS_FABRIC_VERSION)
+        set_state('drawing_data', drawing_data)
     
     # 逻辑：每8笔触发一次语音互动
     if current_count > 0 and current_count >= st.session_state.last_trigger_count + 8:
         st.session_state.last_trigger_count = current_count
         
-        with st.spinner("球球正在看你的画..."):
+        # 即时反馈（点评 + 语音）要快，超时就跳过这一次
+        with st.spinner("球球正在看你的画..."), deadline(INTERACTIVE_DEADLINE):
             try:
                 # 获取图片数据
                 if canvas_result.image_data is not None:
@@ -258,7 +250,7 @@ with col3:
 
 # 处理生成音乐
 if st.session_state.get('generate_music'):
-    with st.spinner("🎵 正在为你的画生成音乐..."):
+    with st.spinner("🎵 正在为你的画生成音乐..."), deadline(WORKFLOW_DEADLINE):
         try:
             if canvas_result.image_data is not None:
                 # 获取图片数据
@@ -291,7 +283,8 @@ if st.session_state.get('generate_music'):
 
 # 处理完成作品
 if st.session_state.get('finish_artwork'):
-    with st.spinner("正在进行深度分析..."):
+    # 分析、补全缺失部分、小精灵点评和语音共用一个截止时间，剩余时间不足时各服务直接返回默认结果
+    with st.spinner("正在进行深度分析..."), deadline(ANALYSIS_DEADLINE):
         try:
             if canvas_result.image_data is not None:
                 # 获取图片
@@ -317,6 +310,7 @@ if st.session_state.get('finish_artwork'):
                 focus_point = ImageProcessor.detect_focus_point(image_data)
                 scene_type = ImageProcessor.detect_scene_type(image_data)
                 palette_info = ImageProcessor.generate_palette(image_data)
+                composition_metrics = ImageProcessor.analyze_composition(image_data)
                 
                 # 2. 多模态分析 (整合视觉分析数据)
                 drawing_info = {
@@ -356,9 +350,10 @@ if st.session_state.get('finish_artwork'):
                 # 补充视觉分析数据到 artwork (如果模型支持，这里暂存到 analysis 字段中展示)
                 artwork.color_analysis['palette'] = palette_info.get('palette', [])
                 artwork.composition_analysis['calculated_balance'] = balance_score
+                artwork.composition_analysis['metrics'] = composition_metrics
                 
-                # 保存到session
-                st.session_state.current_artwork = artwork
+                # 保存到会话存储
+                set_state('current_artwork', artwork)
                 
                 st.success("✨ 分析完成！")
                 st.session_state.finish_artwork = False
@@ -370,8 +365,8 @@ if st.session_state.get('finish_artwork'):
             st.session_state.finish_artwork = False
 
 # 显示分析结果
-if st.session_state.get('show_analysis') and st.session_state.current_artwork:
-    artwork = st.session_state.current_artwork
+if st.session_state.get('show_analysis') and get_state('current_artwork'):
+    artwork = get_state('current_artwork')
 
     st.divider()
     st.markdown("## AI分析结果")
@@ -447,7 +442,7 @@ if st.session_state.get('show_analysis') and st.session_state.current_artwork:
                         result = services['coze'].generate_music_from_image(file_id)
                         if result.get('status') == 'success':
                             artwork.music_url = result.get('music_url')
-                            st.session_state.current_artwork = artwork
+                            set_state('current_artwork', artwork)
                             st.success("🎵 音乐生成成功！")
                             if artwork.music_url:
                                 st.audio(artwork.music_url)
@@ -1,15 +1,11 @@
 import streamlit as st
 import uuid
-import os
-import base64
 from datetime import datetime
-from utils.session_manager import init_session_state
-from utils.file_handler import FileHandler
+from utils.session_manager import init_session_state, set_state
+from utils.asset_loader import get_background_css
 from models.drawing_model import Artwork
-from services.multimodal_service import MultimodalService
-from services.voice_service import VoiceService
-from services.coze_service import CozeService
-from services.video_service import VideoService
+from services.registry import get_registry
+from utils.resilience import WORKFLOW_DEADLINE, deadline
 
 st.set_page_config(
     page_title="作品工坊",
@@ -20,33 +16,8 @@ st.set_page_config(
 
 init_session_state()
 
-# 添加背景图片
-script_dir = os.path.dirname(os.path.abspath(__file__))
-project_root = os.path.dirname(os.path.dirname(script_dir))
-bg_img_path = os.path.join(project_root, "assets", "背景01.png")
-
-def get_base64_image(image_path):
-    with open(image_path, "rb") as f:
-        return base64.b64encode(f.read()).decode()
-
-if os.path.exists(bg_img_path):
-    bg_base64 = get_base64_image(bg_img_path)
-    bg_css = f"""
-    .stApp {{
-        background-image: url("data:image/png;base64,{bg_base64}");
-        background-size: cover;
-        background-position: center;
-        background-repeat: no-repeat;
-        background-attachment: fixed;
-    }}
-    .main .block-container {{
-        background-color: rgba(255, 255, 255, 0.85);
-        border-radius: 16px;
-        padding: 2rem;
-    }}
-    """
-else:
-    bg_css = ""
+# 添加背景图片（进程内只编码一次的 WebP data URI）
+bg_css = get_background_css("背景01.png")
 
 # 按钮蓝色样式
 button_css = """
@@ -66,18 +37,10 @@ button_css = """
 
 st.markdown(f"<style>{bg_css}{button_css}</style>", unsafe_allow_html=True)
 
-# 初始化服务
-@st.cache_resource
-def get_services():
-    return {
-        'multimodal': MultimodalService(),
-        'voice': VoiceService(),
-        'coze': CozeService(),
-        'video': VideoService()
-    }
-
-services = get_services()
-file_handler = FileHandler()
+# 服务由进程内的注册表统一构造，页面重新运行时直接复用
+registry = get_registry()
+services = registry.services('multimodal', 'voice', 'coze', 'video')
+file_handler = registry.get('file_handler')
 
 st.markdown("# 🧚 作品工坊")
 st.markdown("*上传已有的图片，让AI为你创作音乐、点评和视频*")
@@ -114,7 +77,7 @@ with tab1:
 
         # 处理上传的文件
         if st.session_state.get('analyze_uploaded'):
-            with st.spinner("🤖 小精灵正在分析你的作品..."):
+            with st.spinner("🤖 小精灵正在分析你的作品..."), deadline(WORKFLOW_DEADLINE):
                 try:
                     # 读取文件
                     image_data = uploaded_file.getvalue()
@@ -151,7 +114,7 @@ with tab1:
                                 voice_feedback=comment_result.get('comment_text', '小精灵很喜欢你的画！')
                             )
 
-                            st.session_state.current_artwork = artwork
+                            set_state('current_artwork', artwork)
                             st.session_state.show_analysis = True
                             
                             # 显示点评音频
@@ -170,7 +133,7 @@ with tab1:
 
         # 处理直接生成音乐
         if st.session_state.get('generate_music_direct'):
-            with st.spinner("🎵 正在为你的画生成音乐..."):
+            with st.spinner("🎵 正在为你的画生成音乐..."), deadline(WORKFLOW_DEADLINE):
                 try:
                     image_data = uploaded_file.getvalue()
 
@@ -200,7 +163,7 @@ with tab1:
 
         # 处理直接生成视频
         if st.session_state.get('generate_video_direct'):
-            with st.spinner("🎬 魔法变身中..."):
+            with st.spinner("🎬 魔法变身中..."), deadline(WORKFLOW_DEADLINE):
                 try:
                     image_data = uploaded_file.getvalue()
                     
@@ -256,7 +219,7 @@ with tab2:
             )
 
             if st.button("生成音乐", use_container_width=True, key="btn_gen_music"):
-                with st.spinner("🎵 正在创作音乐..."):
+                with st.spinner("🎵 正在创作音乐..."), deadline(WORKFLOW_DEADLINE):
                     try:
                         image_data = music_file.getvalue()
                         file_id = services['coze'].upload_image_to_coze(image_data)
@@ -336,7 +299,7 @@ with tab3:
             )
 
             if st.button("生成视频", use_container_width=True, key="btn_gen_video"):
-                with st.spinner("🎬 魔法变身中..."):
+                with st.spinner("🎬 魔法变身中..."), deadline(WORKFLOW_DEADLINE):
                     try:
                         image_data = video_file.getvalue()
                         
@@ -1,9 +1,10 @@
 import streamlit as st
-import os
-import base64
 from pathlib import Path
 from datetime import datetime
-from utils.file_handler import FileHandler
+from services.registry import get_registry
+from services.multimodal_service import BATCH_PACK_SIZE, BATCH_MAX_WORKERS
+from utils.asset_loader import get_background_css
+from utils.batch_analyzer import get_ai_analysis, start_ai_analysis
 from utils.session_manager import init_session_state
 
 st.set_page_config(
@@ -13,33 +14,8 @@ st.set_page_config(
     initial_sidebar_state="collapsed"
 )
 
-# 添加背景图片
-script_dir = os.path.dirname(os.path.abspath(__file__))
-project_root = os.path.dirname(os.path.dirname(script_dir))
-bg_img_path = os.path.join(project_root, "assets", "背景01.png")
-
-def get_base64_image(image_path):
-    with open(image_path, "rb") as f:
-        return base64.b64encode(f.read()).decode()
-
-if os.path.exists(bg_img_path):
-    bg_base64 = get_base64_image(bg_img_path)
-    bg_css = f"""
-    .stApp {{
-        background-image: url("data:image/png;base64,{bg_base64}");
-        background-size: cover;
-        background-position: center;
-        background-repeat: no-repeat;
-        background-attachment: fixed;
-    }}
-    .main .block-container {{
-        background-color: rgba(255, 255, 255, 0.85);
-        border-radius: 16px;
-        padding: 2rem;
-    }}
-    """
-else:
-    bg_css = ""
+# 添加背景图片（进程内只编码一次的 WebP data URI）
+bg_css = get_background_css("背景01.png")
 
 # 强制注入稳定性 CSS
 st.markdown(f"""
@@ -88,7 +64,20 @@ st.markdown(f"""
 """, unsafe_allow_html=True)
 
 init_session_state()
-file_handler = FileHandler()
+registry = get_registry()
+file_handler = registry.get('file_handler')
+
+def has_ai_analysis(metadata: dict) -> bool:
+    """作品元数据中是否已有模型分析结果（只有本地计算的指标时不算）"""
+    return bool((metadata.get('theme_analysis') or {}).get('main_theme'))
+
+@st.fragment(run_every=2)
+def show_analysis_progress():
+    """后台分析的进度，每 2 秒刷新一次；结束后刷新整页以更新待分析数量"""
+    job = get_ai_analysis()
+    st.progress(job.done / max(job.total, 1), text=f"后台分析中 {job.done}/{job.total}（可以离开此页面）")
+    if not job.running:
+        st.rerun()
 
 st.markdown("# 🖼️ 艺术画廊")
 st.markdown("*在这里欣赏你创作的所有艺术作品*")
@@ -108,6 +97,34 @@ with st.sidebar:
     st.text(f"作品数量: {len(artworks_paths)}")
     st.text(f"会话数量: {len(all_users)}")
 
+    # 批量分析还没有 AI 分析结果的作品（老师查看全班作品），结果合并进作品元数据。
+    # 全班作品可能很多，在后台线程中运行，页面不会被阻塞
+    st.markdown("### 🔍 批量分析")
+    job = get_ai_analysis()
+    if job is not None and job.running:
+        show_analysis_progress()
+    else:
+        if job is not None:
+            if job.error:
+                st.error(f"上次分析在 {job.done}/{job.total} 处中断: {job.error}")
+            failed = job.done - job.saved
+            if failed:
+                st.warning(f"上次分析有 {failed} 幅作品失败，可稍后重试")
+            elif not job.error:
+                st.success(f"✨ 上次分析完成 {job.saved} 幅作品")
+
+        if st.button("🔍 分析全部作品", disabled=not artworks_paths):
+            # 逐个读取元数据较慢，只在点击时筛选还没有 AI 分析结果的作品
+            pending_paths = [path for path in artworks_paths if not has_ai_analysis(file_handler.load_metadata(path))]
+            if pending_paths:
+                # 每轮刚好填满所有并发请求
+                start_ai_analysis(
+                    registry.get('multimodal'), file_handler, pending_paths, BATCH_PACK_SIZE * BATCH_MAX_WORKERS
+                )
+                st.rerun()
+            else:
+                st.info("所有作品都已有分析结果")
+
 if not artworks_paths:
     st.info("画廊空空如也，快去创作你的第一幅作品吧！")
     st.stop()
@@ -178,14 +195,29 @@ if 'selected_artwork_id' in st.session_state and st.session_state.selected_artwo
     with col_info:
         # 显示文件信息
         artwork_path = Path(st.session_state.selected_artwork_path)
-        mtime = artwork_path.stat().st_mtime
-        create_date = datetime.fromtimestamp(mtime).strftime("%Y-%m-%d %H:%M:%S")
+        # 重复内容的作品共用同一个文件，文件修改时间不是本作品的保存时间
+        created_at = file_handler.get_created_time(artwork_path)
+        create_date = datetime.fromtimestamp(created_at).strftime("%Y-%m-%d %H:%M:%S")
         file_size = artwork_path.stat().st_size / 1024  # KB
         
         st.markdown(f"### 📋 作品信息")
         st.text(f"创建时间: {create_date}")
         st.text(f"文件大小: {file_size:.1f} KB")
         st.text(f"文件名: {artwork_path.name}")
+
+        # AI 分析结果（保存作品或“分析全部作品”写入的作品元数据）
+        analysis = file_handler.load_metadata(artwork_path)
+        if has_ai_analysis(analysis):
+            theme = analysis.get('theme_analysis', {})
+            color = analysis.get('color_analysis', {})
+            development = analysis.get('development_analysis', {})
+            st.divider()
+            st.markdown("#### 🔍 AI 分析")
+            st.markdown(f"**主题：** {theme.get('main_theme', '')}")
+            st.markdown(f"**色彩：** {'、'.join(color.get('dominant_colors', []))} · {color.get('emotional_tone', '')}")
+            st.markdown(f"**发展阶段：** {development.get('stage', '')}（{development.get('age_range', '')}）")
+            for suggestion in development.get('suggestions', []):
+                st.markdown(f"- {suggestion}")
                 
         # 下载区域
         st.divider()
@@ -200,3 +232,16 @@ if 'selected_artwork_id' in st.session_state and st.session_state.selected_artwo
                 mime="image/png",
                 use_container_width=True
             )
+
+        # 作品音频（只读取文件头获取时长）
+        artwork_audio = file_handler.get_artwork_audio(
+            artwork_path.parent.parent.name,
+            st.session_state.selected_artwork_id
+        )
+        if artwork_audio:
+            st.markdown("#### 🎧 作品音频")
+            audio_labels = {"feedback": "🧚 小精灵点评", "music": "🎵 配乐"}
+            for audio in artwork_audio:
+                label = audio_labels.get(audio["audio_type"], "🔊 音频")
+                st.caption(f"{label} · {audio.get('duration', 0):.1f} 秒 · {file_handler.format_file_size(audio['size'])}")
+                st.audio(audio["path"])
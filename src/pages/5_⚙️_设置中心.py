@@ -1,8 +1,14 @@
 import streamlit as st
-import os
-import base64
+from datetime import datetime
 from utils.session_manager import init_session_state, clear_session
-from utils.file_handler import FileHandler
+from services.registry import get_registry
+from utils.asset_loader import get_background_css
+from utils.telemetry import get_telemetry
+from utils.resilience import breaker_states
+from utils.lazy_import import lazy_import
+
+# pandas 只在性能监控有数据时用于绘图
+pd = lazy_import("pandas")
 
 st.set_page_config(
     page_title="设置中心",
@@ -11,35 +17,11 @@ st.set_page_config(
 )
 
 init_session_state()
-file_handler = FileHandler()
-
-# 添加背景图片
-script_dir = os.path.dirname(os.path.abspath(__file__))
-project_root = os.path.dirname(os.path.dirname(script_dir))
-bg_img_path = os.path.join(project_root, "assets", "背景01.png")
-
-def get_base64_image(image_path):
-    with open(image_path, "rb") as f:
-        return base64.b64encode(f.read()).decode()
-
-if os.path.exists(bg_img_path):
-    bg_base64 = get_base64_image(bg_img_path)
-    bg_css = f"""
-    .stApp {{
-        background-image: url("data:image/png;base64,{bg_base64}");
-        background-size: cover;
-        background-position: center;
-        background-repeat: no-repeat;
-        background-attachment: fixed;
-    }}
-    .main .block-container {{
-        background-color: rgba(255, 255, 255, 0.85);
-        border-radius: 16px;
-        padding: 2rem;
-    }}
-    """
-else:
-    bg_css = ""
+registry = get_registry()
+file_handler = registry.get('file_handler')
+
+# 添加背景图片（进程内只编码一次的 WebP data URI）
+bg_css = get_background_css("背景01.png")
 
 # 按钮蓝色样式
 button_css = """
@@ -60,7 +42,7 @@ st.markdown(f"<style>{bg_css}{button_css}</style>", unsafe_allow_html=True)
 st.markdown("# ⚙️ 设置中心")
 
 # 创建选项卡
-tab1, tab2, tab3, tab4 = st.tabs(["👤 个人信息", "🎨 界面设置", "📊 数据管理", "ℹ️ 关于应用"])
+tab1, tab2, tab3, tab4, tab5 = st.tabs(["👤 个人信息", "🎨 界面设置", "📊 数据管理", "📈 性能监控", "ℹ️ 关于应用"])
 
 with tab1:
     st.markdown("## 个人信息")
@@ -255,6 +237,113 @@ with tab3:
                     st.warning("所有作品将被永久删除！此操作无法撤销。")
 
 with tab4:
+    st.markdown("## 📈 性能监控")
+
+    st.markdown("### 服务状态")
+    status_labels = {"ok": "🟢 正常", "degraded": "🟡 未就绪", "not_started": "⚪ 未启动", "error": "🔴 异常"}
+    st.dataframe(
+        [{"服务": name, "状态": status_labels.get(item["status"], item["status"]), "说明": item["detail"]}
+         for name, item in registry.health().items()],
+        use_container_width=True,
+        hide_index=True
+    )
+
+    breakers = breaker_states()
+    if breakers:
+        st.markdown("### 外部接口熔断")
+        breaker_labels = {"closed": "🟢 正常", "half_open": "🟡 试探中", "open": "🔴 熔断"}
+        st.dataframe(
+            [{"接口": name, "状态": breaker_labels.get(item["state"], item["state"]),
+              "连续失败": item["failures"], "近期 p95 (ms)": item["p95_ms"]}
+             for name, item in breakers.items()],
+            use_container_width=True,
+            hide_index=True
+        )
+
+    telemetry = get_telemetry()
+    summary = telemetry.summary()
+
+    if not summary:
+        st.info("还没有调用记录。使用画板、加工工厂等功能后，这里会显示各项服务的耗时和成功率。")
+    else:
+        total_calls = sum(row["count"] for row in summary)
+        total_errors = sum(row["errors"] for row in summary)
+        total_bytes = sum(row["bytes_in"] + row["bytes_out"] for row in summary)
+        slowest = max(summary, key=lambda row: row["p95_ms"])
+
+        col1, col2, col3, col4 = st.columns(4)
+
+        with col1:
+            st.metric("调用次数", total_calls)
+
+        with col2:
+            st.metric("失败率", f"{total_errors / total_calls:.1%}")
+
+        with col3:
+            st.metric("最慢调用 (p95)", f"{slowest['p95_ms']:.0f} ms", slowest["name"], delta_color="off")
+
+        with col4:
+            st.metric("传输数据量", file_handler.format_file_size(total_bytes))
+
+        st.markdown("### 各调用耗时")
+        st.caption("基于最近的调用记录，按 p95 耗时排序")
+        st.dataframe(summary, use_container_width=True, hide_index=True)
+        st.bar_chart(
+            pd.DataFrame(summary[:15]).set_index("name")[["p50_ms", "p95_ms"]],
+            stack=False
+        )
+
+        recent = telemetry.spans(limit=200)
+        failures = [span for span in recent if span["status"] != "ok"][:20]
+        if failures:
+            st.markdown("### 最近的失败调用")
+            st.dataframe(
+                [{
+                    "时间": datetime.fromtimestamp(span["start_time"]).strftime("%H:%M:%S"),
+                    "调用": span["name"],
+                    "耗时(ms)": round(span["duration_ms"], 1),
+                    "错误": span["error"]
+                } for span in failures],
+                use_container_width=True,
+                hide_index=True
+            )
+
+        with st.expander("最近 50 次调用"):
+            st.dataframe(
+                [{
+                    "时间": datetime.fromtimestamp(span["start_time"]).strftime("%H:%M:%S"),
+                    "调用": span["name"],
+                    "耗时(ms)": round(span["duration_ms"], 1),
+                    "状态": span["status"],
+                    "发送": file_handler.format_file_size(span["bytes_in"]),
+                    "返回": file_handler.format_file_size(span["bytes_out"]),
+                    "重试": span["retries"]
+                } for span in recent[:50]],
+                use_container_width=True,
+                hide_index=True
+            )
+
+    st.divider()
+
+    col1, col2 = st.columns(2)
+
+    with col1:
+        st.download_button(
+            "📥 导出 OpenMetrics 指标",
+            data=telemetry.export_openmetrics(),
+            file_name="dreamweaver_metrics.txt",
+            mime="application/openmetrics-text",
+            use_container_width=True
+        )
+
+    with col2:
+        if st.button("🧹 清空调用记录", use_container_width=True):
+            telemetry.clear()
+            st.rerun()
+
+    st.caption("设置环境变量 TELEMETRY_METRICS_PORT 后，可由 Prometheus 从该端口的 /metrics 抓取指标")
+
+with tab5:
     st.markdown("## ℹ️ 关于应用")
 
     st.markdown("""
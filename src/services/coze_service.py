@@ -3,12 +3,31 @@ import json
 import time
 from typing import Optional, Dict, Any
 from utils.config_loader import ConfigLoader
-from cozepy import Coze, TokenAuth, WorkflowEvent, WorkflowEventType, Stream, COZE_CN_BASE_URL
+from utils.telemetry import annotate, instrument, is_not_none, status_ok
+from utils.lazy_import import lazy_import
+from utils.resilience import (
+    COZE_UPLOAD, COZE_WORKFLOW, CIRCUIT_OPEN_MESSAGE, WORKFLOW_DEADLINE,
+    check_deadline, deadline, guard, is_circuit_open, request_timeout
+)
+from utils.rate_limit import coalesce, request_key, throttle
+
+# cozepy 依赖 httpx、pydantic 等，导入较慢，只在配置了 Token 时加载
+cozepy = lazy_import("cozepy")
+
+COZE_CN_BASE_URL = "https://api.coze.cn"
+
+# 上传文件的超时（秒）；cozepy 默认 600 秒
+UPLOAD_TIMEOUT = 60.0
 
 class CozeService:
     """Coze工作流集成服务 - 用于音乐生成和AI点评"""
 
-    def __init__(self):
+    def __init__(self, session: Optional[requests.Session] = None):
+        """
+        Args:
+            session: 共享的 HTTP 会话（连接池），默认每次请求单独建立连接
+        """
+        self.session = session or requests
         config = ConfigLoader.get_coze_config()
         self.api_token = config.get("api_token") or ""
         self.api_token = self.api_token.strip() if isinstance(self.api_token, str) else ""
@@ -16,7 +35,8 @@ class CozeService:
         self.music_workflow_id = config.get("workflow_id", "7601786439168229386")
         self.comment_workflow_id = config.get("comment_workflow_id", "7601786024813445158")
         self.video_workflow_id = config.get("video_workflow_id", "7602166946105556998")
-        self.base_url = "https://api.coze.cn/v1"
+        self.api_base = (config.get("base_url") or COZE_CN_BASE_URL).rstrip("/")
+        self.base_url = f"{self.api_base}/v1"
         self.headers = {
             "Authorization": f"Bearer {self.api_token}",
             "Content-Type": "application/json"
@@ -24,11 +44,24 @@ class CozeService:
         # 未配置 Token 时不创建 Coze 客户端，相关功能会提示“请配置 COZE_API_TOKEN”
         self.coze = None
         if self.api_token:
-            self.coze = Coze(auth=TokenAuth(self.api_token), base_url=COZE_CN_BASE_URL)
+            try:
+                self.coze, _ = self._create_client(UPLOAD_TIMEOUT)
+            except ImportError as e:
+                print(f"Coze 客户端初始化失败: {str(e)}")
+
+    def _create_client(self, timeout: float):
+        """
+        Returns:
+            (Coze 客户端, 底层 HTTP 客户端)；cozepy 不支持按请求设置超时，只能在客户端上设置
+        """
+        http_client = cozepy.SyncHTTPClient(timeout=timeout)
+        coze = cozepy.Coze(auth=cozepy.TokenAuth(self.api_token), base_url=self.api_base, http_client=http_client)
+        return coze, http_client
 
     def _not_configured_result(self, feature: str) -> Dict[str, Any]:
         return {"status": "failed", "error": f"请先在 .env 中配置 COZE_API_TOKEN 和 COZE_BOT_ID 后再使用{feature}"}
 
+    @instrument("coze.generate_music_from_image", ok=status_ok)
     def generate_music_from_image(self, image_file_id: str) -> Optional[Dict[str, Any]]:
         """
         通过Coze工作流从图片生成音乐
@@ -71,6 +104,7 @@ class CozeService:
                 "error": str(e)
             }
 
+    @instrument("coze.generate_voice_comment", ok=status_ok)
     def generate_voice_comment(self, image_file_id: str) -> Optional[Dict[str, Any]]:
         """
         通过Coze工作流生成AI点评语音
@@ -112,6 +146,7 @@ class CozeService:
                 "error": str(e)
             }
 
+    @instrument("coze.generate_video_from_image", ok=status_ok)
     def generate_video_from_image(self, image_file_id: str) -> Optional[Dict[str, Any]]:
         """
         通过Coze工作流从图片生成视频
@@ -152,6 +187,7 @@ class CozeService:
                 "error": str(e)
             }
 
+    @instrument("coze.upload_image_to_coze", ok=is_not_none)
     def upload_image_to_coze(self, image_bytes: bytes, filename: str = "drawing.png") -> Optional[str]:
         """
         上传图片到Coze（用于工作流输入）
@@ -165,16 +201,26 @@ class CozeService:
         """
         if not self.coze:
             return None
+        if is_circuit_open(COZE_WORKFLOW):
+            # 工作流熔断中，上传了也用不上
+            annotate(fallback=True)
+            return None
         try:
             from io import BytesIO
 
-            file = self.coze.files.upload(file=BytesIO(image_bytes))
-            return file.id
+            def upload() -> str:
+                throttle("coze")
+                with guard(COZE_UPLOAD):
+                    return self.coze.files.upload(file=BytesIO(image_bytes)).id
+
+            # 同一张图同时上传（如重复点击）只传一次
+            return coalesce(COZE_UPLOAD, request_key(image_bytes), upload)
 
         except Exception as e:
             print(f"图片上传失败: {str(e)}")
             return None
 
+    @instrument("coze.workflow_stream", ok=status_ok)
     def _execute_workflow_stream(self, workflow_id: str, input_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
         """
         使用流式API执行Coze工作流
@@ -188,48 +234,13 @@ class CozeService:
         """
         if not self.coze:
             return {"status": "failed", "error": "请配置 COZE_API_TOKEN"}
+        if is_circuit_open(COZE_WORKFLOW):
+            annotate(fallback=True)
+            return {"status": "failed", "error": CIRCUIT_OPEN_MESSAGE}
         try:
-            result = {
-                "status": "pending",
-                "data": None,
-                "error": None
-            }
-
-            stream = self.coze.workflows.runs.stream(
-                workflow_id=workflow_id,
-                parameters=input_data
-            )
-
-            for event in stream:
-                if event.event == WorkflowEventType.MESSAGE:
-                    content = event.message.content
-                    if content:
-                        try:
-                            data = json.loads(content)
-                            result["data"] = data
-                            result["status"] = "success"
-                        except json.JSONDecodeError:
-                            pass
-                elif event.event == WorkflowEventType.ERROR:
-                    result["status"] = "failed"
-                    result["error"] = str(event.error)
-
-            if result["data"]:
-                data = result["data"]
-                return {
-                    "status": "success",
-                    "music_url": data.get("AudioUrl") or data.get("music_url"),
-                    "emotion": data.get("emotion"),
-                    "comment_url": data.get("comment_audio") or data.get("comment_url"),
-                    "comment_text": data.get("comment_text"),
-                    "video_url": data.get("video_url") or data.get("VideoUrl"),
-                    "raw_data": data
-                }
-            else:
-                return {
-                    "status": "failed",
-                    "error": result.get("error") or "工作流执行完成但未返回数据"
-                }
+            # 同一工作流、同一输入（同一张图）的并发请求共享一次执行
+            key = request_key(workflow_id, json.dumps(input_data, sort_keys=True, ensure_ascii=False))
+            return coalesce(COZE_WORKFLOW, key, lambda: self._run_workflow_stream(workflow_id, input_data))
 
         except Exception as e:
             print(f"工作流执行异常: {str(e)}")
@@ -238,6 +249,65 @@ class CozeService:
                 "error": str(e)
             }
 
+    def _run_workflow_stream(self, workflow_id: str, input_data: Dict[str, Any]) -> Dict[str, Any]:
+        """执行流式工作流并整理结果（异常由调用方处理）"""
+        result = {
+            "status": "pending",
+            "data": None,
+            "error": None
+        }
+
+        # 整个工作流（含排队）不超过 WORKFLOW_DEADLINE，页面设置了更早的截止时间时以页面为准
+        with deadline(WORKFLOW_DEADLINE):
+            throttle("coze")
+
+            # 每次执行用读取超时等于剩余时间的临时客户端，用完关闭，中途退出也不会留下未读完的连接。
+            # 读取超时是按单次读取计的，所以每收到一个事件再检查一次截止时间
+            coze, http_client = self._create_client(request_timeout(WORKFLOW_DEADLINE))
+
+            # 连接失败、流中断或耗时过长计入熔断器；工作流自身返回的错误事件不计
+            try:
+                with guard(COZE_WORKFLOW):
+                    stream = coze.workflows.runs.stream(
+                        workflow_id=workflow_id,
+                        parameters=input_data
+                    )
+
+                    for event in stream:
+                        check_deadline()
+                        if event.event == cozepy.WorkflowEventType.MESSAGE:
+                            content = event.message.content
+                            if content:
+                                try:
+                                    data = json.loads(content)
+                                    result["data"] = data
+                                    result["status"] = "success"
+                                except json.JSONDecodeError:
+                                    pass
+                        elif event.event == cozepy.WorkflowEventType.ERROR:
+                            result["status"] = "failed"
+                            result["error"] = str(event.error)
+            finally:
+                http_client.close()
+
+        if result["data"]:
+            data = result["data"]
+            return {
+                "status": "success",
+                "music_url": data.get("AudioUrl") or data.get("music_url"),
+                "emotion": data.get("emotion"),
+                "comment_url": data.get("comment_audio") or data.get("comment_url"),
+                "comment_text": data.get("comment_text"),
+                "video_url": data.get("video_url") or data.get("VideoUrl"),
+                "raw_data": data
+            }
+        else:
+            return {
+                "status": "failed",
+                "error": result.get("error") or "工作流执行完成但未返回数据"
+            }
+
+    @instrument("coze.workflow_run", ok=is_not_none)
     def _execute_workflow(self, workflow_id: str, input_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
         """
         执行Coze工作流（非流式，保留用于兼容性）
@@ -259,12 +329,13 @@ class CozeService:
                 "parameters": input_data
             }
 
-            response = requests.post(
+            response = self.session.post(
                 url,
                 headers=self.headers,
                 json=payload,
                 timeout=60
             )
+            annotate(http_status=response.status_code)
 
             if response.status_code == 200:
                 return response.json()
@@ -277,6 +348,7 @@ class CozeService:
             print(f"工作流执行异常: {str(e)}")
             return None
 
+    @instrument("coze.query_workflow_status", ok=is_not_none)
     def query_workflow_status(self, workflow_run_id: str) -> Optional[Dict[str, Any]]:
         """
         查询工作流执行状态
@@ -294,7 +366,7 @@ class CozeService:
                 "workflow_run_id": workflow_run_id
             }
 
-            response = requests.get(
+            response = self.session.get(
                 url,
                 headers=self.headers,
                 params=params,
@@ -319,7 +391,7 @@ class CozeService:
                 "workflow_id": workflow_id
             }
 
-            response = requests.get(
+            response = self.session.get(
                 url,
                 headers=self.headers,
                 params=params,
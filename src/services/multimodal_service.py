@@ -1,20 +1,86 @@
 import os
 import base64
-import json
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List, Tuple, Union
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import copy_context
 from io import BytesIO
 from PIL import Image
 import requests
 from utils.config_loader import ConfigLoader
+from utils.telemetry import annotate, instrument, record_retry
+from utils.resilience import DASHSCOPE_CHAT, guarded_call, is_circuit_open, request_timeout
+from utils.rate_limit import coalesce, get_limiter, request_key, throttle
+from utils.json_repair import extract_json, find_incomplete_sections
+
+# 五个分析维度：{字段名: (中文名称, 返回格式说明)}
+ANALYSIS_SECTIONS = {
+    "theme_analysis": ("主题分析", """{
+     "main_theme": "主题描述",
+     "elements": ["元素列表"],
+     "story_hint": "可能的故事线索"
+   }"""),
+    "color_analysis": ("色彩分析", """{
+     "dominant_colors": ["主要颜色"],
+     "emotional_tone": "情感基调",
+     "color_psychology": "色彩心理学解读"
+   }"""),
+    "composition_analysis": ("构图分析", """{
+     "composition_type": "构图类型",
+     "balance_score": 0-100,
+     "focus_point": "视觉焦点描述"
+   }"""),
+    "emotional_analysis": ("情感分析", """{
+     "primary_emotions": ["主要情感"],
+     "expression_style": "表达风格",
+     "confidence_level": "创作信心评估"
+   }"""),
+    "development_analysis": ("发展阶段分析", """{
+     "stage": "发展阶段",
+     "age_range": "适用年龄范围",
+     "milestones": ["达成的里程碑"],
+     "suggestions": ["发展建议"]
+   }"""),
+}
+
+# 每个维度必须包含的字段（缺少即视为不完整，需要补请求）
+ANALYSIS_REQUIRED_FIELDS = {
+    "theme_analysis": ("main_theme", "elements"),
+    "color_analysis": ("dominant_colors", "emotional_tone"),
+    "composition_analysis": ("composition_type", "balance_score"),
+    "emotional_analysis": ("primary_emotions", "expression_style"),
+    "development_analysis": ("stage", "suggestions"),
+}
+
+def format_dimensions(sections: Optional[List[str]] = None) -> str:
+    """生成 prompt 中的维度说明（默认全部五个维度）"""
+    sections = sections or list(ANALYSIS_SECTIONS)
+    blocks = [
+        f"{i}. {section} - {ANALYSIS_SECTIONS[section][0]}\n   {ANALYSIS_SECTIONS[section][1]}"
+        for i, section in enumerate(sections, 1)
+    ]
+    return "\n" + "\n\n".join(blocks) + "\n"
+
+ANALYSIS_DIMENSIONS = format_dimensions()
+
+# 批量分析：每个请求打包的图片数、同时进行的请求数
+BATCH_PACK_SIZE = 4
+BATCH_MAX_WORKERS = 4
 
 class MultimodalService:
     """多模态分析服务 - 使用Qwen-Omini-Flash"""
 
-    def __init__(self):
+    def __init__(self, session: Optional[requests.Session] = None):
+        """
+        Args:
+            session: 共享的 HTTP 会话（连接池），默认每次请求单独建立连接
+        """
+        self.session = session or requests
         self.api_key = ConfigLoader.get_dashscope_api_key()
-        self.base_url = "https://dashscope.aliyuncs.com/compatible-mode/v1"
+        self.base_url = ConfigLoader.get_dashscope_base_url()
         self.model = "qwen3-omni-flash"
 
+    # 调用失败时返回的默认分析记为失败
+    @instrument("multimodal.analyze_drawing", ok=lambda result: not MultimodalService.is_default_analysis(result))
     def analyze_drawing(self, image_data: bytes, drawing_info: Dict[str, Any]) -> Dict[str, Any]:
         """
         五维度分析绘画作品
@@ -26,6 +92,11 @@ class MultimodalService:
         Returns:
             分析结果字典
         """
+        if is_circuit_open(DASHSCOPE_CHAT):
+            # 熔断中：直接返回默认分析，不再编码图片、等待超时
+            annotate(fallback=True)
+            return self._get_default_analysis()
+
         try:
             # 转换为base64
             base64_image = base64.b64encode(image_data).decode('utf-8')
@@ -35,14 +106,19 @@ class MultimodalService:
 
             # 调用API
             response = self._call_qwen_omini(base64_image, analysis_prompt)
+            if not response:
+                # 调用本身失败（原因已打印），补请求也不会成功
+                return self._get_default_analysis()
 
-            # 解析结果
-            return self._parse_analysis_response(response)
+            # 解析结果，缺失或不完整的维度单独补请求
+            analysis = self._parse_analysis_response(response)
+            return self._complete_analysis(base64_image, drawing_info, analysis)
 
         except Exception as e:
             print(f"分析失败: {str(e)}")
             return self._get_default_analysis()
 
+    @instrument("multimodal.generate_spirit_feedback", ok=bool)
     def generate_spirit_feedback(self, image_data: bytes, drawing_info: Dict[str, Any]) -> str:
         """
         生成小精灵的反馈语音文本
@@ -54,6 +130,10 @@ class MultimodalService:
         Returns:
             反馈文本
         """
+        if is_circuit_open(DASHSCOPE_CHAT):
+            annotate(fallback=True)
+            return "哇！你的画真有趣！继续加油！"
+
         try:
             base64_image = base64.b64encode(image_data).decode('utf-8')
 
@@ -67,54 +147,109 @@ class MultimodalService:
             print(f"生成反馈失败: {str(e)}")
             return "哇！你的画真有趣！继续加油！"
 
-    def _build_analysis_prompt(self, drawing_info: Dict[str, Any]) -> str:
-        """构建分析prompt"""
-        prompt = f"""
-你是一个专业的儿童艺术教育专家。请对这幅儿童画进行深度五维度分析。
+    @instrument("multimodal.analyze_drawings_batch")
+    def analyze_drawings_batch(
+        self,
+        drawings: List[Tuple[bytes, Dict[str, Any]]],
+        pack_size: int = BATCH_PACK_SIZE,
+        max_workers: int = BATCH_MAX_WORKERS
+    ) -> List[Dict[str, Any]]:
+        """
+        批量五维度分析（如老师查看全班作品）
 
-绘画信息：
-- 绘画时长: {drawing_info.get('duration', 0)}秒
-- 笔画数: {drawing_info.get('stroke_count', 0)}
-- 修改次数: {drawing_info.get('revision_count', 0)}
+        每 pack_size 幅画打包成一个请求，最多 max_workers 个请求同时进行；
+        打包结果无法逐幅对应时，该组退回逐幅调用 analyze_drawing。
 
-请返回JSON格式的分析结果，包含以下5个维度：
+        Args:
+            drawings: [(图片字节数据, 绘画信息), ...]
+            pack_size: 每个请求包含的图片数，1 表示逐幅请求
+            max_workers: 并发请求数
 
-1. theme_analysis - 主题分析
-   {{
-     "main_theme": "主题描述",
-     "elements": ["元素列表"],
-     "story_hint": "可能的故事线索"
-   }}
+        Returns:
+            与 drawings 顺序一致的分析结果列表
+        """
+        if not drawings:
+            return []
+        annotate(images=len(drawings))
+        if is_circuit_open(DASHSCOPE_CHAT):
+            annotate(fallback=True)
+            return [self._get_default_analysis() for _ in drawings]
+
+        pack_size = max(1, pack_size)
+        packs = [list(range(start, min(start + pack_size, len(drawings))))
+                 for start in range(0, len(drawings), pack_size)]
+
+        results: List[Optional[Dict[str, Any]]] = [None] * len(drawings)
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(packs)))) as executor:
+            # 每个任务单独复制上下文，子调用仍记在本次批量调用之下
+            futures = [
+                executor.submit(copy_context().run, self._analyze_pack, [drawings[i] for i in pack])
+                for pack in packs
+            ]
+            for pack, future in zip(packs, futures):
+                for index, analysis in zip(pack, future.result()):
+                    results[index] = analysis
+        return results
+
+    def _analyze_pack(self, drawings: List[Tuple[bytes, Dict[str, Any]]]) -> List[Dict[str, Any]]:
+        """分析一组画：多幅时合并成一个请求，缺失的结果逐幅补齐"""
+        if len(drawings) == 1:
+            return [self.analyze_drawing(*drawings[0])]
+
+        images = [base64.b64encode(image_data).decode('utf-8') for image_data, _ in drawings]
+        analyses: List[Optional[Dict[str, Any]]] = [None] * len(drawings)
+        try:
+            prompt = self._build_batch_analysis_prompt([info for _, info in drawings])
+            response = self._call_qwen_omini(images, prompt, max_tokens=2000 * len(drawings), timeout=60)
+            analyses = self._parse_batch_analysis_response(response, len(drawings))
+        except Exception as e:
+            print(f"批量分析失败: {str(e)}")
+
+        missing = [i for i, analysis in enumerate(analyses) if analysis is None]
+        if missing:
+            annotate(unpacked=len(missing))
+        for i, analysis in enumerate(analyses):
+            if analysis is None:
+                record_retry()
+                analyses[i] = self.analyze_drawing(*drawings[i])
+            else:
+                # 被截断的最后几幅只补缺失的维度
+                analyses[i] = self._complete_analysis(images[i], drawings[i][1], analysis)
+        return analyses
+
+    def _build_batch_analysis_prompt(self, drawing_infos: List[Dict[str, Any]]) -> str:
+        """构建多幅画的分析prompt（图片按顺序编号）"""
+        info_lines = "\n".join(
+            f"- 第{i}幅: 绘画时长 {info.get('duration', 0)}秒，笔画数 {info.get('stroke_count', 0)}，"
+            f"修改次数 {info.get('revision_count', 0)}"
+            for i, info in enumerate(drawing_infos, 1)
+        )
+        prompt = f"""
+你是一个专业的儿童艺术教育专家。上面按顺序给出了{len(drawing_infos)}幅儿童画，请分别对每一幅进行深度五维度分析。
 
-2. color_analysis - 色彩分析
-   {{
-     "dominant_colors": ["主要颜色"],
-     "emotional_tone": "情感基调",
-     "color_psychology": "色彩心理学解读"
-   }}
+绘画信息：
+{info_lines}
 
-3. composition_analysis - 构图分析
-   {{
-     "composition_type": "构图类型",
-     "balance_score": 0-100,
-     "focus_point": "视觉焦点描述"
-   }}
+请返回一个JSON数组，按图片顺序每幅画一个对象，对象中的 "index" 为图片序号（从1开始），并包含以下5个维度：
+{ANALYSIS_DIMENSIONS}
+不同画的分析不要混在一起。请确保返回有效的JSON格式。
+"""
+        return prompt
 
-4. emotional_analysis - 情感分析
-   {{
-     "primary_emotions": ["主要情感"],
-     "expression_style": "表达风格",
-     "confidence_level": "创作信心评估"
-   }}
+    def _build_analysis_prompt(self, drawing_info: Dict[str, Any], sections: Optional[List[str]] = None) -> str:
+        """构建分析prompt（sections 指定时只要求这些维度，用于补请求）"""
+        sections = sections or list(ANALYSIS_SECTIONS)
+        task = "进行深度五维度分析" if len(sections) == len(ANALYSIS_SECTIONS) else "补充以下维度的分析"
+        prompt = f"""
+你是一个专业的儿童艺术教育专家。请对这幅儿童画{task}。
 
-5. development_analysis - 发展阶段分析
-   {{
-     "stage": "发展阶段",
-     "age_range": "适用年龄范围",
-     "milestones": ["达成的里程碑"],
-     "suggestions": ["发展建议"]
-   }}
+绘画信息：
+- 绘画时长: {drawing_info.get('duration', 0)}秒
+- 笔画数: {drawing_info.get('stroke_count', 0)}
+- 修改次数: {drawing_info.get('revision_count', 0)}
 
+请返回JSON格式的分析结果，包含以下{len(sections)}个维度：
+{format_dimensions(sections)}
 请确保返回有效的JSON格式。
 """
         return prompt
@@ -140,8 +275,16 @@ class MultimodalService:
 """
         return prompt
 
-    def _call_qwen_omini(self, base64_image: str, prompt: str) -> str:
-        """调用Qwen-Omini-Flash API"""
+    @instrument("multimodal.chat_completions", ok=bool)
+    def _call_qwen_omini(
+        self,
+        base64_image: Union[str, List[str]],
+        prompt: str,
+        max_tokens: int = 2000,
+        timeout: float = 30
+    ) -> str:
+        """调用Qwen-Omini-Flash API（base64_image 可以是多张图，按顺序放在提示词之前）"""
+        images = [base64_image] if isinstance(base64_image, str) else list(base64_image)
         try:
             headers = {
                 "Authorization": f"Bearer {self.api_key}",
@@ -157,9 +300,11 @@ class MultimodalService:
                             {
                                 "type": "image_url",
                                 "image_url": {
-                                    "url": f"data:image/png;base64,{base64_image}"
+                                    "url": f"data:image/png;base64,{image}"
                                 }
-                            },
+                            }
+                            for image in images
+                        ] + [
                             {
                                 "type": "text",
                                 "text": prompt
@@ -169,46 +314,111 @@ class MultimodalService:
                 ],
                 "temperature": 0.7,
                 "top_p": 0.9,
-                "max_tokens": 2000
+                "max_tokens": max_tokens
             }
 
-            response = requests.post(
-                f"{self.base_url}/chat/completions",
-                headers=headers,
-                json=payload,
-                timeout=30
-            )
-
-            if response.status_code == 200:
-                data = response.json()
-                return data['choices'][0]['message']['content']
-            else:
-                print(f"API错误: {response.status_code}")
-                return ""
+            def send() -> str:
+                throttle("dashscope")
+                # 同样的请求可以安全重发：慢于近期 p95 且还有配额时对冲一次
+                response = guarded_call(
+                    DASHSCOPE_CHAT,
+                    lambda: self.session.post(
+                        f"{self.base_url}/chat/completions",
+                        headers=headers,
+                        json=payload,
+                        timeout=request_timeout(timeout)
+                    ),
+                    hedge=True,
+                    hedge_gate=get_limiter("dashscope").try_acquire
+                )
+                annotate(http_status=response.status_code)
+
+                if response.status_code == 200:
+                    data = response.json()
+                    return data['choices'][0]['message']['content']
+                else:
+                    print(f"API错误: {response.status_code}")
+                    return ""
+
+            # 同一张图、同一提示词的并发请求只发一次
+            return coalesce(DASHSCOPE_CHAT, request_key(self.model, max_tokens, *images, prompt), send)
 
         except Exception as e:
             print(f"API调用失败: {str(e)}")
             return ""
 
     def _parse_analysis_response(self, response: str) -> Dict[str, Any]:
-        """解析分析响应"""
-        try:
-            # 尝试提取JSON
-            json_start = response.find('{')
-            json_end = response.rfind('}') + 1
-
-            if json_start >= 0 and json_end > json_start:
-                json_str = response[json_start:json_end]
-                analysis = json.loads(json_str)
-                return analysis
-            else:
-                return self._get_default_analysis()
+        """解析分析响应（容错：代码块、多余逗号、截断），返回能解析出的部分，可能缺少维度"""
+        analysis = extract_json(response)
+        if not isinstance(analysis, dict):
+            if response:
+                print("解析失败: 未找到有效的JSON")
+            return {}
+        return analysis
+
+    def _complete_analysis(
+        self,
+        base64_image: str,
+        drawing_info: Dict[str, Any],
+        analysis: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """
+        补齐分析结果：只对缺失或不完整的维度补请求一次，仍缺的字段用默认值填充
 
-        except Exception as e:
-            print(f"解析失败: {str(e)}")
-            return self._get_default_analysis()
+        Args:
+            base64_image: 图片base64
+            drawing_info: 绘画信息
+            analysis: 已解析出的（部分）结果
 
-    def _get_default_analysis(self) -> Dict[str, Any]:
+        Returns:
+            五个维度齐全的分析结果
+        """
+        missing = find_incomplete_sections(analysis, ANALYSIS_REQUIRED_FIELDS)
+        if missing:
+            annotate(missing_sections=",".join(missing))
+            record_retry()
+            prompt = self._build_analysis_prompt(drawing_info, sections=missing)
+            repaired = self._parse_analysis_response(self._call_qwen_omini(base64_image, prompt))
+            still_missing = find_incomplete_sections(
+                repaired, {section: ANALYSIS_REQUIRED_FIELDS[section] for section in missing}
+            )
+            for section in missing:
+                if section not in still_missing:
+                    analysis[section] = repaired[section]
+
+        # 部分字段仍缺失时与默认值合并，保留已解析出的字段
+        default = self._get_default_analysis()
+        for section, fields in default.items():
+            value = analysis.get(section)
+            analysis[section] = {**fields, **value} if isinstance(value, dict) else fields
+        return analysis
+
+    def _parse_batch_analysis_response(self, response: str, count: int) -> List[Optional[Dict[str, Any]]]:
+        """解析多幅画的分析响应，无法对应到某幅画的位置为 None（截断的条目保留已解析的部分）"""
+        analyses: List[Optional[Dict[str, Any]]] = [None] * count
+        items = extract_json(response, expect="[")
+        if not isinstance(items, list):
+            if response:
+                print("批量解析失败: 未找到有效的JSON数组")
+            return analyses
+
+        items = [item for item in items if isinstance(item, dict)]
+        for position, item in enumerate(items):
+            # 优先按 index 对应；没有 index 且数量一致时按顺序对应
+            index = item.pop("index", None)
+            if isinstance(index, int) and 1 <= index <= count:
+                analyses[index - 1] = item
+            elif len(items) == count:
+                analyses[position] = item
+        return analyses
+
+    @staticmethod
+    def is_default_analysis(analysis: Dict[str, Any]) -> bool:
+        """是否为调用失败时返回的默认分析（不应当作真实结果保存）"""
+        return analysis == MultimodalService._get_default_analysis()
+
+    @staticmethod
+    def _get_default_analysis() -> Dict[str, Any]:
         """获取默认分析结果"""
         return {
             "theme_analysis": {
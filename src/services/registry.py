@@ -0,0 +1,213 @@
+import atexit
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from utils.file_handler import FileHandler
+from utils.color_names import get_color_name_table
+from utils.lazy_import import lazy_import, preload
+from utils.resilience import HTTP_POOL_SIZE
+from services.multimodal_service import MultimodalService
+from services.voice_service import VoiceService
+from services.coze_service import CozeService
+from services.video_service import VideoService
+
+cv2 = lazy_import("cv2")
+
+class ServiceRegistry:
+    """
+    进程内的服务注册表
+
+    每个服务只在第一次 get 时构造一次，之后所有页面、所有会话共享同一个实例
+    （服务本身无会话状态，各自的缓存因此也被共享）。
+    注册时可以附带生命周期钩子：
+    - warm_up(实例)：预热，如建立连接、加载模型表
+    - health(实例)：返回 (是否正常, 说明)
+    - shutdown(实例)：进程退出时释放资源
+    """
+
+    def __init__(self):
+        self._factories: Dict[str, Callable[[], Any]] = {}
+        self._hooks: Dict[str, Dict[str, Optional[Callable]]] = {}
+        self._instances: Dict[str, Any] = {}
+        self._lock = threading.RLock()
+        self._warm_up_thread = None
+
+    def register(
+        self,
+        name: str,
+        factory: Callable[[], Any],
+        warm_up: Optional[Callable[[Any], None]] = None,
+        health: Optional[Callable[[Any], tuple]] = None,
+        shutdown: Optional[Callable[[Any], None]] = None
+    ) -> None:
+        """
+        注册服务（已构造的同名实例会被丢弃）
+
+        Args:
+            name: 服务名
+            factory: 无参构造函数
+            warm_up: 预热钩子
+            health: 健康检查钩子
+            shutdown: 关闭钩子
+        """
+        with self._lock:
+            self._factories[name] = factory
+            self._hooks[name] = {"warm_up": warm_up, "health": health, "shutdown": shutdown}
+            self._instances.pop(name, None)
+
+    def get(self, name: str) -> Any:
+        """获取服务实例，第一次调用时构造"""
+        instance = self._instances.get(name)
+        if instance is not None:
+            return instance
+
+        with self._lock:
+            instance = self._instances.get(name)
+            if instance is None:
+                if name not in self._factories:
+                    raise KeyError(f"未注册的服务: {name}")
+                instance = self._factories[name]()
+                self._instances[name] = instance
+            return instance
+
+    def services(self, *names: str) -> Dict[str, Any]:
+        """按名称批量获取，返回 {名称: 实例}"""
+        return {name: self.get(name) for name in names}
+
+    @property
+    def names(self) -> list:
+        return list(self._factories)
+
+    def warm_up(self, names: Optional[list] = None) -> Dict[str, Dict]:
+        """
+        构造并预热服务
+
+        Args:
+            names: 要预热的服务，默认全部
+
+        Returns:
+            {名称: {"ok", "elapsed_ms", "error"}}
+        """
+        results = {}
+        for name in names or self.names:
+            start = time.perf_counter()
+            try:
+                instance = self.get(name)
+                hook = self._hooks[name]["warm_up"]
+                if hook:
+                    hook(instance)
+                results[name] = {"ok": True, "error": None}
+            except Exception as e:
+                print(f"服务预热失败 {name}: {str(e)}")
+                results[name] = {"ok": False, "error": str(e)}
+            results[name]["elapsed_ms"] = round((time.perf_counter() - start) * 1000, 2)
+        return results
+
+    def warm_up_async(self, names: Optional[list] = None) -> threading.Thread:
+        """在后台线程预热，不阻塞首个页面渲染；进程内只启动一次"""
+        with self._lock:
+            if self._warm_up_thread is None:
+                self._warm_up_thread = threading.Thread(
+                    target=self.warm_up, args=(names,), name="service-warm-up", daemon=True
+                )
+                self._warm_up_thread.start()
+            return self._warm_up_thread
+
+    def health(self) -> Dict[str, Dict]:
+        """
+        各服务的健康状态（未构造的服务不会因此被构造）
+
+        Returns:
+            {名称: {"status": "ok" | "degraded" | "not_started" | "error", "detail"}}
+        """
+        report = {}
+        for name in self.names:
+            instance = self._instances.get(name)
+            if instance is None:
+                report[name] = {"status": "not_started", "detail": "尚未使用"}
+                continue
+
+            hook = self._hooks[name]["health"]
+            try:
+                ok, detail = hook(instance) if hook else (True, "")
+                report[name] = {"status": "ok" if ok else "degraded", "detail": detail}
+            except Exception as e:
+                report[name] = {"status": "error", "detail": str(e)}
+        return report
+
+    def shutdown(self) -> None:
+        """调用所有已构造服务的关闭钩子并清空实例"""
+        with self._lock:
+            instances, self._instances = self._instances, {}
+
+        for name, instance in reversed(list(instances.items())):
+            hook = self._hooks.get(name, {}).get("shutdown")
+            if hook:
+                try:
+                    hook(instance)
+                except Exception as e:
+                    print(f"服务关闭失败 {name}: {str(e)}")
+
+def create_http_session(pool_size: int = HTTP_POOL_SIZE) -> requests.Session:
+    """带连接池的 HTTP 会话：同一主机的请求复用 TCP/TLS 连接"""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+def _check_file_handler(handler: FileHandler) -> tuple:
+    writable = handler.base_dir.exists() and handler.temp_dir.exists()
+    return writable, str(handler.base_dir.resolve()) if writable else "数据目录不存在"
+
+def _check_configured(attribute: str, hint: str) -> Callable:
+    def check(service) -> tuple:
+        configured = bool(getattr(service, attribute, None))
+        return configured, "已配置" if configured else hint
+    return check
+
+def _warm_up_image_analysis(_) -> None:
+    # 颜色名称表已由构造函数加载，这里再导入 OpenCV，让第一次图片分析不再额外等待
+    preload(cv2)
+
+def create_default_registry() -> ServiceRegistry:
+    """注册应用用到的全部服务"""
+    registry = ServiceRegistry()
+
+    registry.register("http", create_http_session, shutdown=lambda session: session.close())
+    registry.register("file_handler", FileHandler, health=_check_file_handler)
+    registry.register("color_names", get_color_name_table, warm_up=_warm_up_image_analysis)
+    registry.register(
+        "multimodal", lambda: MultimodalService(registry.get("http")),
+        health=_check_configured("api_key", "未配置 DASHSCOPE_API_KEY")
+    )
+    registry.register(
+        "voice", lambda: VoiceService(registry.get("http")),
+        health=_check_configured("api_key", "未配置 DASHSCOPE_API_KEY")
+    )
+    registry.register(
+        "coze", lambda: CozeService(registry.get("http")),
+        health=_check_configured("coze", "未配置 COZE_API_TOKEN 或未安装 cozepy")
+    )
+    registry.register(
+        "video", lambda: VideoService(registry.get("http")),
+        health=_check_configured("access_key", "未配置 HUOSHAN_ACCESS_KEY")
+    )
+    return registry
+
+_registry = None
+_registry_lock = threading.Lock()
+
+def get_registry() -> ServiceRegistry:
+    """进程内共享的服务注册表（Streamlit 重新运行页面时不会重新构造）"""
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = create_default_registry()
+                atexit.register(_registry.shutdown)
+    return _registry
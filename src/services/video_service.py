@@ -3,18 +3,26 @@ import json
 import time
 from typing import Optional, Dict, Any
 from utils.config_loader import ConfigLoader
+from utils.telemetry import annotate, instrument, is_not_none, status_ok
+from utils.resilience import VOLCENGINE_VIDEO, guarded_call, is_circuit_open, request_timeout
 
 class VideoService:
     """视频生成服务 - 火山引擎Seedance集成"""
 
-    def __init__(self):
+    def __init__(self, session: Optional[requests.Session] = None):
+        """
+        Args:
+            session: 共享的 HTTP 会话（连接池），默认每次请求单独建立连接
+        """
+        self.session = session or requests
         config = ConfigLoader.get_huoshan_config()
         self.access_key = config.get("access_key")
         self.secret_key = config.get("secret_key")
-        self.base_url = "https://api.volcengine.com/video"
+        self.base_url = config.get("base_url") or "https://api.volcengine.com/video"
         self.default_model = "doubao-seedance-1-0-pro-fast-251015"
         self.fallback_model = "doubao-seedance-1-0-lite-t2v-250428"
 
+    @instrument("video.create_transition_video", ok=status_ok)
     def create_transition_video(
         self,
         first_frame_url: str,
@@ -35,6 +43,11 @@ class VideoService:
         if config is None:
             config = self._default_config()
 
+        if is_circuit_open(VOLCENGINE_VIDEO):
+            # 熔断中：直接使用本地过渡效果
+            annotate(fallback=True)
+            return self.create_simple_transition(first_frame_url, last_frame_url)
+
         try:
             # 准备请求数据
             payload = {
@@ -86,6 +99,7 @@ class VideoService:
                 "fallback": True
             }
 
+    @instrument("video.query_video_task", ok=status_ok)
     def query_video_task(self, task_id: str) -> Dict[str, Any]:
         """
         查询视频生成任务状态
@@ -166,6 +180,7 @@ class VideoService:
                 "error": str(e)
             }
 
+    @instrument("video.api", ok=is_not_none)
     def _call_video_api(self, endpoint: str, payload: Dict[str, Any]) -> Optional[Dict[str, Any]]:
         """调用火山引擎视频API"""
         try:
@@ -176,12 +191,17 @@ class VideoService:
                 "Content-Type": "application/json"
             }
 
-            response = requests.post(
-                url,
-                headers=headers,
-                json=payload,
-                timeout=30
+            # 提交任务不是幂等的，不做对冲
+            response = guarded_call(
+                VOLCENGINE_VIDEO,
+                lambda: self.session.post(
+                    url,
+                    headers=headers,
+                    json=payload,
+                    timeout=request_timeout(30)
+                )
             )
+            annotate(endpoint=endpoint, http_status=response.status_code)
 
             if response.status_code == 200:
                 return response.json()
@@ -3,24 +3,35 @@ import base64
 from typing import Optional, Tuple
 import requests
 from io import BytesIO
-import wave
+from utils.audio_processor import AudioProcessor
 from utils.config_loader import ConfigLoader
+from utils.telemetry import annotate, instrument, is_not_none
+from utils.resilience import DASHSCOPE_TTS, guarded_call, request_timeout
+from utils.rate_limit import coalesce, get_limiter, request_key, throttle
+from utils.wav_stream import StreamingWavWriter
 
 class VoiceService:
     """语音交互服务 - 使用Qwen-Omini-Flash进行文本转语音"""
 
-    def __init__(self):
+    def __init__(self, session: Optional[requests.Session] = None):
+        """
+        Args:
+            session: 共享的 HTTP 会话（连接池），默认每次请求单独建立连接
+        """
+        self.session = session or requests
         self.api_key = ConfigLoader.get_dashscope_api_key()
-        self.base_url = "https://dashscope.aliyuncs.com/compatible-mode/v1"
+        self.base_url = ConfigLoader.get_dashscope_base_url()
         self.model = "qwen3-omni-flash"
 
-    def text_to_speech(self, text: str, voice: str = "Bilibili-DouDou") -> Optional[bytes]:
+    @instrument("voice.text_to_speech", ok=is_not_none)
+    def text_to_speech(self, text: str, voice: str = "Bilibili-DouDou", normalize: bool = True) -> Optional[bytes]:
         """
         将文本转换为语音
 
         Args:
             text: 要转换的文本
             voice: 语音角色 (Bilibili-DouDou儿童声音)
+            normalize: 是否做响度归一化，让小精灵语音与其他音频音量一致
 
         Returns:
             音频字节数据（WAV格式）
@@ -48,28 +59,41 @@ class VoiceService:
                 "stream": False
             }
 
-            response = requests.post(
-                f"{self.base_url}/chat/completions",
-                headers=headers,
-                json=payload,
-                timeout=30
-            )
-
-            if response.status_code == 200:
-                data = response.json()
-
-                # 提取音频内容
-                if 'choices' in data and len(data['choices']) > 0:
-                    choice = data['choices'][0]
-                    if 'message' in choice:
-                        message = choice['message']
-                        if 'audio' in message:
-                            # 音频已经是base64编码
-                            audio_base64 = message['audio']
-                            audio_bytes = base64.b64decode(audio_base64)
-                            return audio_bytes
-
-            return None
+            def send() -> Optional[bytes]:
+                throttle("dashscope")
+                response = guarded_call(
+                    DASHSCOPE_TTS,
+                    lambda: self.session.post(
+                        f"{self.base_url}/chat/completions",
+                        headers=headers,
+                        json=payload,
+                        timeout=request_timeout(30)
+                    ),
+                    hedge=True,
+                    hedge_gate=get_limiter("dashscope").try_acquire
+                )
+                annotate(http_status=response.status_code)
+
+                if response.status_code == 200:
+                    data = response.json()
+
+                    # 提取音频内容
+                    if 'choices' in data and len(data['choices']) > 0:
+                        choice = data['choices'][0]
+                        if 'message' in choice:
+                            message = choice['message']
+                            if 'audio' in message:
+                                # 音频已经是base64编码
+                                audio_base64 = message['audio']
+                                audio_bytes = base64.b64decode(audio_base64)
+                                if normalize and audio_bytes[:4] == b'RIFF':
+                                    audio_bytes = AudioProcessor.normalize_loudness(audio_bytes)
+                                return audio_bytes
+
+                return None
+
+            # 同一段文字、同一音色的并发请求只合成一次
+            return coalesce(DASHSCOPE_TTS, request_key(self.model, voice, normalize, text), send)
 
         except Exception as e:
             print(f"语音生成失败: {str(e)}")
@@ -108,12 +132,17 @@ class VoiceService:
                 "stream": True
             }
 
-            response = requests.post(
-                f"{self.base_url}/chat/completions",
-                headers=headers,
-                json=payload,
-                timeout=30,
-                stream=True
+            throttle("dashscope")
+            # 流式响应只统计到首包，之后的读取不计入熔断器
+            response = guarded_call(
+                DASHSCOPE_TTS,
+                lambda: self.session.post(
+                    f"{self.base_url}/chat/completions",
+                    headers=headers,
+                    json=payload,
+                    timeout=request_timeout(30),
+                    stream=True
+                )
             )
 
             if response.status_code == 200:
@@ -133,6 +162,11 @@ class VoiceService:
                                             delta = choice['delta']
                                             if 'audio' in delta:
                                                 audio_base64 = delta['audio']
+                                                # 流式返回的音频可能是 {"data": ..., "transcript": ...}
+                                                if isinstance(audio_base64, dict):
+                                                    audio_base64 = audio_base64.get('data')
+                                                if not audio_base64:
+                                                    continue
                                                 audio_chunk = base64.b64decode(audio_base64)
                                                 yield audio_chunk
                                 except:
@@ -141,38 +175,52 @@ class VoiceService:
         except Exception as e:
             print(f"流式语音生成失败: {str(e)}")
 
-    def create_wav_file(self, audio_chunks: list) -> bytes:
+    @instrument("voice.create_wav_file", ok=is_not_none)
+    def create_wav_file(self, audio_chunks) -> bytes:
         """
         将音频块组合成WAV文件
 
         Args:
-            audio_chunks: 音频数据块列表
+            audio_chunks: 音频数据块列表或生成器
 
         Returns:
             完整的WAV文件字节数据
         """
         try:
-            # 合并所有音频块
-            combined_audio = b''.join(audio_chunks)
-
-            # 创建BytesIO对象
             buffer = BytesIO()
 
-            # 写入WAV头
-            with wave.open(buffer, 'wb') as wav_file:
-                # 假设是16bit单声道WAV, 采样率16000Hz
-                wav_file.setnchannels(1)
-                wav_file.setsampwidth(2)
-                wav_file.setframerate(16000)
-                wav_file.writeframes(combined_audio)
+            # 逐块写入，首块带 WAV 头时使用其中的格式，否则按 16bit 单声道 16000Hz 处理
+            with StreamingWavWriter(buffer, num_channels=1, sample_rate=16000, sample_width=2) as writer:
+                writer.write_all(audio_chunks)
 
-            buffer.seek(0)
             return buffer.getvalue()
 
         except Exception as e:
             print(f"WAV文件创建失败: {str(e)}")
             return None
 
+    @instrument("voice.stream_text_to_speech_to_file", ok=bool)
+    def stream_text_to_speech_to_file(self, text: str, target, voice: str = "Bilibili-DouDou") -> bool:
+        """
+        流式生成语音并直接写入文件或流（不在内存中保存整段音频）
+
+        Args:
+            text: 要转换的文本
+            target: 文件路径或可写的二进制流
+            voice: 语音角色
+
+        Returns:
+            是否写入了音频
+        """
+        try:
+            with StreamingWavWriter(target, num_channels=1, sample_rate=16000, sample_width=2) as writer:
+                writer.write_all(self.stream_text_to_speech(text, voice))
+            return writer.data_size > 0
+
+        except Exception as e:
+            print(f"流式语音保存失败: {str(e)}")
+            return False
+
     def get_voice_options(self) -> dict:
         """获取可用的语音选项"""
         return {
@@ -0,0 +1,152 @@
+import os
+import io
+import base64
+from functools import lru_cache
+from pathlib import Path
+from typing import Optional
+from PIL import Image
+
+# 项目根目录下的静态资源与优化后资源的缓存目录
+PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent
+ASSETS_DIR = PROJECT_ROOT / "assets"
+OPTIMIZED_DIR = PROJECT_ROOT / "data" / "cache" / "assets"
+
+# 背景图显示时会被拉伸铺满，1920 宽度已足够
+DEFAULT_MAX_SIZE = 1920
+DEFAULT_QUALITY = 80
+
+# 内容区域默认的半透明白色背景
+DEFAULT_CONTAINER_CSS = """
+    .main .block-container {
+        background-color: rgba(255, 255, 255, 0.85);
+        border-radius: 16px;
+        padding: 2rem;
+    }
+"""
+
+def get_asset_path(name: str) -> str:
+    """获取 assets 目录下资源的绝对路径"""
+    return str(ASSETS_DIR / name)
+
+def get_optimized_asset_path(
+    name: str,
+    max_size: int = DEFAULT_MAX_SIZE,
+    quality: int = DEFAULT_QUALITY
+) -> Optional[str]:
+    """
+    获取资源的 WebP 优化版本路径（首次调用时生成并缓存到磁盘）
+
+    Args:
+        name: assets 目录下的文件名
+        max_size: 最长边像素上限
+        quality: WebP 压缩质量
+
+    Returns:
+        优化后文件路径；资源不存在时返回 None，优化失败时返回原图路径
+    """
+    source = ASSETS_DIR / name
+    if not source.exists():
+        return None
+
+    try:
+        mtime_ns = source.stat().st_mtime_ns
+        return _optimize_asset(str(source), mtime_ns, max_size, quality)
+    except Exception as e:
+        print(f"资源优化失败: {str(e)}")
+        return str(source)
+
+def get_image_data_uri(
+    name: str,
+    max_size: int = DEFAULT_MAX_SIZE,
+    quality: int = DEFAULT_QUALITY
+) -> Optional[str]:
+    """
+    获取资源的 data URI（每个进程只编码一次）
+
+    Args:
+        name: assets 目录下的文件名
+        max_size: 最长边像素上限
+        quality: WebP 压缩质量
+
+    Returns:
+        可直接用于 <img src> 或 CSS url() 的 data URI，资源不存在时返回 None
+    """
+    path = get_optimized_asset_path(name, max_size, quality)
+    if not path:
+        return None
+
+    try:
+        return _encode_data_uri(path, os.stat(path).st_mtime_ns)
+    except Exception as e:
+        print(f"资源编码失败: {str(e)}")
+        return None
+
+def get_background_css(
+    name: str = "背景01.png",
+    container_css: str = DEFAULT_CONTAINER_CSS,
+    fallback_css: str = ""
+) -> str:
+    """
+    生成页面背景图 CSS（供各页面拼接到自己的 <style> 中）
+
+    Args:
+        name: 背景图文件名
+        container_css: 内容区域样式
+        fallback_css: 背景图不可用时使用的样式
+
+    Returns:
+        CSS 字符串
+    """
+    data_uri = get_image_data_uri(name)
+    if not data_uri:
+        return fallback_css
+
+    return f"""
+    .stApp {{
+        background-image: url("{data_uri}");
+        background-size: cover;
+        background-position: center;
+        background-repeat: no-repeat;
+        background-attachment: fixed;
+    }}
+    {container_css}
+    """
+
+def optimize_all_assets(max_size: int = DEFAULT_MAX_SIZE, quality: int = DEFAULT_QUALITY) -> dict:
+    """预先生成所有 PNG 资源的 WebP 版本，返回 {文件名: (原大小, 优化后大小)}"""
+    results = {}
+    for source in sorted(ASSETS_DIR.glob("*.png")):
+        path = get_optimized_asset_path(source.name, max_size, quality)
+        if path:
+            results[source.name] = (source.stat().st_size, os.path.getsize(path))
+    return results
+
+@lru_cache(maxsize=64)
+def _optimize_asset(source: str, mtime_ns: int, max_size: int, quality: int) -> str:
+    """转换为 WebP 并写入缓存目录；源文件修改时间变化后会重新生成"""
+    stem = Path(source).stem
+    target = OPTIMIZED_DIR / f"{stem}_{max_size}_{quality}_{mtime_ns}.webp"
+    if target.exists():
+        return str(target)
+
+    OPTIMIZED_DIR.mkdir(parents=True, exist_ok=True)
+    with Image.open(source) as image:
+        image.thumbnail((max_size, max_size), Image.Resampling.LANCZOS)
+        output = io.BytesIO()
+        image.save(output, format='WEBP', quality=quality, method=6)
+
+    tmp_path = target.with_name(target.name + ".tmp")
+    with open(tmp_path, 'wb') as f:
+        f.write(output.getvalue())
+    os.replace(tmp_path, target)
+    return str(target)
+
+@lru_cache(maxsize=64)
+def _encode_data_uri(path: str, mtime_ns: int) -> str:
+    mime = "image/webp" if path.endswith(".webp") else "image/png"
+    with open(path, 'rb') as f:
+        return f"data:{mime};base64,{base64.b64encode(f.read()).decode()}"
+
+if __name__ == "__main__":
+    for filename, (original, optimized) in optimize_all_assets().items():
+        print(f"{filename}: {original // 1024}KB -> {optimized // 1024}KB")
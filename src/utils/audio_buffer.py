@@ -0,0 +1,181 @@
+import io
+import wave
+import numpy as np
+from typing import Iterable, Tuple, Union
+from utils.loudness import normalize_loudness, DEFAULT_TARGET_LUFS, DEFAULT_TRUE_PEAK_DB
+from utils.resampler import resample
+
+# 各采样位宽对应的整数类型与满幅值
+_SAMPLE_FORMATS = {
+    1: (np.uint8, 128.0),
+    2: (np.int16, 32768.0),
+    4: (np.int32, 2147483648.0),
+}
+
+Step = Union[str, Tuple[str, dict]]
+
+class AudioBuffer:
+    """
+    解码后的 PCM 音频
+
+    samples 为 (帧数, 声道数) 的 float32 数组，取值范围 [-1, 1)。
+    WAV 只在 from_wav_bytes 解析一次、在 to_wav_bytes 序列化一次，
+    中间的处理方法都在 samples 上就地进行并返回 self，可以链式调用：
+
+        AudioBuffer.from_wav_bytes(data).normalize().fade(0.5).volume(0.8).to_wav_bytes()
+    """
+
+    def __init__(self, samples: np.ndarray, sample_rate: int, sample_width: int = 2):
+        """
+        Args:
+            samples: (帧数, 声道数) 或一维的浮点样本
+            sample_rate: 采样率
+            sample_width: 输出时的采样位宽（字节）
+        """
+        if sample_width not in _SAMPLE_FORMATS:
+            raise ValueError(f"不支持的采样位宽: {sample_width}")
+
+        samples = np.asarray(samples, dtype=np.float32)
+        if samples.ndim == 1:
+            samples = samples[:, None]
+
+        self.samples = samples
+        self.sample_rate = sample_rate
+        self.sample_width = sample_width
+
+    @classmethod
+    def from_pcm(
+        cls,
+        pcm: bytes,
+        num_channels: int = 1,
+        sample_rate: int = 16000,
+        sample_width: int = 2
+    ) -> "AudioBuffer":
+        """从裸 PCM 数据创建"""
+        if sample_width not in _SAMPLE_FORMATS:
+            raise ValueError(f"不支持的采样位宽: {sample_width}")
+
+        dtype, full_scale = _SAMPLE_FORMATS[sample_width]
+        frame_size = num_channels * sample_width
+        usable = len(pcm) - len(pcm) % frame_size
+        raw = np.frombuffer(pcm, dtype=dtype, count=usable // sample_width)
+
+        # 唯一的一次拷贝：整数 -> float32
+        samples = raw.astype(np.float32).reshape(-1, num_channels)
+        if dtype == np.uint8:
+            samples -= 128.0
+        samples /= full_scale
+
+        return cls(samples, sample_rate, sample_width)
+
+    @classmethod
+    def from_wav_bytes(cls, audio_data: bytes) -> "AudioBuffer":
+        """解析 WAV 字节数据"""
+        with wave.open(io.BytesIO(audio_data), 'rb') as wf:
+            num_channels = wf.getnchannels()
+            sample_width = wf.getsampwidth()
+            sample_rate = wf.getframerate()
+            frames = wf.readframes(wf.getnframes())
+
+        return cls.from_pcm(frames, num_channels, sample_rate, sample_width)
+
+    @property
+    def num_channels(self) -> int:
+        return self.samples.shape[1]
+
+    @property
+    def num_frames(self) -> int:
+        return self.samples.shape[0]
+
+    @property
+    def duration(self) -> float:
+        return self.num_frames / self.sample_rate if self.sample_rate else 0.0
+
+    def to_pcm(self) -> bytes:
+        """转换为裸 PCM 数据"""
+        dtype, full_scale = _SAMPLE_FORMATS[self.sample_width]
+        info = np.iinfo(dtype)
+
+        # 32 位整数超出 float32 的精度，用 float64 计算
+        work_dtype = np.float64 if self.sample_width == 4 else np.float32
+        scaled = np.multiply(self.samples, work_dtype(full_scale), dtype=work_dtype)
+        if dtype == np.uint8:
+            scaled += 128.0
+        np.rint(scaled, out=scaled)
+        np.clip(scaled, info.min, info.max, out=scaled)
+        return scaled.astype(dtype).tobytes()
+
+    def to_wav_bytes(self) -> bytes:
+        """序列化为 WAV 字节数据"""
+        output = io.BytesIO()
+        with wave.open(output, 'wb') as wf:
+            wf.setnchannels(self.num_channels)
+            wf.setsampwidth(self.sample_width)
+            wf.setframerate(self.sample_rate)
+            wf.writeframes(self.to_pcm())
+        return output.getvalue()
+
+    def volume(self, factor: float) -> "AudioBuffer":
+        """调整音量（超出范围的部分在序列化时截断）"""
+        self.samples *= np.float32(factor)
+        return self
+
+    def normalize(self, peak: float = 32767 / 32768) -> "AudioBuffer":
+        """把峰值调整到 peak（默认为 16 位满幅）"""
+        max_val = float(np.max(np.abs(self.samples))) if self.samples.size else 0.0
+        if max_val > 0:
+            self.samples *= np.float32(peak / max_val)
+        return self
+
+    def normalize_loudness(
+        self,
+        target_lufs: float = DEFAULT_TARGET_LUFS,
+        true_peak_db: float = DEFAULT_TRUE_PEAK_DB
+    ) -> "AudioBuffer":
+        """按积分响度（LUFS）归一化并做真峰值限幅"""
+        normalize_loudness(self.samples, self.sample_rate, target_lufs, true_peak_db)
+        return self
+
+    def fade(self, fade_in: float = 0.5, fade_out: float = None) -> "AudioBuffer":
+        """
+        淡入淡出（按帧计算，所有声道使用同一包络）
+
+        Args:
+            fade_in: 淡入时长（秒）
+            fade_out: 淡出时长（秒），None 表示与淡入相同
+        """
+        if fade_out is None:
+            fade_out = fade_in
+
+        # 淡入淡出总长不超过音频长度
+        fade_in_frames = min(int(fade_in * self.sample_rate), self.num_frames)
+        fade_out_frames = min(int(fade_out * self.sample_rate), self.num_frames)
+
+        if fade_in_frames > 0:
+            ramp = np.linspace(0, 1, fade_in_frames, dtype=np.float32)
+            self.samples[:fade_in_frames] *= ramp[:, None]
+        if fade_out_frames > 0:
+            ramp = np.linspace(1, 0, fade_out_frames, dtype=np.float32)
+            self.samples[-fade_out_frames:] *= ramp[:, None]
+        return self
+
+    def resample(self, target_sample_rate: int) -> "AudioBuffer":
+        """多相重采样（逐声道、分块处理）"""
+        if target_sample_rate != self.sample_rate and self.num_frames > 0:
+            self.samples = resample(self.samples, self.sample_rate, target_sample_rate)
+        self.sample_rate = target_sample_rate
+        return self
+
+    def apply(self, steps: Iterable[Step]) -> "AudioBuffer":
+        """
+        依次执行处理步骤
+
+        Args:
+            steps: 方法名或 (方法名, 参数字典)，如 ["normalize", ("fade", {"fade_in": 0.5})]
+        """
+        for step in steps:
+            name, kwargs = (step, {}) if isinstance(step, str) else step
+            if name not in ("volume", "normalize", "normalize_loudness", "fade", "resample"):
+                raise ValueError(f"未知的音频处理步骤: {name}")
+            getattr(self, name)(**kwargs)
+        return self
@@ -0,0 +1,288 @@
+import os
+import struct
+from functools import lru_cache
+from pathlib import Path
+from typing import BinaryIO, Dict, Optional, Union
+from utils.mapped_file import open_mapped
+
+# 查找 MP3 首帧时最多读取的字节数
+MP3_SYNC_SEARCH_BYTES = 64 * 1024
+
+AudioSource = Union[str, Path, bytes, bytearray, memoryview, BinaryIO]
+
+_MP3_BITRATES = {
+    (1, 1): (0, 32, 64, 96, 128, 160, 192, 224, 256, 288, 320, 352, 384, 416, 448),
+    (1, 2): (0, 32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384),
+    (1, 3): (0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320),
+    (2, 1): (0, 32, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224, 256),
+    (2, 2): (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+    (2, 3): (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+}
+
+_MP3_SAMPLE_RATES = {
+    1: (44100, 48000, 32000),
+    2: (22050, 24000, 16000),
+    25: (11025, 12000, 8000),
+}
+
+class _Reader:
+    """按偏移读取少量字节：文件只 seek + read，内存数据直接切片（不拷贝整段）"""
+
+    def __init__(self, source):
+        if isinstance(source, (bytes, bytearray, memoryview)):
+            self._view = memoryview(source).cast('B')
+            self._stream = None
+            self.size = len(self._view)
+        else:
+            self._view = None
+            self._stream = source
+            self._start = source.tell()
+            source.seek(0, os.SEEK_END)
+            self.size = source.tell() - self._start
+
+    def release(self) -> None:
+        """释放对内存数据的引用（映射的文件要在所有视图释放后才能关闭）"""
+        if self._view is not None:
+            self._view.release()
+
+    def read_at(self, offset: int, length: int) -> bytes:
+        if offset < 0 or offset >= self.size:
+            return b''
+        length = min(length, self.size - offset)
+        if self._view is not None:
+            return bytes(self._view[offset:offset + length])
+        self._stream.seek(self._start + offset)
+        return self._stream.read(length)
+
+def _probe_wav(reader: _Reader) -> Optional[Dict]:
+    header = reader.read_at(0, 12)
+    if len(header) < 12 or header[:4] != b'RIFF' or header[8:12] != b'WAVE':
+        return None
+
+    fmt = None
+    position = 12
+    while position + 8 <= reader.size:
+        chunk_id, chunk_size = struct.unpack('<4sI', reader.read_at(position, 8))
+        body = position + 8
+        if chunk_id == b'fmt ':
+            _, channels, sample_rate, _, block_align, bits = struct.unpack('<HHIIHH', reader.read_at(body, 16))
+            fmt = (channels, sample_rate, block_align, bits)
+        elif chunk_id == b'data':
+            if fmt is None:
+                return None
+            channels, sample_rate, block_align, bits = fmt
+
+            # 流式写入的文件长度可能是 0 或 0xFFFFFFFF，以实际文件大小为准
+            available = reader.size - body
+            data_size = available if chunk_size in (0, 0xFFFFFFFF) else min(chunk_size, available)
+            num_frames = data_size // block_align if block_align else 0
+            return {
+                "format": "wav",
+                "channels": channels,
+                "sample_width": bits // 8,
+                "sample_rate": sample_rate,
+                "num_frames": num_frames,
+                "duration": num_frames / sample_rate if sample_rate else 0.0,
+                "bitrate": sample_rate * channels * bits
+            }
+        position = body + chunk_size + (chunk_size & 1)
+
+    return None
+
+def _parse_mp3_frame_header(header: bytes) -> Optional[Dict]:
+    if len(header) < 4 or header[0] != 0xFF or (header[1] & 0xE0) != 0xE0:
+        return None
+
+    version_bits = (header[1] >> 3) & 3
+    layer_bits = (header[1] >> 1) & 3
+    bitrate_index = header[2] >> 4
+    rate_index = (header[2] >> 2) & 3
+    if version_bits == 1 or layer_bits == 0 or bitrate_index in (0, 15) or rate_index == 3:
+        return None
+
+    version = {3: 1, 2: 2, 0: 25}[version_bits]
+    layer = 4 - layer_bits
+    bitrate = _MP3_BITRATES[(1 if version == 1 else 2, layer)][bitrate_index] * 1000
+    sample_rate = _MP3_SAMPLE_RATES[version][rate_index]
+    padding = (header[2] >> 1) & 1
+
+    if layer == 1:
+        samples_per_frame = 384
+        frame_length = (12 * bitrate // sample_rate + padding) * 4
+    else:
+        samples_per_frame = 1152 if (layer == 2 or version == 1) else 576
+        frame_length = samples_per_frame // 8 * bitrate // sample_rate + padding
+
+    return {
+        "version": version,
+        "layer": layer,
+        "bitrate": bitrate,
+        "sample_rate": sample_rate,
+        "channels": 1 if (header[3] >> 6) == 3 else 2,
+        "samples_per_frame": samples_per_frame,
+        "frame_length": frame_length
+    }
+
+def _probe_mp3(reader: _Reader) -> Optional[Dict]:
+    # 跳过 ID3v2 标签（大小为 4 个 7 位字节）
+    start = 0
+    header = reader.read_at(0, 10)
+    if header[:3] == b'ID3' and len(header) == 10:
+        size = (header[6] << 21) | (header[7] << 14) | (header[8] << 7) | header[9]
+        start = 10 + size + (10 if header[5] & 0x10 else 0)
+
+    # ID3v1 标签在文件末尾 128 字节
+    end = reader.size
+    if reader.read_at(end - 128, 3) == b'TAG':
+        end -= 128
+
+    window = reader.read_at(start, MP3_SYNC_SEARCH_BYTES)
+    position = window.find(b'\xff')
+    while 0 <= position <= len(window) - 4:
+        frame = _parse_mp3_frame_header(window[position:position + 4])
+        if frame:
+            # 用下一帧的帧头确认不是偶然出现的同步字
+            following = reader.read_at(start + position + frame["frame_length"], 4)
+            if len(following) < 4 or _parse_mp3_frame_header(following):
+                break
+        position = window.find(b'\xff', position + 1)
+    else:
+        return None
+
+    frame_offset = start + position
+    sample_rate = frame["sample_rate"]
+    num_frames = None
+
+    # Xing/Info（VBR 或 LAME 写入的 CBR）或 VBRI 头中记录了总帧数
+    side_info = (32 if frame["channels"] == 2 else 17) if frame["version"] == 1 else (17 if frame["channels"] == 2 else 9)
+    xing = reader.read_at(frame_offset + 4 + side_info, 12)
+    vbri = reader.read_at(frame_offset + 36, 18)
+    if xing[:4] in (b'Xing', b'Info') and len(xing) == 12:
+        flags = struct.unpack('>I', xing[4:8])[0]
+        if flags & 1:
+            num_frames = struct.unpack('>I', xing[8:12])[0]
+    elif vbri[:4] == b'VBRI' and len(vbri) == 18:
+        num_frames = struct.unpack('>I', vbri[14:18])[0]
+
+    audio_bytes = end - frame_offset
+    if num_frames:
+        duration = num_frames * frame["samples_per_frame"] / sample_rate
+        bitrate = int(audio_bytes * 8 / duration) if duration else frame["bitrate"]
+    else:
+        # 固定码率：由数据长度估算
+        bitrate = frame["bitrate"]
+        duration = audio_bytes * 8 / bitrate
+
+    return {
+        "format": "mp3",
+        "channels": frame["channels"],
+        "sample_width": 2,
+        "sample_rate": sample_rate,
+        "num_frames": int(round(duration * sample_rate)),
+        "duration": duration,
+        "bitrate": bitrate
+    }
+
+def _iter_atoms(reader: _Reader, start: int, end: int):
+    """遍历 MP4 box：产出 (类型, 内容起始偏移, 内容结束偏移)"""
+    position = start
+    while position + 8 <= end:
+        size, atom_type = struct.unpack('>I4s', reader.read_at(position, 8))
+        header_size = 8
+        if size == 1:
+            size = struct.unpack('>Q', reader.read_at(position + 8, 8))[0]
+            header_size = 16
+        elif size == 0:
+            size = end - position
+        if size < header_size:
+            return
+        yield atom_type, position + header_size, min(position + size, end)
+        position += size
+
+def _find_atom(reader: _Reader, path, start: int, end: int):
+    for atom_type, body, atom_end in _iter_atoms(reader, start, end):
+        if atom_type == path[0]:
+            if len(path) == 1:
+                return body, atom_end
+            return _find_atom(reader, path[1:], body, atom_end)
+    return None
+
+def _probe_m4a(reader: _Reader) -> Optional[Dict]:
+    if reader.read_at(4, 4) != b'ftyp':
+        return None
+
+    # moov 可能位于 mdat 之后，只按 box 长度跳转，不读取音频数据
+    mvhd = _find_atom(reader, (b'moov', b'mvhd'), 0, reader.size)
+    if mvhd is None:
+        return None
+
+    body = reader.read_at(mvhd[0], 32)
+    if body[0] == 1:
+        timescale, duration_units = struct.unpack('>IQ', body[20:32])
+    else:
+        timescale, duration_units = struct.unpack('>II', body[12:20])
+    duration = duration_units / timescale if timescale else 0.0
+
+    channels, sample_width, sample_rate = 2, 2, 0
+    stsd = _find_atom(reader, (b'moov', b'trak', b'mdia', b'minf', b'stbl', b'stsd'), 0, reader.size)
+    if stsd:
+        # stsd: 版本/标志(4) + 条目数(4)，随后是第一个采样描述 (mp4a 等)
+        entry = reader.read_at(stsd[0] + 8, 36)
+        if len(entry) == 36:
+            channels, bits = struct.unpack('>HH', entry[24:28])
+            sample_width = max(bits // 8, 1)
+            sample_rate = struct.unpack('>I', entry[32:36])[0] >> 16
+
+    return {
+        "format": "m4a",
+        "channels": channels,
+        "sample_width": sample_width,
+        "sample_rate": sample_rate,
+        "num_frames": int(round(duration * sample_rate)),
+        "duration": duration,
+        "bitrate": int(reader.size * 8 / duration) if duration else 0
+    }
+
+def _probe_reader(reader: _Reader) -> Dict:
+    for probe in (_probe_wav, _probe_m4a, _probe_mp3):
+        info = probe(reader)
+        if info:
+            info["size"] = reader.size
+            return info
+    return {}
+
+@lru_cache(maxsize=1024)
+def _probe_path(path: str, mtime_ns: int, size: int) -> Dict:
+    # 映射文件后按偏移切片，只有实际读到的文件头页面会载入内存
+    with open_mapped(path) as view:
+        reader = _Reader(view)
+        try:
+            return _probe_reader(reader)
+        finally:
+            reader.release()
+
+def probe_audio(source: AudioSource) -> Dict:
+    """
+    只读取文件头获取音频信息（WAV / MP3 / M4A）
+
+    Args:
+        source: 文件路径、二进制文件对象或 bytes/memoryview；
+            路径按 (路径, 修改时间, 大小) 缓存结果
+
+    Returns:
+        {"format", "channels", "sample_width", "sample_rate", "num_frames", "duration", "bitrate", "size"}，
+        无法识别时返回空字典
+    """
+    try:
+        if isinstance(source, (str, Path)):
+            stat = os.stat(source)
+            return dict(_probe_path(os.path.abspath(source), stat.st_mtime_ns, stat.st_size))
+        return _probe_reader(_Reader(source))
+
+    except Exception as e:
+        print(f"音频信息读取失败: {str(e)}")
+        return {}
+
+def clear_probe_cache() -> None:
+    """清空路径探测缓存"""
+    _probe_path.cache_clear()
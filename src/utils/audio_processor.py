@@ -1,7 +1,9 @@
-import wave
 import io
-import numpy as np
 from typing import Tuple, Optional
+from utils.audio_buffer import AudioBuffer
+from utils.audio_probe import AudioSource, probe_audio
+from utils.loudness import DEFAULT_TARGET_LUFS, DEFAULT_TRUE_PEAK_DB
+from utils.wav_stream import StreamingWavWriter
 
 class AudioProcessor:
     """音频处理工具"""
@@ -46,35 +48,35 @@ class AudioProcessor:
         return header
 
     @staticmethod
-    def merge_audio_chunks(audio_chunks: list) -> bytes:
+    def merge_audio_chunks(
+        audio_chunks,
+        num_channels: int = 1,
+        sample_rate: int = 16000,
+        sample_width: int = 2
+    ) -> bytes:
         """
         合并多个音频块
 
         Args:
-            audio_chunks: 音频块列表
+            audio_chunks: 音频块列表或生成器（裸 PCM；首块带 WAV 头时自动使用其格式）
+            num_channels: 声道数
+            sample_rate: 采样率
+            sample_width: 采样位宽（字节）
 
         Returns:
             合并后的WAV文件字节数据
         """
         try:
-            if not audio_chunks:
+            if audio_chunks is None:
                 return b''
 
-            # 创建BytesIO对象
+            # 边接收边写入，不需要先拼接所有音频块
             output = io.BytesIO()
+            with StreamingWavWriter(output, num_channels, sample_rate, sample_width) as writer:
+                writer.write_all(audio_chunks)
 
-            # 使用wave模块创建WAV文件
-            with wave.open(output, 'wb') as wav_file:
-                # 假设是16bit单声道WAV, 采样率16000Hz
-                wav_file.setnchannels(1)
-                wav_file.setsampwidth(2)
-                wav_file.setframerate(16000)
-
-                # 合并所有音频数据
-                for chunk in audio_chunks:
-                    wav_file.writeframes(chunk)
-
-            output.seek(0)
+            if writer.data_size == 0:
+                return b''
             return output.getvalue()
 
         except Exception as e:
@@ -94,30 +96,7 @@ class AudioProcessor:
             调整后的音频字节数据
         """
         try:
-            # 读取WAV文件
-            wav_file = io.BytesIO(audio_data)
-            with wave.open(wav_file, 'rb') as wf:
-                frames = wf.readframes(wf.getnframes())
-                num_channels = wf.getnchannels()
-                sample_width = wf.getsampwidth()
-                framerate = wf.getframerate()
-
-            # 转换为numpy数组
-            audio_array = np.frombuffer(frames, dtype=np.int16)
-
-            # 调整音量（确保不超过范围）
-            adjusted_audio = np.clip(audio_array * volume_factor, -32768, 32767).astype(np.int16)
-
-            # 转换回WAV格式
-            output = io.BytesIO()
-            with wave.open(output, 'wb') as wf:
-                wf.setnchannels(num_channels)
-                wf.setsampwidth(sample_width)
-                wf.setframerate(framerate)
-                wf.writeframes(adjusted_audio.tobytes())
-
-            output.seek(0)
-            return output.getvalue()
+            return AudioBuffer.from_wav_bytes(audio_data).volume(volume_factor).to_wav_bytes()
 
         except Exception as e:
             print(f"音量调整失败: {str(e)}")
@@ -136,126 +115,63 @@ class AudioProcessor:
             处理后的音频字节数据
         """
         try:
-            # 读取WAV文件
-            wav_file = io.BytesIO(audio_data)
-            with wave.open(wav_file, 'rb') as wf:
-                frames = wf.readframes(wf.getnframes())
-                num_channels = wf.getnchannels()
-                sample_width = wf.getsampwidth()
-                framerate = wf.getframerate()
-
-            # 转换为numpy数组
-            audio_array = np.frombuffer(frames, dtype=np.int16)
-
-            # 计算淡入淡出样本数
-            fade_samples = int(fade_duration * framerate)
-
-            # 淡入
-            fade_in = np.linspace(0, 1, fade_samples)
-            audio_array[:fade_samples] = (audio_array[:fade_samples] * fade_in).astype(np.int16)
-
-            # 淡出
-            fade_out = np.linspace(1, 0, fade_samples)
-            audio_array[-fade_samples:] = (audio_array[-fade_samples:] * fade_out).astype(np.int16)
-
-            # 转换回WAV格式
-            output = io.BytesIO()
-            with wave.open(output, 'wb') as wf:
-                wf.setnchannels(num_channels)
-                wf.setsampwidth(sample_width)
-                wf.setframerate(framerate)
-                wf.writeframes(audio_array.tobytes())
-
-            output.seek(0)
-            return output.getvalue()
+            return AudioBuffer.from_wav_bytes(audio_data).fade(fade_duration).to_wav_bytes()
 
         except Exception as e:
             print(f"淡入淡出效果添加失败: {str(e)}")
             return audio_data
 
     @staticmethod
-    def get_audio_duration(audio_data: bytes) -> float:
+    def get_audio_duration(audio_data: AudioSource) -> float:
         """
-        获取音频时长
+        获取音频时长（只读取文件头）
 
         Args:
-            audio_data: WAV格式音频数据
+            audio_data: 音频字节数据、文件路径或文件对象（WAV/MP3/M4A）
 
         Returns:
             音频时长（秒）
         """
-        try:
-            wav_file = io.BytesIO(audio_data)
-            with wave.open(wav_file, 'rb') as wf:
-                num_frames = wf.getnframes()
-                framerate = wf.getframerate()
-                duration = num_frames / framerate
-                return duration
-
-        except Exception as e:
-            print(f"获取音频时长失败: {str(e)}")
-            return 0.0
+        return probe_audio(audio_data).get("duration", 0.0)
 
     @staticmethod
-    def get_audio_info(audio_data: bytes) -> dict:
+    def get_audio_info(audio_data: AudioSource) -> dict:
         """
-        获取音频信息
+        获取音频信息（只读取文件头，路径按修改时间缓存）
 
         Args:
-            audio_data: WAV格式音频数据
+            audio_data: 音频字节数据、文件路径或文件对象（WAV/MP3/M4A）
 
         Returns:
             包含音频信息的字典
         """
-        try:
-            wav_file = io.BytesIO(audio_data)
-            with wave.open(wav_file, 'rb') as wf:
-                num_channels = wf.getnchannels()
-                sample_width = wf.getsampwidth()
-                framerate = wf.getframerate()
-                num_frames = wf.getnframes()
-                duration = num_frames / framerate
-
-                return {
-                    "channels": num_channels,
-                    "sample_width": sample_width,
-                    "sample_rate": framerate,
-                    "num_frames": num_frames,
-                    "duration": duration,
-                    "bitrate": framerate * num_channels * sample_width * 8
-                }
-
-        except Exception as e:
-            print(f"获取音频信息失败: {str(e)}")
-            return {}
+        return probe_audio(audio_data)
 
     @staticmethod
-    def validate_audio(audio_data: bytes) -> Tuple[bool, str]:
+    def validate_audio(audio_data: AudioSource) -> Tuple[bool, str]:
         """
         验证音频文件
 
         Args:
-            audio_data: 音频字节数据
+            audio_data: 音频字节数据、文件路径或文件对象
 
         Returns:
             (是否有效, 错误信息)
         """
-        try:
-            if not audio_data:
-                return False, "音频数据为空"
+        if audio_data is None or (isinstance(audio_data, (bytes, bytearray, memoryview)) and len(audio_data) == 0):
+            return False, "音频数据为空"
 
-            wav_file = io.BytesIO(audio_data)
-            with wave.open(wav_file, 'rb') as wf:
-                if wf.getnframes() == 0:
-                    return False, "音频文件为空"
+        info = probe_audio(audio_data)
+        if not info:
+            return False, "无效的音频文件"
 
-                if wf.getframerate() not in [8000, 16000, 22050, 44100, 48000]:
-                    return False, "不支持的采样率"
+        if info["num_frames"] == 0:
+            return False, "音频文件为空"
 
-            return True, ""
+        if info["sample_rate"] not in [8000, 16000, 22050, 44100, 48000]:
+            return False, "不支持的采样率"
 
-        except Exception as e:
-            return False, f"无效的音频文件: {str(e)}"
+        return True, ""
 
     @staticmethod
     def normalize_audio(audio_data: bytes) -> bytes:
@@ -269,40 +185,36 @@ class AudioProcessor:
             规范化后的音频字节数据
         """
         try:
-            wav_file = io.BytesIO(audio_data)
-            with wave.open(wav_file, 'rb') as wf:
-                frames = wf.readframes(wf.getnframes())
-                num_channels = wf.getnchannels()
-                sample_width = wf.getsampwidth()
-                framerate = wf.getframerate()
-
-            # 转换为numpy数组
-            audio_array = np.frombuffer(frames, dtype=np.int16)
-
-            # 计算最大绝对值
-            max_val = np.max(np.abs(audio_array))
-
-            if max_val > 0:
-                # 规范化到最大值
-                normalized = (audio_array / max_val * 32767).astype(np.int16)
-            else:
-                normalized = audio_array
-
-            # 转换回WAV格式
-            output = io.BytesIO()
-            with wave.open(output, 'wb') as wf:
-                wf.setnchannels(num_channels)
-                wf.setsampwidth(sample_width)
-                wf.setframerate(framerate)
-                wf.writeframes(normalized.tobytes())
-
-            output.seek(0)
-            return output.getvalue()
+            return AudioBuffer.from_wav_bytes(audio_data).normalize().to_wav_bytes()
 
         except Exception as e:
             print(f"音频规范化失败: {str(e)}")
             return audio_data
 
+    @staticmethod
+    def normalize_loudness(
+        audio_data: bytes,
+        target_lufs: float = DEFAULT_TARGET_LUFS,
+        true_peak_db: float = DEFAULT_TRUE_PEAK_DB
+    ) -> bytes:
+        """
+        响度归一化（ITU-R BS.1770 积分响度 + 真峰值限幅），让不同来源的音频听感音量一致
+
+        Args:
+            audio_data: WAV格式音频数据
+            target_lufs: 目标响度（LUFS）
+            true_peak_db: 真峰值上限（dBTP）
+
+        Returns:
+            处理后的音频字节数据
+        """
+        try:
+            return AudioBuffer.from_wav_bytes(audio_data).normalize_loudness(target_lufs, true_peak_db).to_wav_bytes()
+
+        except Exception as e:
+            print(f"响度归一化失败: {str(e)}")
+            return audio_data
+
     @staticmethod
     def convert_audio_format(audio_data: bytes, target_sample_rate: int = 16000) -> bytes:
         """
@@ -316,35 +228,27 @@ class AudioProcessor:
             转换后的音频字节数据
         """
         try:
-            wav_file = io.BytesIO(audio_data)
-            with wave.open(wav_file, 'rb') as wf:
-                frames = wf.readframes(wf.getnframes())
-                num_channels = wf.getnchannels()
-                sample_width = wf.getsampwidth()
-                original_sample_rate = wf.getframerate()
-
-            # 转换为numpy数组
-            audio_array = np.frombuffer(frames, dtype=np.int16)
-
-            # 如果采样率不同，进行重采样
-            if original_sample_rate != target_sample_rate:
-                ratio = target_sample_rate / original_sample_rate
-                new_length = int(len(audio_array) * ratio)
-                # 使用线性插值
-                indices = np.linspace(0, len(audio_array) - 1, new_length)
-                audio_array = np.interp(indices, np.arange(len(audio_array)), audio_array).astype(np.int16)
-
-            # 转换回WAV格式
-            output = io.BytesIO()
-            with wave.open(output, 'wb') as wf:
-                wf.setnchannels(num_channels)
-                wf.setsampwidth(sample_width)
-                wf.setframerate(target_sample_rate)
-                wf.writeframes(audio_array.tobytes())
-
-            output.seek(0)
-            return output.getvalue()
+            return AudioBuffer.from_wav_bytes(audio_data).resample(target_sample_rate).to_wav_bytes()
 
         except Exception as e:
             print(f"音频格式转换失败: {str(e)}")
             return audio_data
+
+    @staticmethod
+    def process_audio(audio_data: bytes, steps: list) -> bytes:
+        """
+        按顺序执行多个处理步骤（只解析和序列化一次）
+
+        Args:
+            audio_data: WAV格式音频数据
+            steps: 处理步骤，如 ["normalize", ("fade", {"fade_in": 0.5}), ("volume", {"factor": 0.8})]
+
+        Returns:
+            处理后的音频字节数据
+        """
+        try:
+            return AudioBuffer.from_wav_bytes(audio_data).apply(steps).to_wav_bytes()
+
+        except Exception as e:
+            print(f"音频处理失败: {str(e)}")
+            return audio_data
@@ -0,0 +1,274 @@
+import os
+import time
+import argparse
+import threading
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from itertools import islice
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
+
+# 每个任务处理的图片数：减少进程间通信次数，同时保证负载均衡
+DEFAULT_CHUNK_SIZE = 8
+
+# 调色板颜色数（与 ImageProcessor.generate_palette 的默认值一致），占比颜色取同一次量化的结果
+PALETTE_SIZE = 8
+
+def analyze_image_file(path: str) -> Dict:
+    """
+    分析单张作品图片（在工作进程中执行）
+
+    图片只解码一次（RGB + 灰度），颜色只量化一次，各项指标都基于解码后的数组计算。
+
+    Args:
+        path: 图片路径
+
+    Returns:
+        {"path", "color_analysis", "composition_analysis"}，失败时包含 "error"
+    """
+    # 在工作进程内导入，避免主进程只为分派任务加载 OpenCV
+    import cv2
+    import numpy as np
+    from PIL import Image
+    from utils.color_quantizer import quantize_colors
+    from utils.composition_metrics import CompositionMetrics
+    from utils.focus_detector import detect_focus_region, DEFAULT_MAX_SIDE as FOCUS_MAX_SIDE
+    from utils.image_processor import ImageProcessor
+    from utils.mapped_file import decode_image
+
+    try:
+        # 直接从映射的文件解码，不先读成 bytes
+        bgr = decode_image(path)
+        if bgr is None:
+            raise ValueError("无法解码图片")
+        rgb = Image.fromarray(cv2.cvtColor(bgr, cv2.COLOR_BGR2RGB))
+        gray = np.array(rgb.convert('L'))
+
+        # 与 ImageProcessor.extract_weighted_colors 相同：在 150px 缩略图上量化
+        small = rgb.copy()
+        small.thumbnail((150, 150))
+        weighted_colors = quantize_colors(np.array(small).reshape((-1, 3)), PALETTE_SIZE)
+        colors = [color for color, _ in weighted_colors] or [(128, 128, 128)]
+
+        return {
+            "path": path,
+            "color_analysis": {
+                "palette": ImageProcessor.palette_from_colors(colors)["palette"],
+                # 不用 dominant_colors：那是模型分析给出的颜色名称，两者写在同一个元数据文件里
+                "weighted_colors": [
+                    {"rgb": list(color), "ratio": ratio} for color, ratio in weighted_colors
+                ]
+            },
+            "composition_analysis": {
+                # 平衡分数按亮度计算，其余指标按"墨量"计算（与 ImageProcessor 对应方法一致）
+                "calculated_balance": CompositionMetrics(gray, invert=False).balance()["score"],
+                "metrics": CompositionMetrics(gray).to_dict(),
+                "focus_point": list(detect_focus_region(gray, max_side=FOCUS_MAX_SIDE)["point"]),
+                "scene_type": ImageProcessor.classify_scene(gray)
+            }
+        }
+
+    except Exception as e:
+        return {"path": path, "error": str(e)}
+
+def analyze_image_chunk(paths: List[str]) -> List[Dict]:
+    """批量分析一组图片（进程池的任务单元）"""
+    return [analyze_image_file(path) for path in paths]
+
+class BatchAnalyzer:
+    """批量作品分析：多进程计算视觉指标并写回作品元数据"""
+
+    def __init__(
+        self,
+        file_handler=None,
+        max_workers: Optional[int] = None,
+        chunk_size: int = DEFAULT_CHUNK_SIZE
+    ):
+        """
+        Args:
+            file_handler: FileHandler 实例，None 时使用默认数据目录
+            max_workers: 工作进程数，None 表示 CPU 核心数
+            chunk_size: 每个任务包含的图片数
+        """
+        if file_handler is None:
+            from utils.file_handler import FileHandler
+            file_handler = FileHandler()
+
+        self.file_handler = file_handler
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.chunk_size = max(1, chunk_size)
+
+    def run(
+        self,
+        user_id: str = None,
+        force: bool = False,
+        progress_callback: Callable[[int, int], None] = None
+    ) -> Dict:
+        """
+        分析作品并写入元数据
+
+        Args:
+            user_id: 只分析指定用户，None 表示所有用户
+            force: True 时重新分析已有指标的作品
+            progress_callback: 进度回调 (已完成数, 失败数)
+
+        Returns:
+            统计信息 {"total", "succeeded", "failed", "skipped", "elapsed", "images_per_second"}
+        """
+        stats = {"total": 0, "succeeded": 0, "failed": 0, "skipped": 0}
+        start = time.perf_counter()
+
+        paths = self._pending_paths(user_id, force, stats)
+
+        with ProcessPoolExecutor(max_workers=self.max_workers) as executor:
+            # 限制在途任务数，路径边遍历边提交，不需要预先列出全部作品
+            max_in_flight = self.max_workers * 2
+            chunks = self._chunked(paths)
+            pending = set()
+
+            for chunk in islice(chunks, max_in_flight):
+                pending.add(executor.submit(analyze_image_chunk, chunk))
+
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    for result in future.result():
+                        self._handle_result(result, stats)
+                    if progress_callback:
+                        progress_callback(stats["succeeded"] + stats["failed"], stats["failed"])
+
+                for chunk in islice(chunks, len(done)):
+                    pending.add(executor.submit(analyze_image_chunk, chunk))
+
+        elapsed = time.perf_counter() - start
+        analyzed = stats["succeeded"] + stats["failed"]
+        stats["elapsed"] = elapsed
+        stats["images_per_second"] = analyzed / elapsed if elapsed > 0 else 0.0
+        return stats
+
+    def _pending_paths(self, user_id: str, force: bool, stats: Dict) -> Iterator[str]:
+        """遍历作品路径，跳过已有指标的作品"""
+        for path in self.file_handler.iter_artwork_paths(user_id):
+            stats["total"] += 1
+            if not force and self._has_metrics(path):
+                stats["skipped"] += 1
+                continue
+            yield str(path)
+
+    def _chunked(self, paths: Iterable[str]) -> Iterator[List[str]]:
+        iterator = iter(paths)
+        while True:
+            chunk = list(islice(iterator, self.chunk_size))
+            if not chunk:
+                return
+            yield chunk
+
+    def _has_metrics(self, image_path: Path) -> bool:
+        metadata = self.file_handler.load_metadata(image_path)
+        return "metrics" in (metadata.get("composition_analysis") or {})
+
+    def _handle_result(self, result: Dict, stats: Dict):
+        """把分析结果合并进作品元数据（只在主进程写文件）"""
+        if "error" in result:
+            stats["failed"] += 1
+            print(f"作品分析失败: {result['path']}: {result['error']}")
+            return
+
+        # 只覆盖本地计算的字段，保留模型生成的分析内容
+        sections = {section: result[section] for section in ("color_analysis", "composition_analysis")}
+        if self.file_handler.merge_metadata(result["path"], sections):
+            stats["succeeded"] += 1
+        else:
+            stats["failed"] += 1
+
+class BackgroundAIAnalysis:
+    """
+    后台批量 AI 分析：调用模型分析作品，结果合并进作品元数据
+
+    在后台线程中运行，页面只读取进度，不会因为分析全班作品而阻塞；进程内同一时间只运行一个
+    （见 start_ai_analysis）。
+    """
+
+    def __init__(self, multimodal, file_handler, paths: List[Path], chunk_size: int):
+        """
+        Args:
+            multimodal: MultimodalService 实例
+            file_handler: FileHandler 实例
+            paths: 待分析的作品图片路径
+            chunk_size: 每轮提交的图片数（通常等于同时进行的请求能容纳的图片数）
+        """
+        self.multimodal = multimodal
+        self.file_handler = file_handler
+        self.paths = list(paths)
+        self.chunk_size = max(1, chunk_size)
+        self.done = 0
+        self.saved = 0
+        # 任务中途异常退出时的错误信息（之后的作品未处理）
+        self.error: Optional[str] = None
+        self._thread = threading.Thread(target=self._run, name="ai-analysis", daemon=True)
+
+    @property
+    def total(self) -> int:
+        return len(self.paths)
+
+    @property
+    def running(self) -> bool:
+        return self._thread.is_alive()
+
+    def start(self) -> "BackgroundAIAnalysis":
+        self._thread.start()
+        return self
+
+    def _run(self):
+        try:
+            for start in range(0, len(self.paths), self.chunk_size):
+                chunk = self.paths[start:start + self.chunk_size]
+                # 文件缺失或无法读取的作品跳过（计为失败），不影响同一轮的其他作品
+                loaded = [(path, self.file_handler.load_image(str(path))) for path in chunk]
+                loaded = [(path, image_data) for path, image_data in loaded if image_data is not None]
+                analyses = self.multimodal.analyze_drawings_batch(
+                    [(image_data, {}) for _, image_data in loaded]
+                ) if loaded else []
+                for (path, _), analysis in zip(loaded, analyses):
+                    # 调用失败得到的默认分析不保存，下次仍算待分析
+                    if not self.multimodal.is_default_analysis(analysis):
+                        if self.file_handler.merge_metadata(path, analysis):
+                            self.saved += 1
+                self.done += len(chunk)
+        except Exception as e:
+            self.error = str(e)
+            print(f"批量 AI 分析失败: {str(e)}")
+
+_ai_analysis: Optional[BackgroundAIAnalysis] = None
+_ai_analysis_lock = threading.Lock()
+
+def get_ai_analysis() -> Optional[BackgroundAIAnalysis]:
+    """最近一次后台 AI 分析（可能已结束），从未启动时返回 None"""
+    return _ai_analysis
+
+def start_ai_analysis(multimodal, file_handler, paths: List[Path], chunk_size: int) -> BackgroundAIAnalysis:
+    """启动后台 AI 分析；已有任务在运行时直接返回该任务"""
+    global _ai_analysis
+    with _ai_analysis_lock:
+        if _ai_analysis is None or not _ai_analysis.running:
+            _ai_analysis = BackgroundAIAnalysis(multimodal, file_handler, paths, chunk_size).start()
+        return _ai_analysis
+
+if __name__ == "__main__":
+    # 在 src 目录下运行: python -m utils.batch_analyzer
+    from utils.asset_loader import PROJECT_ROOT
+    from utils.file_handler import FileHandler
+
+    parser = argparse.ArgumentParser(description="批量分析作品并写入元数据")
+    # 默认数据目录按项目根目录解析，与从哪个目录运行无关
+    parser.add_argument("--data-dir", default=str(PROJECT_ROOT / "data"), help="数据目录")
+    parser.add_argument("--user", default=None, help="只分析指定用户")
+    parser.add_argument("--workers", type=int, default=None, help="工作进程数（默认 CPU 核心数）")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="每个任务的图片数")
+    parser.add_argument("--force", action="store_true", help="重新分析已有指标的作品")
+    args = parser.parse_args()
+
+    analyzer = BatchAnalyzer(FileHandler(args.data_dir), args.workers, args.chunk_size)
+    result = analyzer.run(args.user, force=args.force)
+
+    print(f"共 {result['total']} 件作品：成功 {result['succeeded']}，失败 {result['failed']}，跳过 {result['skipped']}")
+    print(f"耗时 {result['elapsed']:.2f}s，{result['images_per_second']:.1f} 张/秒（{analyzer.max_workers} 个进程）")
@@ -0,0 +1,238 @@
+import os
+import json
+import time
+import shutil
+import sqlite3
+import hashlib
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterable, Optional
+
+class BlobStore:
+    """
+    内容寻址存储
+
+    相同内容只在 blobs 目录中保存一份（以 SHA-256 命名），
+    用户目录下的作品文件是指向该 blob 的硬链接（不支持时退化为复制），
+    通过引用计数决定何时真正删除 blob。
+
+    引用关系保存在 SQLite 中（每个条目一行），每次保存/删除只改动相关的行，
+    并在事务中完成，多个进程共用同一目录也不会互相覆盖。
+    """
+
+    INDEX_FILENAME = "refs.db"
+    LEGACY_INDEX_FILENAME = "refs.json"
+
+    def __init__(self, root_dir: str):
+        self.root_dir = Path(root_dir)
+        self.root_dir.mkdir(parents=True, exist_ok=True)
+        self.index_path = self.root_dir / self.INDEX_FILENAME
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(str(self.index_path), check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS blobs ("
+            "digest TEXT PRIMARY KEY, suffix TEXT NOT NULL, size INTEGER NOT NULL)"
+        )
+        # created_at 是条目的保存时间：条目是 blob 的硬链接，文件的修改时间属于最早写入的那一份
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            "entry TEXT PRIMARY KEY, digest TEXT NOT NULL, created_at REAL)"
+        )
+        columns = [row[1] for row in self._conn.execute("PRAGMA table_info(entries)")]
+        if "created_at" not in columns:
+            self._conn.execute("ALTER TABLE entries ADD COLUMN created_at REAL")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS entries_digest ON entries (digest)")
+        self._migrate_legacy_index()
+
+    @staticmethod
+    def compute_digest(data: bytes) -> str:
+        """计算内容哈希（同时可作为跨功能共享的缓存键）"""
+        return hashlib.sha256(data).hexdigest()
+
+    def blob_path(self, digest: str, suffix: str = "") -> Path:
+        """获取 blob 的存储路径（按哈希前两位分桶）"""
+        return self.root_dir / digest[:2] / f"{digest}{suffix}"
+
+    def store(self, data: bytes, entry_path: Path) -> str:
+        """
+        保存内容并在 entry_path 创建用户条目
+
+        Args:
+            data: 文件字节数据
+            entry_path: 用户目录下的条目路径
+
+        Returns:
+            内容哈希
+        """
+        entry_path = Path(entry_path)
+        digest = self.compute_digest(data)
+
+        with self._transaction():
+            # 同名条目已存在时先释放旧引用
+            self._release(entry_path)
+
+            self._conn.execute(
+                "INSERT OR IGNORE INTO blobs (digest, suffix, size) VALUES (?, ?, ?)",
+                (digest, entry_path.suffix, len(data))
+            )
+            suffix = self._conn.execute("SELECT suffix FROM blobs WHERE digest = ?", (digest,)).fetchone()[0]
+            blob = self._put(data, self.blob_path(digest, suffix))
+            self._link(blob, entry_path)
+            self._conn.execute(
+                "INSERT INTO entries (entry, digest, created_at) VALUES (?, ?, ?)",
+                (self._entry_key(entry_path), digest, time.time())
+            )
+
+        return digest
+
+    def release(self, entry_path: Path) -> bool:
+        """删除用户条目，引用归零时删除 blob"""
+        with self._transaction():
+            return self._release(Path(entry_path))
+
+    def get_digest(self, entry_path: Path) -> Optional[str]:
+        """获取用户条目对应的内容哈希"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT digest FROM entries WHERE entry = ?", (self._entry_key(Path(entry_path)),)
+            ).fetchone()
+        return row[0] if row else None
+
+    def get_created_times(self, entry_paths: Iterable[Path]) -> Dict[Path, float]:
+        """
+        获取用户条目的保存时间（Unix 时间戳）
+
+        Returns:
+            {条目路径: 保存时间}；不在存储中或迁移自旧索引（没有记录保存时间）的条目不包含在内
+        """
+        with self._lock:
+            rows = dict(self._conn.execute(
+                "SELECT entry, created_at FROM entries WHERE created_at IS NOT NULL"
+            ).fetchall())
+        times = {}
+        for entry_path in entry_paths:
+            created_at = rows.get(self._entry_key(Path(entry_path)))
+            if created_at is not None:
+                times[entry_path] = created_at
+        return times
+
+    def refcount(self, digest: str) -> int:
+        """获取 blob 的引用数"""
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM entries WHERE digest = ?", (digest,)).fetchone()[0]
+
+    def get_stats(self) -> Dict[str, int]:
+        """获取存储统计（物理占用与逻辑占用）"""
+        with self._lock:
+            blob_count, physical_bytes = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM blobs"
+            ).fetchone()
+            entry_count, logical_bytes = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(blobs.size), 0) FROM entries JOIN blobs USING (digest)"
+            ).fetchone()
+        return {
+            "blob_count": blob_count,
+            "entry_count": entry_count,
+            "physical_bytes": physical_bytes,
+            "logical_bytes": logical_bytes
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    @contextmanager
+    def _transaction(self):
+        """进程内加锁，进程间用 SQLite 写事务互斥"""
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+
+    def _put(self, data: bytes, blob: Path) -> Path:
+        """写入 blob（已存在则跳过）"""
+        if blob.exists():
+            return blob
+
+        blob.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = blob.with_name(blob.name + ".tmp")
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, blob)
+        return blob
+
+    def _link(self, blob: Path, entry_path: Path):
+        """创建指向 blob 的用户条目"""
+        entry_path.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            os.link(blob, entry_path)
+        except OSError:
+            # 跨设备或文件系统不支持硬链接时复制一份
+            shutil.copyfile(blob, entry_path)
+
+    def _release(self, entry_path: Path) -> bool:
+        # 调用方已开启事务
+        key = self._entry_key(entry_path)
+        row = self._conn.execute("SELECT digest FROM entries WHERE entry = ?", (key,)).fetchone()
+
+        if entry_path.exists():
+            entry_path.unlink()
+
+        if row is None:
+            return False
+
+        digest = row[0]
+        self._conn.execute("DELETE FROM entries WHERE entry = ?", (key,))
+        remaining = self._conn.execute("SELECT COUNT(*) FROM entries WHERE digest = ?", (digest,)).fetchone()[0]
+        if not remaining:
+            suffix = self._conn.execute("SELECT suffix FROM blobs WHERE digest = ?", (digest,)).fetchone()
+            blob = self.blob_path(digest, suffix[0] if suffix else "")
+            if blob.exists():
+                blob.unlink()
+            self._conn.execute("DELETE FROM blobs WHERE digest = ?", (digest,))
+
+        return True
+
+    def _entry_key(self, entry_path: Path) -> str:
+        """条目在索引中的键（相对于存储根目录的上级目录）"""
+        return Path(os.path.relpath(entry_path, self.root_dir.parent)).as_posix()
+
+    def _migrate_legacy_index(self):
+        """导入旧版 refs.json 索引（导入后改名为 refs.json.migrated）"""
+        legacy_path = self.root_dir / self.LEGACY_INDEX_FILENAME
+        if not legacy_path.exists():
+            return
+        try:
+            with open(legacy_path, 'r', encoding='utf-8') as f:
+                index = json.load(f)
+            with self._transaction():
+                self._conn.executemany(
+                    "INSERT OR IGNORE INTO blobs (digest, suffix, size) VALUES (?, ?, ?)",
+                    [(digest, record.get("suffix", ""), record.get("size", 0))
+                     for digest, record in index.get("blobs", {}).items()]
+                )
+                self._conn.executemany(
+                    "INSERT OR IGNORE INTO entries (entry, digest) VALUES (?, ?)",
+                    list(index.get("entries", {}).items())
+                )
+            os.replace(legacy_path, legacy_path.with_name(legacy_path.name + ".migrated"))
+        except Exception as e:
+            print(f"Blob索引迁移失败: {str(e)}")
+
+
+_stores: Dict[str, BlobStore] = {}
+_stores_lock = threading.Lock()
+
+def get_blob_store(root_dir: str) -> BlobStore:
+    """获取进程内共享的 BlobStore（同一目录只加载一次索引）"""
+    key = str(Path(root_dir).resolve())
+    with _stores_lock:
+        if key not in _stores:
+            _stores[key] = BlobStore(root_dir)
+        return _stores[key]
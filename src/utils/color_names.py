@@ -0,0 +1,246 @@
+import threading
+import numpy as np
+from typing import Iterable, List, Sequence, Tuple
+from utils.lazy_import import lazy_import
+
+spatial = lazy_import("scipy.spatial")
+
+# 常用基础色（孩子最容易理解的名称，放在前面以便同距离时优先命中）
+BASIC_COLOR_NAMES = [
+    ("红色", "#ff0000"), ("绿色", "#00ff00"), ("蓝色", "#0000ff"),
+    ("黄色", "#ffff00"), ("紫色", "#ff00ff"), ("青色", "#00ffff"),
+    ("橙色", "#ffa500"), ("深红", "#800000"), ("深绿", "#008000"),
+    ("深蓝", "#000080"), ("白色", "#ffffff"), ("黑色", "#000000"),
+    ("灰色", "#808080"), ("浅灰", "#c0c0c0"), ("深灰", "#404040"),
+    ("粉色", "#ffc0cb"), ("棕色", "#8b4513"), ("天蓝", "#87ceeb"),
+    ("浅绿", "#90ee90"), ("金色", "#ffd700"),
+]
+
+# 中国传统色
+TRADITIONAL_COLOR_NAMES = [
+    # 红 / 粉
+    ("乳白", "#f9f4dc"), ("粉红", "#ffb3a7"), ("妃色", "#ed5736"), ("桃红", "#f47983"),
+    ("海棠红", "#db5a6b"), ("石榴红", "#f20c00"), ("樱桃色", "#c93756"), ("银红", "#f05654"),
+    ("大红", "#ff2121"), ("绛紫", "#8c4356"), ("绯红", "#c83c23"), ("胭脂", "#9d2933"),
+    ("朱红", "#ff4c00"), ("丹", "#ff4e20"), ("彤", "#f35336"), ("茜色", "#cb3a56"),
+    ("火红", "#ff2d51"), ("赫赤", "#c91f37"), ("嫣红", "#ef7a82"), ("洋红", "#ff0097"),
+    ("炎", "#ff3300"), ("赤", "#c3272b"), ("绾", "#a98175"), ("枣红", "#c32136"),
+    ("檀", "#b36d61"), ("殷红", "#be002f"), ("酡红", "#dc3023"), ("酡颜", "#f9906f"),
+    ("品红", "#f00056"), ("朱砂", "#ff461f"), ("朱膘", "#f36838"), ("丹雘", "#f25a47"),
+    ("胭脂红", "#f03f24"), ("水红", "#f3d3e7"), ("藕荷色", "#e4c6d0"), ("藕色", "#edd1d8"),
+    ("桃夭", "#f6bec8"), ("合欢红", "#f0a1a8"), ("春梅红", "#f1939c"), ("香叶红", "#f07c82"),
+    ("珊瑚红", "#f04a3a"), ("萝卜红", "#f13c22"), ("淡茜红", "#e77c8e"), ("艳红", "#ed5a65"),
+    ("淡菽红", "#ed9db2"), ("鱼鳃红", "#ed3b2f"), ("樱花红", "#ea517f"), ("玫瑰红", "#d2357d"),
+    ("苋菜红", "#a61b29"), ("月季红", "#ce5777"), ("牡丹粉红", "#eea2a4"), ("石竹红", "#ee2c79"),
+    ("芍药耕红", "#eba0b3"), ("粉团花红", "#ec8aa4"), ("杏花红", "#f2aeae"), ("晨曦红", "#ea8958"),
+    ("蟹壳红", "#f27635"), ("金莲花橙", "#f86b1d"), ("柿红", "#f2481b"), ("草莓红", "#ef6f48"),
+    ("山茶红", "#ed556a"), ("玉红", "#c04851"), ("高粱红", "#c02c38"), ("满江红", "#a7535a"),
+    ("枸杞红", "#ef4b4b"), ("红梅粉", "#f0a1a2"), ("豆蔻红", "#e29c9b"), ("海螺红", "#f3a694"),
+    ("绯", "#f57a7a"), ("赭", "#9c5333"), ("铁水红", "#f5391c"), ("朱湛", "#d1343b"),
+    ("虾壳红", "#e28c6d"), ("芙蓉红", "#f9723d"), ("鹤顶红", "#d42517"), ("猩红", "#f03752"),
+    ("石榴裙", "#b13b2e"), ("醉瑶瑛", "#fc8fa1"), ("胭脂虫", "#ab1d22"), ("苏方", "#81343b"),
+    # 橙 / 褐
+    ("橘黄", "#ff8936"), ("橘红", "#ff7500"), ("杏黄", "#ffa631"), ("杏红", "#ff8c31"),
+    ("橙黄", "#ffa400"), ("橙", "#fa8c35"), ("茶色", "#b35c44"), ("驼色", "#a88462"),
+    ("昏黄", "#c89b40"), ("栗色", "#60281e"), ("棕红", "#9b4400"), ("棕黄", "#ae7000"),
+    ("棕绿", "#827100"), ("赭石", "#845a33"), ("琥珀", "#ca6924"), ("褐色", "#6e511e"),
+    ("枯黄", "#d3b17d"), ("黄栌", "#e29c45"), ("秋色", "#896c39"), ("秋香色", "#d9b611"),
+    ("土黄", "#d6a01d"), ("咖啡", "#5a3d2b"), ("巧克力色", "#4c211b"), ("赭黄", "#a0522d"),
+    ("肉色", "#f7c173"), ("蛋壳黄", "#f8c387"), ("淡橘橙", "#fba414"), ("枇杷黄", "#fca106"),
+    ("橙皮黄", "#fca104"), ("北瓜黄", "#fc8c23"), ("万寿菊黄", "#fb8b05"), ("风帆黄", "#dc9123"),
+    ("琥珀黄", "#feba07"), ("金橙", "#f8a20a"), ("相思灰", "#625068"), ("芦苇黄", "#d2b38c"),
+    ("海鸥灰", "#9a8878"), ("淡咖啡", "#945833"), ("岩石棕", "#964d22"), ("芒果棕", "#954416"),
+    ("椰壳棕", "#683a1e"), ("麂棕", "#b36633"), ("淡银灰", "#c1b2a3"), ("蜜褐", "#683472"),
+    ("琥珀棕", "#b78d12"), ("沙石黄", "#e5b751"), ("焦茶", "#6b3321"), ("檀香", "#b6825d"),
+    ("落日橙", "#fa7e23"), ("甘草黄", "#f3bf4c"), ("陶土", "#b5755a"),
+    # 黄
+    ("杏仁黄", "#f7e8aa"), ("茉莉黄", "#f8df72"), ("麦秆黄", "#f8df70"), ("油菜花黄", "#fbda41"),
+    ("佛手黄", "#fed71a"), ("篾黄", "#f7de98"), ("葵扇黄", "#f8d86a"), ("柠檬黄", "#fcd337"),
+    ("金瓜黄", "#fcd217"), ("藤黄", "#ffd111"), ("酪黄", "#f6dead"), ("香水玫瑰黄", "#f7da94"),
+    ("淡密黄", "#f9d367"), ("大豆黄", "#fbcd31"), ("素馨黄", "#fccb16"), ("向日葵黄", "#fecc11"),
+    ("雅梨黄", "#fbc82f"), ("黄连黄", "#fcc515"), ("金盏黄", "#fcc307"), ("鹅掌黄", "#fbb929"),
+    ("鸡蛋黄", "#fbb612"), ("鼬黄", "#fcb70a"), ("榴萼黄", "#f9a633"), ("鹅黄", "#fff143"),
+    ("鸭黄", "#faff72"), ("樱草色", "#eaff56"), ("明黄", "#ffc773"), ("姜黄", "#ffc64b"),
+    ("缃色", "#f0c239"), ("赤金", "#f2be45"), ("金黄", "#eacd76"),
+    ("象牙白", "#fffbf0"), ("米色", "#eedeb0"), ("雄黄", "#e9bb1d"),
+    ("香色", "#e3bd8d"), ("苍黄", "#b39c61"), ("奶白", "#f7f4ed"),
+    ("玉米黄", "#f2c94c"), ("稻草黄", "#e7d18b"), ("沙色", "#d6c28e"),
+    ("炒米黄", "#f4ce69"), ("浅驼色", "#e2c17c"), ("枯绿", "#d3c383"), ("松花色", "#bce672"),
+    # 绿
+    ("嫩绿", "#bddd22"), ("柳黄", "#c9dd22"), ("柳绿", "#afdd22"), ("竹青", "#789262"),
+    ("葱黄", "#a3d900"), ("葱绿", "#9ed900"), ("葱青", "#0eb83a"), ("葱倩", "#0eb840"),
+    ("青葱", "#0aa344"), ("油绿", "#00bc12"), ("绿沈", "#0c8918"), ("碧色", "#1bd1a5"),
+    ("碧绿", "#2add9c"), ("青碧", "#48c0a3"), ("翡翠色", "#3de1ad"), ("草绿", "#40de5a"),
+    ("翠色", "#00e09e"), ("豆绿", "#9ed048"), ("豆青", "#96ce54"), ("石青", "#7bcfa6"),
+    ("玉色", "#2edfa3"), ("缥", "#7fecad"), ("艾绿", "#a4e2c6"), ("松柏绿", "#21a675"),
+    ("松花绿", "#057748"), ("铜绿", "#549688"), ("墨绿", "#093a2a"),
+    ("孔雀绿", "#229453"), ("蛙绿", "#45b787"), ("碧青", "#5cb3cc"), ("薄荷绿", "#207f4c"),
+    ("荷叶绿", "#1a6840"), ("苔绿", "#1c4c2b"), ("竹篁绿", "#b9dec9"), ("淡绿", "#61ac85"),
+    ("蔻梢绿", "#5dbe8a"), ("麦苗绿", "#55bb8a"), ("橄榄绿", "#5e665b"), ("芽绿", "#96c24e"),
+    ("苹果绿", "#bacf65"), ("苔藓绿", "#8cc269"), ("宝石绿", "#41ae3c"), ("蛙背绿", "#6fb54d"),
+    ("春绿", "#c5e063"), ("橄榄黄绿", "#bec936"), ("鹦鹉绿", "#5bae23"), ("蓝绿", "#12a182"),
+    ("玉髓绿", "#41b349"), ("翠绿", "#20a162"), ("鲜绿", "#43b244"), ("孔雀石绿", "#26b49f"),
+    ("青矾绿", "#2c9678"), ("瓦松绿", "#6e8b74"), ("田园绿", "#68b88e"), ("竹绿", "#1ba784"),
+    ("蟾绿", "#3c9566"), ("秧草绿", "#ecf0c6"), ("豆蔻绿", "#a4cab6"), ("铜青", "#3d8e86"),
+    ("石绿", "#57c3c2"), ("碧山", "#779649"), ("青梅", "#8cb369"), ("松绿", "#4d8c57"),
+    # 青 / 蓝
+    ("蓝", "#44cef6"), ("靛青", "#177cb0"), ("靛蓝", "#065279"), ("碧蓝", "#3eede7"),
+    ("蔚蓝", "#70f3ff"), ("宝蓝", "#4b5cc4"), ("蓝灰色", "#a1afc9"), ("藏青", "#2e4e7e"),
+    ("藏蓝", "#3b2e7e"), ("黛", "#4a4266"), ("黛绿", "#426666"), ("黛蓝", "#425066"),
+    ("黛紫", "#574266"), ("群青", "#4c8dae"), ("花青", "#003472"), ("天青", "#bbcdc5"),
+    ("雪青", "#b0a4e3"), ("湖蓝", "#2a6e8f"), ("石蓝", "#1d3d6b"),
+    ("绀青", "#003371"), ("孔雀蓝", "#0eb0c9"), ("湖水蓝", "#b0d5df"), ("海蓝", "#2286c6"),
+    ("晴山蓝", "#8fb2c9"), ("宝石蓝", "#2486b9"), ("天蓝色", "#1677b3"), ("钴蓝", "#1e9eb3"),
+    ("景泰蓝", "#2775b6"), ("品蓝", "#2b73af"), ("尼罗蓝", "#2474b5"), ("蝴蝶蓝", "#2376b7"),
+    ("海军蓝", "#346c9c"), ("牵牛花蓝", "#1661ab"), ("虹蓝", "#2177b8"), ("柏林蓝", "#126bae"),
+    ("瓦罐灰", "#47484c"), ("青灰", "#2b333e"), ("鸽蓝", "#1c2938"), ("钢蓝", "#142334"),
+    ("暗蓝紫", "#131824"), ("月影白", "#c0c4c3"), ("银鼠灰", "#b5aa90"), ("星蓝", "#93b5cf"),
+    ("云水蓝", "#baccd9"), ("清水蓝", "#93d5dc"), ("瀑布蓝", "#51c4d3"), ("蔚蓝色", "#29b7cb"),
+    ("玉鈫蓝", "#126e82"), ("甸子蓝", "#10aec2"), ("釉蓝", "#1781b5"),
+    ("涧石蓝", "#66a9c9"), ("远天蓝", "#d0dfe6"), ("云峰白", "#d8e3e7"), ("井天蓝", "#c3d7df"),
+    ("碧空", "#9bc1d8"), ("淡蓝", "#a4d4e8"), ("水蓝", "#5ca9d1"), ("霁青", "#63bbd0"),
+    ("靛青色", "#1f3a5f"), ("深海蓝", "#15559a"), ("搪磁蓝", "#11659a"),
+    ("景天蓝", "#2c6e99"), ("青金石", "#2a52be"), ("天水碧", "#5aa4ae"), ("碧落", "#aed0ee"),
+    # 紫
+    ("紫罗兰", "#8d4bbb"), ("紫檀", "#4c221b"), ("紫棠", "#56004f"), ("青莲", "#801dae"),
+    ("丁香色", "#cca4e3"), ("酱紫", "#815463"),
+    ("暗紫", "#8b2671"), ("丁香淡紫", "#e9d7df"), ("紫藤", "#8076a3"), ("葡萄紫", "#4c1f24"),
+    ("茄皮紫", "#2d0c13"), ("李紫", "#2b1216"), ("魏紫", "#7e1671"), ("芥花紫", "#e6d2d5"),
+    ("淡青紫", "#e0c8d1"), ("荸荠紫", "#411c35"), ("野葡萄紫", "#302f4b"), ("凤仙花红", "#ea7293"),
+    ("菱锰红", "#c35691"), ("龙须红", "#cc5595"), ("丁香紫", "#983680"), ("芍药紫", "#c08eaf"),
+    ("紫薇花", "#b9a0c4"), ("剑锋紫", "#3e3841"), ("乌梅紫", "#1e131d"), ("古铜紫", "#433220"),
+    ("暮云灰", "#4f383e"), ("槿紫", "#806d9e"), ("牵牛紫", "#681752"), ("苋菜紫", "#9b1e64"),
+    ("薰衣草紫", "#a7a8bd"), ("玫瑰紫", "#ba2f7b"), ("桔梗紫", "#5d3131"), ("蔷薇紫", "#d6a4c8"),
+    # 白 / 灰 / 黑
+    ("铅白", "#f0f0f4"), ("霜色", "#e9f1f6"), ("雪白", "#f0fcff"),
+    ("莹白", "#e3f9fd"), ("月白", "#d6ecf0"), ("缟", "#f2ecde"),
+    ("鱼肚白", "#fcefe8"), ("白粉", "#fff2df"), ("荼白", "#f3f9f1"), ("鸭蛋青", "#e0eee8"),
+    ("素", "#e0f0e9"), ("青白", "#c0ebd7"), ("银白", "#e9e7ef"),
+    ("苍白", "#d1d9e0"), ("水色", "#88ada6"), ("灰白", "#e5e5e5"), ("银灰", "#918072"),
+    ("苍色", "#75878a"), ("水绿", "#d4f2e7"), ("鸦青", "#424c50"), ("黝", "#6b6882"),
+    ("乌黑", "#392f41"), ("玄青", "#3d3b4f"), ("乌色", "#725e82"), ("黎", "#75664d"),
+    ("黧", "#5d513c"), ("黝黑", "#665757"), ("缁色", "#493131"), ("煤黑", "#312520"),
+    ("漆黑", "#161823"), ("黑灰", "#2f2f2f"), ("墨色", "#50616d"), ("墨灰", "#758a99"),
+    ("玄色", "#622a1d"), ("烟灰", "#a6a6a6"), ("深鼠灰", "#5d5d5d"), ("银鼠", "#c2c2c2"),
+    ("珍珠灰", "#e4dfd7"), ("浅云", "#eaeef1"), ("月灰", "#b7ae8f"), ("石板灰", "#624941"),
+    ("燕羽灰", "#685e48"), ("鹰背褐", "#8f6d5f"), ("暗灰", "#6f6f6f"), ("水墨", "#4e5058"),
+]
+
+RGB = Tuple[int, int, int]
+
+def hex_to_rgb(hex_color: str) -> RGB:
+    """#rrggbb 转 RGB 元组"""
+    hex_color = hex_color.lstrip('#')
+    return tuple(int(hex_color[i:i + 2], 16) for i in (0, 2, 4))
+
+def rgb_to_lab(rgb: np.ndarray) -> np.ndarray:
+    """
+    sRGB 转 CIE Lab（D65 白点），向量化处理
+
+    Args:
+        rgb: 形状为 (..., 3) 的 0-255 RGB 数组
+
+    Returns:
+        同形状的 float32 Lab 数组
+    """
+    rgb = np.asarray(rgb, dtype=np.float32) / 255.0
+
+    # sRGB 反伽马
+    linear = np.where(rgb > 0.04045, ((rgb + 0.055) / 1.055) ** 2.4, rgb / 12.92)
+
+    matrix = np.array([
+        [0.4124564, 0.3575761, 0.1804375],
+        [0.2126729, 0.7151522, 0.0721750],
+        [0.0193339, 0.1191920, 0.9503041],
+    ], dtype=np.float32)
+    xyz = linear @ matrix.T
+    xyz /= np.array([0.95047, 1.0, 1.08883], dtype=np.float32)
+
+    epsilon = 216 / 24389
+    kappa = 24389 / 27
+    f = np.where(xyz > epsilon, np.cbrt(xyz), (kappa * xyz + 16) / 116)
+
+    lab = np.empty_like(f)
+    lab[..., 0] = 116 * f[..., 1] - 16
+    lab[..., 1] = 500 * (f[..., 0] - f[..., 1])
+    lab[..., 2] = 200 * (f[..., 1] - f[..., 2])
+    return lab.astype(np.float32)
+
+class ColorNameTable:
+    """颜色名称表：在 Lab 空间中用 KD 树查找最接近的颜色名称"""
+
+    def __init__(self, entries: Iterable[Tuple[str, str]] = ()):
+        self._names: List[str] = []
+        self._rgb: List[RGB] = []
+        self._lab = None
+        self._tree = None
+        self._lock = threading.Lock()
+        self.extend(entries)
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def add(self, name: str, color) -> None:
+        """
+        添加颜色名称（已有同名颜色时覆盖）
+
+        Args:
+            name: 颜色名称
+            color: '#rrggbb' 字符串或 RGB 元组
+        """
+        rgb = hex_to_rgb(color) if isinstance(color, str) else tuple(int(c) for c in color)
+        with self._lock:
+            if name in self._names:
+                self._rgb[self._names.index(name)] = rgb
+            else:
+                self._names.append(name)
+                self._rgb.append(rgb)
+            self._tree = None
+
+    def extend(self, entries: Iterable[Tuple[str, str]]) -> None:
+        """批量添加颜色名称"""
+        for name, color in entries:
+            self.add(name, color)
+
+    def nearest(self, colors: Sequence[RGB]) -> List[str]:
+        """
+        批量查找最接近的颜色名称
+
+        Args:
+            colors: RGB 颜色列表或 (N, 3) 数组
+
+        Returns:
+            与输入一一对应的颜色名称列表
+        """
+        colors = np.asarray(colors, dtype=np.float32).reshape(-1, 3)
+        if len(colors) == 0 or not self._names:
+            return []
+
+        tree, names = self._get_tree()
+        _, indices = tree.query(rgb_to_lab(colors))
+        return [names[i] for i in np.atleast_1d(indices)]
+
+    def nearest_one(self, color: RGB) -> str:
+        """查找单个颜色最接近的名称"""
+        names = self.nearest([color])
+        return names[0] if names else "自定义色"
+
+    def _get_tree(self):
+        """KD 树在首次查询或表变更后构建一次"""
+        with self._lock:
+            if self._tree is None:
+                self._lab = rgb_to_lab(np.array(self._rgb, dtype=np.float32))
+                self._tree = spatial.cKDTree(self._lab)
+            return self._tree, list(self._names)
+
+
+_default_table = None
+_default_lock = threading.Lock()
+
+def get_color_name_table() -> ColorNameTable:
+    """获取进程内共享的默认颜色名称表"""
+    global _default_table
+    with _default_lock:
+        if _default_table is None:
+            _default_table = ColorNameTable(BASIC_COLOR_NAMES + TRADITIONAL_COLOR_NAMES)
+        return _default_table
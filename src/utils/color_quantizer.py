@@ -0,0 +1,217 @@
+import numpy as np
+from typing import Dict, List, Tuple
+from utils.lazy_import import lazy_import
+
+cv2 = lazy_import("cv2")
+
+RGB = Tuple[int, int, int]
+WeightedColor = Tuple[RGB, float]
+
+class ColorQuantizer:
+    """颜色量化算法基类：输入像素，输出按占比排序的 (颜色, 占比) 列表"""
+
+    name = ""
+
+    def quantize(self, pixels: np.ndarray, num_colors: int) -> List[WeightedColor]:
+        """
+        提取代表色
+
+        Args:
+            pixels: (N, 3) uint8 RGB 像素
+            num_colors: 颜色数量
+
+        Returns:
+            [(RGB, 像素占比)]，按占比从高到低排序
+        """
+        raise NotImplementedError
+
+    @staticmethod
+    def _finalize(centers: np.ndarray, counts: np.ndarray) -> List[WeightedColor]:
+        """统一输出格式：去掉空簇并按占比排序"""
+        total = counts.sum()
+        if total == 0:
+            return []
+
+        order = np.argsort(-counts, kind='stable')
+        result = []
+        for i in order:
+            if counts[i] == 0:
+                continue
+            color = tuple(int(c) for c in np.clip(np.rint(centers[i]), 0, 255))
+            result.append((color, float(counts[i] / total)))
+        return result
+
+class KMeansQuantizer(ColorQuantizer):
+    """OpenCV K-means（原实现：随机初始化，多次尝试，结果不固定）"""
+
+    name = "kmeans"
+
+    def __init__(self, attempts: int = 10):
+        self.attempts = attempts
+
+    def quantize(self, pixels: np.ndarray, num_colors: int) -> List[WeightedColor]:
+        pixels_float = np.float32(pixels)
+        num_colors = min(num_colors, len(pixels_float))
+        criteria = (cv2.TERM_CRITERIA_EPS + cv2.TERM_CRITERIA_MAX_ITER, 10, 1.0)
+        _, labels, centers = cv2.kmeans(
+            pixels_float, num_colors, None, criteria, self.attempts, cv2.KMEANS_RANDOM_CENTERS
+        )
+        counts = np.bincount(labels.ravel(), minlength=num_colors)
+        return self._finalize(centers, counts)
+
+class MedianCutQuantizer(ColorQuantizer):
+    """
+    基于直方图的中位切分
+
+    先把像素按每通道 5 bit 分桶统计，之后只在非空桶上切分，
+    最后在桶上做几轮加权 Lloyd 迭代修正中心。
+    计算量与图片大小基本无关，且结果完全确定。
+    """
+
+    name = "median_cut"
+
+    def __init__(self, bits: int = 5, refine_iterations: int = 3):
+        self.bits = bits
+        self.refine_iterations = refine_iterations
+
+    def quantize(self, pixels: np.ndarray, num_colors: int) -> List[WeightedColor]:
+        shift = 8 - self.bits
+        pixels = pixels.astype(np.int64)
+        binned = pixels >> shift
+        keys = (binned[:, 0] << (2 * self.bits)) | (binned[:, 1] << self.bits) | binned[:, 2]
+
+        # 每个非空桶的像素数与颜色均值
+        unique_keys, inverse, counts = np.unique(keys, return_inverse=True, return_counts=True)
+        sums = np.stack([
+            np.bincount(inverse, weights=pixels[:, c], minlength=len(unique_keys)) for c in range(3)
+        ], axis=1)
+        means = sums / counts[:, None]
+
+        boxes = [np.arange(len(unique_keys))]
+        while len(boxes) < num_colors:
+            # 选择加权平方误差最大的盒子切分
+            best_index, best_score = -1, 0.0
+            for i, box in enumerate(boxes):
+                if len(box) < 2:
+                    continue
+                score = self._box_error(means[box], counts[box]).sum()
+                if score > best_score:
+                    best_index, best_score = i, score
+            if best_index < 0:
+                break
+
+            box = boxes.pop(best_index)
+            channel = int(np.argmax(self._box_error(means[box], counts[box])))
+            order = box[np.argsort(means[box][:, channel], kind='stable')]
+
+            # 按像素数取加权中位数
+            cumulative = np.cumsum(counts[order])
+            split = int(np.searchsorted(cumulative, cumulative[-1] / 2))
+            split = min(max(split, 1), len(order) - 1)
+            boxes.extend([order[:split], order[split:]])
+
+        centers = np.array([sums[box].sum(axis=0) / counts[box].sum() for box in boxes])
+
+        # 在桶均值上做加权 Lloyd 迭代
+        for _ in range(self.refine_iterations):
+            labels = self._nearest(means, centers)
+            box_counts = np.bincount(labels, weights=counts, minlength=len(centers))
+            for c in range(3):
+                channel_sums = np.bincount(labels, weights=sums[:, c], minlength=len(centers))
+                centers[:, c] = np.where(box_counts > 0, channel_sums / np.maximum(box_counts, 1), centers[:, c])
+
+        box_counts = np.bincount(self._nearest(means, centers), weights=counts, minlength=len(centers))
+        return self._finalize(centers, box_counts)
+
+    @staticmethod
+    def _box_error(box_means: np.ndarray, box_counts: np.ndarray) -> np.ndarray:
+        """盒子内每个通道的加权平方误差"""
+        mean = np.average(box_means, axis=0, weights=box_counts)
+        return ((box_means - mean) ** 2 * box_counts[:, None]).sum(axis=0)
+
+    @staticmethod
+    def _nearest(points: np.ndarray, centers: np.ndarray) -> np.ndarray:
+        distances = -2 * points @ centers.T + (centers ** 2).sum(axis=1)
+        return np.argmin(distances, axis=1)
+
+class MiniBatchKMeansQuantizer(ColorQuantizer):
+    """Mini-batch K-means（k-means++ 初始化，固定随机种子，结果可复现）"""
+
+    name = "minibatch_kmeans"
+
+    def __init__(self, batch_size: int = 1024, iterations: int = 50, seed: int = 0):
+        self.batch_size = batch_size
+        self.iterations = iterations
+        self.seed = seed
+
+    def quantize(self, pixels: np.ndarray, num_colors: int) -> List[WeightedColor]:
+        rng = np.random.default_rng(self.seed)
+        data = pixels.astype(np.float32)
+        num_colors = min(num_colors, len(data))
+
+        centers = self._kmeans_plus_plus(data, num_colors, rng)
+        seen = np.zeros(num_colors, dtype=np.float32)
+
+        for _ in range(self.iterations):
+            batch = data[rng.integers(0, len(data), size=min(self.batch_size, len(data)))]
+            labels = self._assign(batch, centers)
+            for k in np.unique(labels):
+                members = batch[labels == k]
+                seen[k] += len(members)
+                # 学习率随该中心累计样本数递减
+                rate = len(members) / seen[k]
+                centers[k] += rate * (members.mean(axis=0) - centers[k])
+
+        counts = np.bincount(self._assign(data, centers), minlength=num_colors)
+        return self._finalize(centers, counts)
+
+    @staticmethod
+    def _assign(data: np.ndarray, centers: np.ndarray) -> np.ndarray:
+        # |x-c|^2 = |x|^2 - 2x·c + |c|^2，省略与 c 无关的 |x|^2
+        distances = -2 * data @ centers.T + (centers ** 2).sum(axis=1)
+        return np.argmin(distances, axis=1)
+
+    @staticmethod
+    def _kmeans_plus_plus(data: np.ndarray, num_colors: int, rng: np.random.Generator) -> np.ndarray:
+        centers = np.empty((num_colors, 3), dtype=np.float32)
+        centers[0] = data[rng.integers(len(data))]
+        closest = ((data - centers[0]) ** 2).sum(axis=1)
+
+        for k in range(1, num_colors):
+            total = closest.sum()
+            if total == 0:
+                centers[k:] = centers[0]
+                break
+            index = rng.choice(len(data), p=closest / total)
+            centers[k] = data[index]
+            closest = np.minimum(closest, ((data - centers[k]) ** 2).sum(axis=1))
+
+        return centers
+
+
+_QUANTIZERS: Dict[str, ColorQuantizer] = {}
+
+def register_quantizer(quantizer: ColorQuantizer) -> None:
+    """注册颜色量化算法（同名覆盖）"""
+    _QUANTIZERS[quantizer.name] = quantizer
+
+def get_quantizer(name: str) -> ColorQuantizer:
+    """按名称获取颜色量化算法"""
+    if name not in _QUANTIZERS:
+        raise ValueError(f"未知的颜色量化算法: {name}，可选: {', '.join(_QUANTIZERS)}")
+    return _QUANTIZERS[name]
+
+def available_quantizers() -> List[str]:
+    """获取已注册的算法名称"""
+    return list(_QUANTIZERS)
+
+def quantize_colors(pixels: np.ndarray, num_colors: int, method: str = "median_cut") -> List[WeightedColor]:
+    """使用指定算法提取代表色"""
+    pixels = np.asarray(pixels, dtype=np.uint8).reshape(-1, 3)
+    if len(pixels) == 0 or num_colors <= 0:
+        return []
+    return get_quantizer(method).quantize(pixels, num_colors)
+
+register_quantizer(KMeansQuantizer())
+register_quantizer(MedianCutQuantizer())
+register_quantizer(MiniBatchKMeansQuantizer())
@@ -0,0 +1,155 @@
+import numpy as np
+from typing import Dict, Tuple, Optional
+from utils.lazy_import import lazy_import
+
+cv2 = lazy_import("cv2")
+
+class CompositionMetrics:
+    """
+    构图指标计算
+
+    构造时对"视觉质量、x 方向一阶矩、y 方向一阶矩、有内容像素"四个通道
+    做一次积分图（summed-area table），之后任意矩形区域的统计量都是 O(1) 查询，
+    平衡度、三分法、象限、重心、留白等指标都只基于这一张积分图计算。
+    """
+
+    MASS, MOMENT_X, MOMENT_Y, INK = range(4)
+
+    def __init__(
+        self,
+        gray: np.ndarray,
+        invert: bool = True,
+        max_side: Optional[int] = 512,
+        ink_threshold: int = 16
+    ):
+        """
+        Args:
+            gray: 灰度图 (H, W)
+            invert: True 时以"墨量"(255 - 亮度) 作为视觉质量，适合白底绘画；False 时直接使用亮度
+            max_side: 计算分辨率的最长边，None 表示使用原图
+            ink_threshold: 视为"有内容"的最小墨量
+        """
+        height, width = gray.shape[:2]
+        if max_side and max(height, width) > max_side:
+            scale = max_side / max(height, width)
+            gray = cv2.resize(gray, (max(1, round(width * scale)), max(1, round(height * scale))),
+                              interpolation=cv2.INTER_AREA)
+
+        self.height, self.width = gray.shape[:2]
+
+        brightness = gray.astype(np.float64)
+        ink = 255.0 - brightness
+        mass = ink if invert else brightness
+
+        ys, xs = np.mgrid[0:self.height, 0:self.width]
+        channels = np.stack([
+            mass,
+            mass * (xs + 0.5),
+            mass * (ys + 0.5),
+            (ink > ink_threshold).astype(np.float64)
+        ], axis=-1)
+
+        self._sat = np.zeros((self.height + 1, self.width + 1, 4), dtype=np.float64)
+        self._sat[1:, 1:] = channels.cumsum(axis=0).cumsum(axis=1)
+        self.total = self._sat[-1, -1].copy()
+
+    def region_sum(self, x0: float, y0: float, x1: float, y1: float) -> np.ndarray:
+        """
+        矩形区域内四个通道的和（O(1)）
+
+        Args:
+            x0, y0, x1, y1: 0-1 之间的相对坐标
+
+        Returns:
+            [质量, x 矩, y 矩, 有内容像素数]
+        """
+        c0, r0 = self._to_pixel(x0, self.width), self._to_pixel(y0, self.height)
+        c1, r1 = self._to_pixel(x1, self.width), self._to_pixel(y1, self.height)
+        sat = self._sat
+        return sat[r1, c1] - sat[r0, c1] - sat[r1, c0] + sat[r0, c0]
+
+    def mass(self, x0: float, y0: float, x1: float, y1: float) -> float:
+        """矩形区域内的视觉质量"""
+        return float(self.region_sum(x0, y0, x1, y1)[self.MASS])
+
+    def mass_ratio(self, x0: float, y0: float, x1: float, y1: float) -> float:
+        """矩形区域占总视觉质量的比例"""
+        return self.mass(x0, y0, x1, y1) / max(float(self.total[self.MASS]), 1e-9)
+
+    def balance(self) -> Dict[str, float]:
+        """左右、上下平衡度（0-1）及综合平衡分数（0-100）"""
+        left, right = self.mass(0, 0, 0.5, 1), self.mass(0.5, 0, 1, 1)
+        top, bottom = self.mass(0, 0, 1, 0.5), self.mass(0, 0.5, 1, 1)
+
+        horizontal = 1 - abs(left - right) / max(left + right, 1)
+        vertical = 1 - abs(top - bottom) / max(top + bottom, 1)
+
+        return {
+            "horizontal": horizontal,
+            "vertical": vertical,
+            "score": min((horizontal + vertical) / 2 * 100, 100)
+        }
+
+    def quadrant_mass(self) -> Dict[str, float]:
+        """四个象限各自占总视觉质量的比例"""
+        return {
+            "top_left": self.mass_ratio(0, 0, 0.5, 0.5),
+            "top_right": self.mass_ratio(0.5, 0, 1, 0.5),
+            "bottom_left": self.mass_ratio(0, 0.5, 0.5, 1),
+            "bottom_right": self.mass_ratio(0.5, 0.5, 1, 1)
+        }
+
+    def center_of_mass(self) -> Tuple[float, float]:
+        """视觉重心 (x, y)，0-1 相对坐标；空白画面返回中心"""
+        total_mass = self.total[self.MASS]
+        if total_mass <= 0:
+            return (0.5, 0.5)
+        return (
+            float(self.total[self.MOMENT_X] / total_mass / self.width),
+            float(self.total[self.MOMENT_Y] / total_mass / self.height)
+        )
+
+    def thirds_weight(self, band: float = 1 / 12) -> Dict[str, float]:
+        """
+        三分法权重
+
+        Args:
+            band: 三分线两侧带宽 / 交点窗口半径（相对边长）
+
+        Returns:
+            {"lines": 三分线附近的质量占比, "power_points": 四个交点附近的质量占比}
+        """
+        thirds = (1 / 3, 2 / 3)
+
+        # 竖线带与横线带的并集 = 两者之和 - 交叉区域
+        vertical = sum(self.mass_ratio(t - band, 0, t + band, 1) for t in thirds)
+        horizontal = sum(self.mass_ratio(0, t - band, 1, t + band) for t in thirds)
+        points = sum(
+            self.mass_ratio(tx - band, ty - band, tx + band, ty + band)
+            for tx in thirds for ty in thirds
+        )
+
+        return {"lines": vertical + horizontal - points, "power_points": points}
+
+    def empty_space_ratio(self) -> float:
+        """留白比例（无内容像素占比）"""
+        return 1 - float(self.total[self.INK]) / (self.width * self.height)
+
+    def to_dict(self) -> Dict[str, object]:
+        """汇总所有指标"""
+        balance = self.balance()
+        thirds = self.thirds_weight()
+        return {
+            "balance_score": balance["score"],
+            "horizontal_balance": balance["horizontal"],
+            "vertical_balance": balance["vertical"],
+            "quadrant_mass": self.quadrant_mass(),
+            "center_of_mass": self.center_of_mass(),
+            "thirds_line_weight": thirds["lines"],
+            "thirds_power_point_weight": thirds["power_points"],
+            "empty_space_ratio": self.empty_space_ratio()
+        }
+
+    @staticmethod
+    def _to_pixel(value: float, size: int) -> int:
+        return int(min(max(value, 0.0), 1.0) * size)
@@ -10,12 +10,18 @@ class ConfigLoader:
     @staticmethod
     def get_dashscope_api_key():
         return os.getenv("DASHSCOPE_API_KEY")
+
+    @staticmethod
+    def get_dashscope_base_url():
+        """DashScope 兼容模式接口地址（压测时可指向本地桩服务）"""
+        return os.getenv("DASHSCOPE_BASE_URL", "https://dashscope.aliyuncs.com/compatible-mode/v1")
     
     @staticmethod
     def get_coze_config():
         return {
             "api_token": os.getenv("COZE_API_TOKEN"),
             "bot_id": os.getenv("COZE_BOT_ID"),
+            "base_url": os.getenv("COZE_BASE_URL", "https://api.coze.cn"),
             "workflow_id": os.getenv("COZE_WORKFLOW_ID", "7601786439168229386"),
             "comment_workflow_id": os.getenv("COZE_COMMENT_WORKFLOW_ID", "7601786024813445158"),
             "video_workflow_id": os.getenv("COZE_VIDEO_WORKFLOW_ID", "7601786024813445159")
@@ -25,7 +31,35 @@ class ConfigLoader:
     def get_huoshan_config():
         return {
             "access_key": os.getenv("HUOSHAN_ACCESS_KEY"),
-            "secret_key": os.getenv("HUOSHAN_SECRET_KEY")
+            "secret_key": os.getenv("HUOSHAN_SECRET_KEY"),
+            "base_url": os.getenv("HUOSHAN_BASE_URL", "https://api.volcengine.com/video")
+        }
+    
+    @staticmethod
+    def get_rate_limits():
+        """各服务商的客户端限流：每秒请求数和允许的突发请求数（所有用户共用一个密钥）"""
+        return {
+            "dashscope": {
+                "rate": float(os.getenv("DASHSCOPE_RATE_LIMIT", "5")),
+                "burst": int(os.getenv("DASHSCOPE_RATE_BURST", "10"))
+            },
+            "coze": {
+                "rate": float(os.getenv("COZE_RATE_LIMIT", "2")),
+                "burst": int(os.getenv("COZE_RATE_BURST", "5"))
+            }
+        }
+    
+    @staticmethod
+    def get_session_store_config():
+        """会话存储：画板笔画、当前作品等大对象保存在服务端，而不是 st.session_state"""
+        return {
+            "backend": os.getenv("SESSION_STORE", "sqlite"),
+            "path": os.getenv("SESSION_STORE_PATH", "data/sessions.db"),
+            "max_users": int(os.getenv("SESSION_MAX_USERS", "200")),
+            "idle_seconds": float(os.getenv("SESSION_IDLE_SECONDS", "1800")),
+            "retention_days": float(os.getenv("SESSION_RETENTION_DAYS", "7")),
+            # 地址栏的 ?uid= 是找回会话的唯一凭据，拿到链接的人都能接管该会话，默认关闭
+            "resume_from_url": os.getenv("SESSION_RESUME_FROM_URL", "0").lower() in ("1", "true", "yes")
         }
     
     @staticmethod
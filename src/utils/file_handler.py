@@ -3,9 +3,18 @@ import io
 import base64
 from datetime import datetime
 from pathlib import Path
+from typing import Iterator
 from PIL import Image
 import streamlit as st
+from utils.audio_probe import probe_audio
+from utils.audio_processor import AudioProcessor
+from utils.blob_store import get_blob_store
+from utils.telemetry import instrument_class
 
+# 可在画廊中列出的音频格式
+AUDIO_EXTENSIONS = (".wav", ".mp3", ".m4a")
+
+@instrument_class("file_handler", exclude=("format_file_size", "download_file"))
 class FileHandler:
     """文件处理工具"""
 
@@ -14,13 +23,17 @@ class FileHandler:
         self.artworks_dir = self.base_dir / "artworks"
         self.cache_dir = self.base_dir / "cache"
         self.temp_dir = self.base_dir / "temp"
+        self.blobs_dir = self.base_dir / "blobs"
 
         # 创建必要的目录
         self._create_directories()
 
+        # 内容寻址存储：相同内容只占用一份磁盘空间
+        self.blob_store = get_blob_store(str(self.blobs_dir))
+
     def _create_directories(self):
         """创建必要的目录"""
-        for dir_path in [self.artworks_dir, self.cache_dir, self.temp_dir]:
+        for dir_path in [self.artworks_dir, self.cache_dir, self.temp_dir, self.blobs_dir]:
             dir_path.mkdir(parents=True, exist_ok=True)
 
     def save_image(
@@ -52,9 +65,8 @@ class FileHandler:
             filename = f"{artwork_id}_{timestamp}.png"
             filepath = user_dir / filename
 
-            # 保存文件
-            with open(filepath, 'wb') as f:
-                f.write(image_data)
+            # 保存文件（重复内容只保存一份）
+            self.blob_store.store(image_data, filepath)
 
             return str(filepath)
 
@@ -129,7 +141,8 @@ class FileHandler:
         audio_data: bytes,
         user_id: str,
         artwork_id: str,
-        audio_type: str = "feedback"
+        audio_type: str = "feedback",
+        normalize_loudness: bool = False
     ) -> str:
         """
         保存音频文件
@@ -139,11 +152,15 @@ class FileHandler:
             user_id: 用户ID
             artwork_id: 作品ID
             audio_type: 音频类型 (feedback, music)
+            normalize_loudness: 是否先做响度归一化（仅 WAV）
 
         Returns:
             保存路径
         """
         try:
+            if normalize_loudness and audio_data[:4] == b'RIFF':
+                audio_data = AudioProcessor.normalize_loudness(audio_data)
+
             user_dir = self.artworks_dir / user_id / "audio"
             user_dir.mkdir(parents=True, exist_ok=True)
 
@@ -151,8 +168,7 @@ class FileHandler:
             filename = f"{artwork_id}_{audio_type}_{timestamp}.wav"
             filepath = user_dir / filename
 
-            with open(filepath, 'wb') as f:
-                f.write(audio_data)
+            self.blob_store.store(audio_data, filepath)
 
             return str(filepath)
 
@@ -169,6 +185,43 @@ class FileHandler:
             print(f"音频加载失败: {str(e)}")
             return None
 
+    def get_artwork_audio(self, user_id: str, artwork_id: str = None) -> list:
+        """
+        列出作品的音频文件及其信息（只读取文件头，结果按修改时间缓存）
+
+        Args:
+            user_id: 用户ID
+            artwork_id: 作品ID，None 表示该用户的全部音频
+
+        Returns:
+            [{"path", "artwork_id", "audio_type", "duration", "size", ...}]，按文件名排序
+        """
+        try:
+            audio_dir = self.artworks_dir / user_id / "audio"
+            if not audio_dir.is_dir():
+                return []
+
+            pattern = f"{artwork_id}_*" if artwork_id else "*"
+            results = []
+            for path in sorted(audio_dir.glob(pattern)):
+                if path.suffix.lower() not in AUDIO_EXTENSIONS:
+                    continue
+                info = probe_audio(str(path))
+                # 文件名格式: {artwork_id}_{audio_type}_{timestamp}
+                parts = path.stem.split("_")
+                info.update({
+                    "path": str(path),
+                    "artwork_id": parts[0],
+                    "audio_type": "_".join(parts[1:-2]),
+                    "size": info.get("size", path.stat().st_size)
+                })
+                results.append(info)
+            return results
+
+        except Exception as e:
+            print(f"获取音频列表失败: {str(e)}")
+            return []
+
     def save_json(self, data: dict, user_id: str, filename: str) -> str:
         """保存JSON文件"""
         try:
@@ -197,6 +250,49 @@ class FileHandler:
             print(f"JSON加载失败: {str(e)}")
             return None
 
+    def get_metadata_path(self, image_path) -> Path:
+        """作品元数据路径：artworks/{user_id}/metadata/{artwork_id}.json（保存作品时写入的同一个文件）"""
+        image_path = Path(image_path)
+        artwork_id = image_path.name.split("_")[0]
+        return image_path.parent.parent / "metadata" / f"{artwork_id}.json"
+
+    def load_metadata(self, image_path) -> dict:
+        """读取作品元数据，不存在时返回空字典"""
+        metadata_path = self.get_metadata_path(image_path)
+        if not metadata_path.exists():
+            return {}
+        return self.load_json(str(metadata_path)) or {}
+
+    def merge_metadata(self, image_path, sections: dict) -> str:
+        """
+        把分析结果合并进作品元数据
+
+        按部分逐字段更新，保留元数据中已有的其他部分和字段（如本地计算的指标与模型分析互不覆盖）。
+
+        Args:
+            image_path: 作品图片路径
+            sections: {部分名称: 字段字典}，如 {"color_analysis": {...}}
+
+        Returns:
+            元数据文件路径，失败时返回 None
+        """
+        image_path = Path(image_path)
+        metadata_path = self.get_metadata_path(image_path)
+        user_id = image_path.parent.parent.name
+
+        metadata = self.load_metadata(image_path)
+        metadata.setdefault("artwork_id", metadata_path.stem)
+        metadata.setdefault("user_id", user_id)
+        metadata.setdefault("image_path", str(image_path))
+
+        for section, values in sections.items():
+            if isinstance(values, dict) and isinstance(metadata.get(section), dict):
+                metadata[section] = {**metadata[section], **values}
+            else:
+                metadata[section] = values
+
+        return self.save_json(metadata, user_id, metadata_path.name)
+
     def get_user_artworks(self, user_id: str) -> list:
         """获取用户所有作品"""
         try:
@@ -205,39 +301,77 @@ class FileHandler:
                 return []
 
             images = list(user_dir.glob("*.png"))
-            return sorted(images, key=lambda x: x.stat().st_mtime, reverse=True)
+            return self._newest_first(images)
 
         except Exception as e:
             print(f"获取作品列表失败: {str(e)}")
             return []
 
+    def iter_artwork_paths(self, user_id: str = None, subfolders: tuple = ("original", "uploaded")) -> Iterator[Path]:
+        """
+        逐个产出作品图片路径（不排序、不一次性加载，适合批量处理大量作品）
+
+        Args:
+            user_id: 只遍历指定用户，None 表示所有用户
+            subfolders: 要遍历的子文件夹
+
+        Yields:
+            图片路径
+        """
+        if user_id:
+            user_dirs = [self.artworks_dir / user_id]
+        else:
+            user_dirs = (Path(entry.path) for entry in os.scandir(self.artworks_dir) if entry.is_dir())
+
+        for user_dir in user_dirs:
+            for subfolder in subfolders:
+                folder = user_dir / subfolder
+                if not folder.is_dir():
+                    continue
+                with os.scandir(folder) as entries:
+                    for entry in entries:
+                        if entry.is_file() and entry.name.endswith(".png"):
+                            yield Path(entry.path)
+
     def get_all_artworks(self) -> list:
         """获取所有用户的所有作品"""
         try:
-            all_images = []
-            # 遍历所有用户目录
-            for user_dir in self.artworks_dir.iterdir():
-                if user_dir.is_dir():
-                    original_dir = user_dir / "original"
-                    if original_dir.exists():
-                        all_images.extend(original_dir.glob("*.png"))
-                    # 也检查 uploaded 目录
-                    uploaded_dir = user_dir / "uploaded"
-                    if uploaded_dir.exists():
-                        all_images.extend(uploaded_dir.glob("*.png"))
-            return sorted(all_images, key=lambda x: x.stat().st_mtime, reverse=True)
+            # 遍历所有用户的 original 和 uploaded 目录
+            all_images = list(self.iter_artwork_paths())
+            return self._newest_first(all_images)
         except Exception as e:
             print(f"获取所有作品失败: {str(e)}")
             return []
 
+    def get_created_time(self, filepath) -> float:
+        """作品的保存时间（Unix 时间戳）"""
+        return self.get_created_times([Path(filepath)])[Path(filepath)]
+
+    def get_created_times(self, paths: list) -> dict:
+        """
+        批量获取作品的保存时间
+
+        作品文件是 blob 的硬链接，重复内容的作品共享同一个修改时间，所以优先用存储记录的保存时间；
+        存储中没有记录的历史文件使用文件修改时间。
+        """
+        times = self.blob_store.get_created_times(paths)
+        for path in paths:
+            if path not in times:
+                times[path] = path.stat().st_mtime
+        return times
+
+    def _newest_first(self, paths: list) -> list:
+        times = self.get_created_times(paths)
+        return sorted(paths, key=lambda path: times[path], reverse=True)
+
     def delete_artwork(self, user_id: str, artwork_id: str) -> bool:
         """删除作品"""
         try:
-            import shutil
             artwork_dir = self.artworks_dir / user_id / "original"
 
+            # 通过存储释放引用，最后一个引用删除时才删除实际内容
             for file in artwork_dir.glob(f"{artwork_id}_*"):
-                file.unlink()
+                self.blob_store.release(file)
 
             return True
 
@@ -0,0 +1,81 @@
+import numpy as np
+from typing import Dict, Any, Sequence
+from utils.lazy_import import lazy_import
+
+cv2 = lazy_import("cv2")
+
+# 分析分辨率上限：缩放后再计算，耗时与原图尺寸无关
+DEFAULT_MAX_SIDE = 256
+
+# 候选窗口边长（相对图片边长的比例）
+DEFAULT_WINDOW_FRACTIONS = (0.2, 0.3, 0.4, 0.5)
+
+def detect_focus_region(
+    gray: np.ndarray,
+    max_side: int = DEFAULT_MAX_SIDE,
+    window_fractions: Sequence[float] = DEFAULT_WINDOW_FRACTIONS
+) -> Dict[str, Any]:
+    """
+    多尺度视觉焦点检测
+
+    在缩小后的 float32 灰度图上计算边缘能量，借助积分图以 O(1) 代价求任意窗口的能量和，
+    在多个窗口尺度中选出"能量占比 - 面积占比"最大的区域（边缘最密集的区域），
+    焦点取该区域内的能量重心。
+
+    Args:
+        gray: 灰度图 (H, W)
+        max_side: 分析分辨率的最长边
+        window_fractions: 候选窗口边长比例
+
+    Returns:
+        {"point": (x, y), "bbox": (x0, y0, x1, y1), "score": 0-1}，坐标均为 0-1 相对坐标
+    """
+    height, width = gray.shape[:2]
+    scale = min(1.0, max_side / max(height, width))
+    if scale < 1.0:
+        small = cv2.resize(gray, (max(1, round(width * scale)), max(1, round(height * scale))),
+                           interpolation=cv2.INTER_AREA)
+    else:
+        small = gray
+    small = small.astype(np.float32)
+    h, w = small.shape
+
+    # L1 梯度幅值，避免逐像素开方
+    gx = cv2.Sobel(small, cv2.CV_32F, 1, 0, ksize=3)
+    gy = cv2.Sobel(small, cv2.CV_32F, 0, 1, ksize=3)
+    energy = np.abs(gx) + np.abs(gy)
+
+    sat = cv2.integral(energy, sdepth=cv2.CV_64F)
+    total = sat[-1, -1]
+    if total <= 0:
+        return {"point": (0.5, 0.5), "bbox": (0.0, 0.0, 1.0, 1.0), "score": 0.0}
+
+    best = None
+    for fraction in window_fractions:
+        wh = min(h, max(1, round(h * fraction)))
+        ww = min(w, max(1, round(w * fraction)))
+
+        # 所有窗口位置的能量和（积分图四角相减，一次向量化完成）
+        window_sums = sat[wh:, ww:] - sat[:-wh, ww:] - sat[wh:, :-ww] + sat[:-wh, :-ww]
+        y, x = np.unravel_index(np.argmax(window_sums), window_sums.shape)
+
+        score = window_sums[y, x] / total - (wh * ww) / (h * w)
+        if best is None or score > best[0]:
+            best = (score, int(x), int(y), ww, wh)
+
+    score, x0, y0, ww, wh = best
+
+    # 焦点取窗口内的能量重心
+    region = energy[y0:y0 + wh, x0:x0 + ww]
+    region_total = float(region.sum())
+    if region_total > 0:
+        cy = float((region.sum(axis=1) * np.arange(wh)).sum()) / region_total + 0.5
+        cx = float((region.sum(axis=0) * np.arange(ww)).sum()) / region_total + 0.5
+    else:
+        cy, cx = wh / 2, ww / 2
+
+    return {
+        "point": ((x0 + cx) / w, (y0 + cy) / h),
+        "bbox": (x0 / w, y0 / h, (x0 + ww) / w, (y0 + wh) / h),
+        "score": float(max(score, 0.0))
+    }
@@ -1,23 +1,59 @@
-import cv2
 import numpy as np
-from PIL import Image, ImageDraw, ImageFilter
+from PIL import Image, ImageFilter
 import io
 from typing import Tuple, List
-
+from utils.color_names import get_color_name_table
+from utils.color_quantizer import quantize_colors
+from utils.composition_metrics import CompositionMetrics
+from utils.focus_detector import detect_focus_region, DEFAULT_MAX_SIDE as FOCUS_MAX_SIDE
+from utils.tiled_effects import apply_effect, available_effects, downscale_for_preview
+from utils.telemetry import instrument_class
+from utils.watermark import watermark_bytes, watermark_batch
+from utils.lazy_import import lazy_import
+
+# OpenCV 导入约需数百毫秒，只在真正处理图片时加载
+cv2 = lazy_import("cv2")
+
+@instrument_class("image")
 class ImageProcessor:
     """图像处理工具"""
 
     @staticmethod
-    def extract_dominant_colors(image_data: bytes, num_colors: int = 5) -> List[Tuple[int, int, int]]:
+    def extract_dominant_colors(
+        image_data: bytes,
+        num_colors: int = 5,
+        method: str = "median_cut"
+    ) -> List[Tuple[int, int, int]]:
         """
         提取图片的主要颜色
 
         Args:
             image_data: 图片字节数据
             num_colors: 要提取的颜色数量
+            method: 颜色量化算法 (median_cut, minibatch_kmeans, kmeans)
+
+        Returns:
+            颜色列表 (RGB元组)，按像素占比从高到低排序
+        """
+        weighted = ImageProcessor.extract_weighted_colors(image_data, num_colors, method)
+        return [color for color, _ in weighted] or [(128, 128, 128)]  # 默认灰色
+
+    @staticmethod
+    def extract_weighted_colors(
+        image_data: bytes,
+        num_colors: int = 5,
+        method: str = "median_cut"
+    ) -> List[Tuple[Tuple[int, int, int], float]]:
+        """
+        提取图片的主要颜色及其像素占比
+
+        Args:
+            image_data: 图片字节数据
+            num_colors: 要提取的颜色数量
+            method: 颜色量化算法 (median_cut, minibatch_kmeans, kmeans)
 
         Returns:
-            颜色列表 (RGB元组)
+            [(RGB元组, 占比)]，占比之和为 1
         """
         try:
             # 读取图片
@@ -28,21 +64,13 @@ class ImageProcessor:
             image.thumbnail((150, 150))
 
             # 将图片转换为numpy数组
-            img_array = np.array(image)
-            pixels = img_array.reshape((-1, 3))
-
-            # 使用K-means聚类提取主要颜色
-            pixels_float = np.float32(pixels)
-            criteria = (cv2.TERM_CRITERIA_EPS + cv2.TERM_CRITERIA_MAX_ITER, 10, 1.0)
-            _, labels, centers = cv2.kmeans(pixels_float, num_colors, None, criteria, 10, cv2.KMEANS_RANDOM_CENTERS)
+            pixels = np.array(image).reshape((-1, 3))
 
-            # 转换颜色为RGB
-            colors = [(int(c[0]), int(c[1]), int(c[2])) for c in centers]
-            return colors
+            return quantize_colors(pixels, num_colors, method)
 
         except Exception as e:
             print(f"提取颜色失败: {str(e)}")
-            return [(128, 128, 128)]  # 返回默认灰色
+            return [((128, 128, 128), 1.0)]  # 返回默认灰色
 
     @staticmethod
     def detect_focus_point(image_data: bytes) -> Tuple[float, float]:
@@ -55,27 +83,30 @@ class ImageProcessor:
         Returns:
             焦点坐标 (x, y) 0-1之间的相对坐标
         """
-        try:
-            image = Image.open(io.BytesIO(image_data))
-            image = image.convert('L')  # 转为灰度图
+        return tuple(ImageProcessor.detect_focus_region(image_data)["point"])
 
-            img_array = np.array(image)
+    @staticmethod
+    def detect_focus_region(image_data: bytes) -> dict:
+        """
+        检测图片的视觉焦点区域
 
-            # 使用Sobel边缘检测找出焦点
-            sx = cv2.Sobel(img_array, cv2.CV_64F, 1, 0, ksize=3)
-            sy = cv2.Sobel(img_array, cv2.CV_64F, 0, 1, ksize=3)
-            edge_magnitude = np.sqrt(sx**2 + sy**2)
+        Args:
+            image_data: 图片字节数据
 
-            # 找出最大边缘强度的位置
-            y, x = np.unravel_index(np.argmax(edge_magnitude), edge_magnitude.shape)
+        Returns:
+            {"point": (x, y), "bbox": (x0, y0, x1, y1), "score": 0-1}，坐标为0-1之间的相对坐标
+        """
+        try:
+            image = Image.open(io.BytesIO(image_data))
+            # JPEG 可直接以缩小尺寸解码
+            image.draft('L', (FOCUS_MAX_SIDE * 2, FOCUS_MAX_SIDE * 2))
+            image = image.convert('L')  # 转为灰度图
 
-            # 转换为相对坐标
-            height, width = img_array.shape
-            return (x / width, y / height)
+            return detect_focus_region(np.array(image), max_side=FOCUS_MAX_SIDE)
 
         except Exception as e:
             print(f"焦点检测失败: {str(e)}")
-            return (0.5, 0.5)  # 返回中心点
+            return {"point": (0.5, 0.5), "bbox": (0.0, 0.0, 1.0, 1.0), "score": 0.0}  # 返回中心点
 
     @staticmethod
     def calculate_balance_score(image_data: bytes) -> float:
@@ -92,26 +123,34 @@ class ImageProcessor:
             image = Image.open(io.BytesIO(image_data))
             image = image.convert('L')
 
-            img_array = np.array(image)
-            height, width = img_array.shape
+            # 按亮度分布计算左右和上下的平衡度
+            metrics = CompositionMetrics(np.array(image), invert=False)
+            return metrics.balance()["score"]
+
+        except Exception as e:
+            print(f"平衡分数计算失败: {str(e)}")
+            return 50
 
-            # 计算左右和上下的色彩分布
-            left_half = img_array[:, :width//2].sum()
-            right_half = img_array[:, width//2:].sum()
-            top_half = img_array[:height//2, :].sum()
-            bottom_half = img_array[height//2:, :].sum()
+    @staticmethod
+    def analyze_composition(image_data: bytes) -> dict:
+        """
+        计算构图指标（平衡度、三分法权重、象限质量、视觉重心、留白比例）
 
-            # 计算平衡度
-            horizontal_balance = 1 - abs(left_half - right_half) / max(left_half + right_half, 1)
-            vertical_balance = 1 - abs(top_half - bottom_half) / max(top_half + bottom_half, 1)
+        Args:
+            image_data: 图片字节数据
 
-            balance_score = (horizontal_balance + vertical_balance) / 2 * 100
+        Returns:
+            指标字典，视觉质量按"墨量"（越深越重）计算
+        """
+        try:
+            image = Image.open(io.BytesIO(image_data))
+            image = image.convert('L')
 
-            return min(balance_score, 100)
+            return CompositionMetrics(np.array(image)).to_dict()
 
         except Exception as e:
-            print(f"平衡分数计算失败: {str(e)}")
-            return 50
+            print(f"构图分析失败: {str(e)}")
+            return {}
 
     @staticmethod
     def create_thumbnail(image_data: bytes, size: Tuple[int, int] = (200, 200)) -> bytes:
@@ -150,41 +189,42 @@ class ImageProcessor:
             添加水印后的图片字节数据
         """
         try:
-            image = Image.open(io.BytesIO(image_data))
-
-            # 创建透明图层用于水印
-            watermark = Image.new('RGBA', image.size, (255, 255, 255, 0))
-            draw = ImageDraw.Draw(watermark)
-
-            # 在右下角添加水印
-            width, height = image.size
-            text_x = width - 150
-            text_y = height - 40
-
-            draw.text((text_x, text_y), text, fill=(200, 200, 200, 100))
-
-            # 合并图片
-            if image.mode != 'RGBA':
-                image = image.convert('RGBA')
-
-            watermarked = Image.alpha_composite(image, watermark)
-
-            output = io.BytesIO()
-            watermarked.save(output, format='PNG')
-            return output.getvalue()
+            # 在右下角合成缓存的文字贴图，不创建整幅透明图层
+            return watermark_bytes(image_data, text)
 
         except Exception as e:
             print(f"水印添加失败: {str(e)}")
             return image_data
 
     @staticmethod
-    def apply_artistic_effect(image_data: bytes, effect_type: str = "oil_painting") -> bytes:
+    def add_watermark_batch(images: List[bytes], text: str = "DreamWeaver") -> List[bytes]:
+        """
+        批量添加水印（导出多张作品时使用）
+
+        Args:
+            images: 图片字节数据列表
+            text: 水印文本
+
+        Returns:
+            添加水印后的图片字节数据列表，顺序与输入一致
+        """
+        return watermark_batch(images, text)
+
+    @staticmethod
+    def apply_artistic_effect(
+        image_data: bytes,
+        effect_type: str = "oil_painting",
+        tiled: bool = None,
+        preview: bool = False
+    ) -> bytes:
         """
         应用艺术效果
 
         Args:
             image_data: 图片字节数据
-            effect_type: 效果类型 (oil_painting, cartoon, pencil_sketch)
+            effect_type: 效果类型 (oil_painting, cartoon, pencil_sketch, watercolor, crayon)
+            tiled: 是否分块多线程处理，None 表示大图自动启用
+            preview: 是否在缩小的副本上快速生成预览
 
         Returns:
             处理后的图片字节数据
@@ -194,23 +234,11 @@ class ImageProcessor:
             nparr = np.frombuffer(image_data, np.uint8)
             img = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
 
-            if effect_type == "oil_painting":
-                # 油画效果
-                result = cv2.xphoto.oilPainting(img, 7, 1)
-
-            elif effect_type == "cartoon":
-                # 卡通效果
-                gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
-                edges = cv2.Canny(gray, 100, 200)
-                result = cv2.bitwise_and(img, img, mask=edges)
-
-            elif effect_type == "pencil_sketch":
-                # 铅笔素描效果
-                gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
-                inv_gray = cv2.bitwise_not(gray)
-                result = cv2.GaussianBlur(inv_gray, (21, 21), 0)
-                result = cv2.divide(gray, 255 - result, scale=256)
+            if preview:
+                img = downscale_for_preview(img)
 
+            if effect_type in available_effects():
+                result = apply_effect(img, effect_type, tiled=tiled)
             else:
                 result = img
 
@@ -236,25 +264,36 @@ class ImageProcessor:
         try:
             image = Image.open(io.BytesIO(image_data))
             image = image.convert('L')
-            img_array = np.array(image)
-
-            # 简单的场景检测
-            mean_brightness = np.mean(img_array)
-            std_brightness = np.std(img_array)
-
-            if std_brightness < 20:
-                return "uniform"  # 单调场景
-            elif mean_brightness > 200:
-                return "bright"  # 明亮场景
-            elif mean_brightness < 50:
-                return "dark"  # 暗色场景
-            else:
-                return "normal"  # 正常场景
+            return ImageProcessor.classify_scene(np.array(image))
 
         except Exception as e:
             print(f"场景检测失败: {str(e)}")
             return "unknown"
 
+    @staticmethod
+    def classify_scene(gray: np.ndarray) -> str:
+        """
+        按亮度分布判断场景类型（已解码的灰度图）
+
+        Args:
+            gray: 灰度图数组
+
+        Returns:
+            场景类型字符串
+        """
+        # 简单的场景检测
+        mean_brightness = np.mean(gray)
+        std_brightness = np.std(gray)
+
+        if std_brightness < 20:
+            return "uniform"  # 单调场景
+        elif mean_brightness > 200:
+            return "bright"  # 明亮场景
+        elif mean_brightness < 50:
+            return "dark"  # 暗色场景
+        else:
+            return "normal"  # 正常场景
+
     @staticmethod
     def generate_palette(image_data: bytes, num_colors: int = 8) -> dict:
         """
@@ -269,34 +308,32 @@ class ImageProcessor:
         """
         try:
             colors = ImageProcessor.extract_dominant_colors(image_data, num_colors)
-
-            # 颜色名称映射
-            color_names = {
-                (255, 0, 0): "红色",
-                (0, 255, 0): "绿色",
-                (0, 0, 255): "蓝色",
-                (255, 255, 0): "黄色",
-                (255, 0, 255): "紫色",
-                (0, 255, 255): "青色",
-                (255, 165, 0): "橙色",
-                (128, 0, 0): "深红",
-                (0, 128, 0): "深绿",
-                (0, 0, 128): "深蓝"
-            }
-
-            palette = []
-            for color in colors:
-                # 找最接近的颜色名称
-                nearest_color = min(color_names.keys(),
-                                  key=lambda x: sum((a-b)**2 for a, b in zip(color, x))**0.5)
-                palette.append({
-                    "rgb": color,
-                    "hex": "#{:02x}{:02x}{:02x}".format(*color),
-                    "name": color_names.get(nearest_color, "自定义色")
-                })
-
-            return {"palette": palette, "dominant_color": palette[0] if palette else None}
+            return ImageProcessor.palette_from_colors(colors)
 
         except Exception as e:
             print(f"调色板生成失败: {str(e)}")
             return {"palette": [], "dominant_color": None}
+
+    @staticmethod
+    def palette_from_colors(colors: List[Tuple[int, int, int]]) -> dict:
+        """
+        为已提取的颜色生成调色板
+
+        Args:
+            colors: RGB元组列表，按占比从高到低排序
+
+        Returns:
+            包含颜色和名称的字典
+        """
+        # 在 Lab 空间中批量查找最接近的颜色名称（名称表进程内只构建一次）
+        names = get_color_name_table().nearest(colors)
+
+        palette = []
+        for color, name in zip(colors, names):
+            palette.append({
+                "rgb": color,
+                "hex": "#{:02x}{:02x}{:02x}".format(*color),
+                "name": name
+            })
+
+        return {"palette": palette, "dominant_color": palette[0] if palette else None}
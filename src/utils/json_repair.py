@@ -0,0 +1,193 @@
+import json
+from typing import Any, Dict, Iterable, List, Optional
+
+# 截断修复时最多尝试的截断位置数（从最靠后的开始）
+MAX_REPAIR_ATTEMPTS = 64
+
+_CLOSERS = {"{": "}", "[": "]"}
+
+class IncrementalJSONParser:
+    """
+    容错的增量 JSON 解析器，用于大模型返回的 JSON
+
+    可以分块 feed（流式响应边收边解析），随时用 value() 取得目前能解析出的最完整结果。
+    能处理的常见问题：
+    - 前后的说明文字和 ```json 代码块标记（从第一个 { 或 [ 开始，根对象结束后忽略其余内容；
+      根对象无法解析且修复不出内容时，视为说明文字里的括号，从下一个 { 或 [ 重新开始）
+    - 对象/数组末尾多余的逗号
+    - 输出被截断：补齐括号，丢弃最后一个不完整的键值对或元素
+    - 字符串中未转义的换行
+    """
+
+    def __init__(self, expect: Optional[str] = "{"):
+        """
+        Args:
+            expect: 根节点类型，"{" 或 "["；None 表示取最先出现的一种
+        """
+        self.expect = expect
+        # 被放弃的根节点修复出的结果，后面没有能解析的根节点时使用
+        self._fallback: Any = None
+        self._reset()
+
+    def _reset(self) -> None:
+        self.started = False
+        self.done = False
+        self._out: List[str] = []
+        self._stack: List[str] = []
+        self._in_string = False
+        self._escape = False
+        # 可以安全截断的位置：(已输出长度, 当时未闭合的括号)
+        self._cuts: List[tuple] = []
+        # 根节点开始后收到的原文，放弃该根节点时从其中重新扫描
+        self._source: List[str] = []
+        self._result: Any = None
+
+    def feed(self, chunk: str) -> "IncrementalJSONParser":
+        """追加一段文本（只扫描新增部分）"""
+        while chunk:
+            chunk = self._scan(chunk)
+        return self
+
+    def _scan(self, chunk: str) -> str:
+        """扫描一段文本；放弃当前根节点时返回需要重新扫描的文本"""
+        for i, char in enumerate(chunk):
+            if self.done:
+                break
+            if not self.started:
+                if char in _CLOSERS and (self.expect is None or char == self.expect):
+                    self.started = True
+                    self._source.append(char)
+                    self._open(char)
+                continue
+
+            self._source.append(char)
+            if self._in_string:
+                self._out.append(char)
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+                continue
+
+            if char == '"':
+                self._in_string = True
+                self._out.append(char)
+            elif char in _CLOSERS:
+                self._open(char)
+            elif char in "}]":
+                self._strip_trailing_comma()
+                self._out.append(_CLOSERS[self._stack.pop()] if self._stack else char)
+                if not self._stack:
+                    self.done = True
+                    if not self._finish_root():
+                        rest = "".join(self._source[1:]) + chunk[i + 1:]
+                        self._reset()
+                        return rest
+            elif char == ",":
+                self._strip_trailing_comma()
+                self._cuts.append((len(self._out), tuple(self._stack)))
+                self._out.append(char)
+            else:
+                self._out.append(char)
+        return ""
+
+    def _finish_root(self) -> bool:
+        """根节点结束时解析；无法解析且修复不出内容（如 "Note {x}"）时返回 False"""
+        text = "".join(self._out)
+        try:
+            self._result = json.loads(text, strict=False)
+            return True
+        except ValueError:
+            pass
+        salvaged = self._first_parsed(self._cut_candidates(text))
+        if salvaged:
+            self._result = salvaged
+            return True
+        if self._fallback is None:
+            self._fallback = salvaged
+        return False
+
+    def _open(self, char: str) -> None:
+        self._out.append(char)
+        self._stack.append(char)
+        self._cuts.append((len(self._out), tuple(self._stack)))
+
+    def _strip_trailing_comma(self) -> None:
+        while self._out and self._out[-1] in " \t\r\n":
+            self._out.pop()
+        if self._out and self._out[-1] == ",":
+            self._out.pop()
+
+    @staticmethod
+    def _close(text: str, stack: Iterable[str]) -> str:
+        text = text.rstrip().rstrip(",")
+        return text + "".join(_CLOSERS[opener] for opener in reversed(tuple(stack)))
+
+    @staticmethod
+    def _first_parsed(candidates: Iterable[str]) -> Any:
+        for candidate in candidates:
+            try:
+                return json.loads(candidate, strict=False)
+            except ValueError:
+                continue
+        return None
+
+    def _cut_candidates(self, text: str) -> Iterable[str]:
+        for length, stack in reversed(self._cuts[-MAX_REPAIR_ATTEMPTS:]):
+            yield self._close(text[:length], stack)
+
+    def candidates(self) -> Iterable[str]:
+        """按完整程度从高到低给出可尝试解析的文本"""
+        text = "".join(self._out)
+        if self.done:
+            yield text
+        elif not self._in_string:
+            yield self._close(text, self._stack)
+        yield from self._cut_candidates(text)
+
+    def value(self) -> Any:
+        """目前能解析出的最完整结果，完全无法解析时返回 None"""
+        if self.done:
+            return self._result
+        if self.started:
+            parsed = self._first_parsed(self.candidates())
+            if parsed is not None:
+                return parsed
+        return self._fallback
+
+def extract_json(text: str, expect: Optional[str] = "{") -> Any:
+    """
+    从大模型的回复中提取 JSON（容错，见 IncrementalJSONParser）
+
+    Args:
+        text: 模型回复
+        expect: 根节点类型，"{" 或 "["；None 表示不限
+
+    Returns:
+        解析结果，无法解析时返回 None
+    """
+    if not text:
+        return None
+    return IncrementalJSONParser(expect).feed(text).value()
+
+def find_incomplete_sections(data: Any, schema: Dict[str, Iterable[str]]) -> List[str]:
+    """
+    按结构检查结果，返回缺失或不完整的部分
+
+    Args:
+        data: 解析出的字典
+        schema: {部分名称: 必须包含的字段}
+
+    Returns:
+        缺失、不是字典或缺少必需字段的部分名称（保持 schema 中的顺序）
+    """
+    if not isinstance(data, dict):
+        return list(schema)
+    incomplete = []
+    for section, fields in schema.items():
+        value = data.get(section)
+        if not isinstance(value, dict) or any(field not in value for field in fields):
+            incomplete.append(section)
+    return incomplete
@@ -0,0 +1,79 @@
+import sys
+import importlib
+import importlib.util
+import threading
+from types import ModuleType
+
+class LazyModule(ModuleType):
+    """
+    模块占位对象：第一次访问属性时才真正导入
+
+    用法与普通模块相同（cv2.resize(...)），导入后访问过的属性会缓存在占位对象上，
+    之后的访问不再经过 __getattr__。
+    """
+
+    def __init__(self, name: str):
+        super().__init__(name)
+        self.__dict__["_lazy_module"] = None
+        self.__dict__["_lazy_lock"] = threading.Lock()
+
+    def _load(self) -> ModuleType:
+        module = self.__dict__["_lazy_module"]
+        if module is None:
+            with self.__dict__["_lazy_lock"]:
+                module = self.__dict__["_lazy_module"]
+                if module is None:
+                    module = importlib.import_module(self.__name__)
+                    self.__dict__["_lazy_module"] = module
+        return module
+
+    def __getattr__(self, attr: str):
+        value = getattr(self._load(), attr)
+        self.__dict__[attr] = value
+        return value
+
+    def __dir__(self):
+        return dir(self._load())
+
+    def __repr__(self) -> str:
+        state = "loaded" if self.__dict__["_lazy_module"] is not None else "not loaded"
+        return f"<lazy module '{self.__name__}' ({state})>"
+
+def lazy_import(name: str) -> ModuleType:
+    """
+    延迟导入模块
+
+    已导入的模块直接返回；否则返回占位对象，第一次访问属性时才导入。
+    用于 cv2、scipy.signal、cozepy 等导入耗时长、但很多页面根本用不到的依赖。
+
+    Args:
+        name: 模块名，如 "cv2"、"scipy.signal"
+
+    Returns:
+        模块或占位对象
+    """
+    module = sys.modules.get(name)
+    if module is not None:
+        return module
+    return LazyModule(name)
+
+def is_available(name: str) -> bool:
+    """模块是否已安装（只查找，不导入）"""
+    if name in sys.modules:
+        return True
+    try:
+        return importlib.util.find_spec(name) is not None
+    except (ImportError, ValueError):
+        return False
+
+def is_loaded(module: ModuleType) -> bool:
+    """lazy_import 返回的模块是否已经真正导入"""
+    if isinstance(module, LazyModule):
+        return module.__dict__["_lazy_module"] is not None
+    return True
+
+def preload(module: ModuleType) -> ModuleType:
+    """立即完成 lazy_import 返回的模块的导入（用于后台预热），返回真正的模块"""
+    if isinstance(module, LazyModule):
+        return module._load()
+    return module
@@ -0,0 +1,278 @@
+import numpy as np
+from functools import lru_cache
+from typing import Dict, Optional
+from utils.lazy_import import lazy_import
+
+# scipy.signal / scipy.ndimage 导入约需 0.5 秒以上，只在处理音频时加载
+ndimage = lazy_import("scipy.ndimage")
+signal = lazy_import("scipy.signal")
+
+# 默认目标响度：移动端/网页播放常用 -16 LUFS，真峰值不超过 -1 dBTP
+DEFAULT_TARGET_LUFS = -16.0
+DEFAULT_TRUE_PEAK_DB = -1.0
+
+# 每次处理的帧数，所有临时数组的大小都与它成正比
+DEFAULT_BLOCK_FRAMES = 65536
+
+# ITU-R BS.1770 门限
+ABSOLUTE_GATE_LUFS = -70.0
+RELATIVE_GATE_LU = -10.0
+
+# 真峰值检测的过采样倍数
+OVERSAMPLE = 4
+
+# 限幅器前瞻/平滑时长（秒）
+LIMITER_LOOKAHEAD = 0.005
+
+@lru_cache(maxsize=8)
+def k_weighting_sos(sample_rate: int) -> np.ndarray:
+    """
+    K 计权滤波器（高频搁架 + 高通），按采样率设计，返回二阶节系数
+
+    在 48kHz 下与 BS.1770 给出的系数一致，其他采样率用同样的模拟原型重新设计。
+    """
+    # 第一级：约 +4dB 的高频搁架，模拟头部的声学影响
+    gain_db, q, fc = 3.999843853973347, 0.7071752369554196, 1681.974450955533
+    k = np.tan(np.pi * fc / sample_rate)
+    vh = 10 ** (gain_db / 20)
+    vb = vh ** 0.4996667741545416
+    shelf = np.array([
+        vh + vb * k / q + k * k, 2 * (k * k - vh), vh - vb * k / q + k * k,
+        1 + k / q + k * k, 2 * (k * k - 1), 1 - k / q + k * k
+    ])
+
+    # 第二级：约 38Hz 的高通（RLB 计权）
+    q, fc = 0.5003270373238773, 38.13547087602444
+    k = np.tan(np.pi * fc / sample_rate)
+    highpass = np.array([
+        1.0, -2.0, 1.0,
+        1 + k / q + k * k, 2 * (k * k - 1), 1 - k / q + k * k
+    ])
+    # BS.1770 的高通分子固定为 [1, -2, 1]，先乘 a0 抵消下面的归一化
+    highpass[:3] *= highpass[3]
+
+    sos = np.stack([shelf, highpass])
+    sos[:, :3] /= sos[:, 3:4]
+    sos[:, 3:] /= sos[:, 3:4]
+    return sos
+
+def channel_weights(num_channels: int) -> np.ndarray:
+    """声道权重：5.1 等环绕声的后置声道为 1.41，其余为 1"""
+    weights = np.ones(num_channels)
+    if num_channels >= 5:
+        weights[3:5] = 1.41
+    return weights
+
+class LoudnessMeter:
+    """
+    流式积分响度（LUFS）测量
+
+    音频可分多次送入 process：K 计权滤波器的状态在块间延续，
+    每 100ms 只保存一个能量值，最后按 400ms 块、75% 重叠做绝对门限和相对门限。
+    """
+
+    def __init__(self, sample_rate: int, num_channels: int = 1):
+        self.sample_rate = sample_rate
+        self.num_channels = num_channels
+        self.step = max(1, sample_rate // 10)
+
+        self._sos = k_weighting_sos(sample_rate)
+        self._zi = np.zeros((self._sos.shape[0], 2, num_channels))
+        self._energies = []
+        self._tail_energy = np.zeros(num_channels)
+        self._tail_frames = 0
+
+    def process(self, block: np.ndarray) -> None:
+        """
+        送入一段音频
+
+        Args:
+            block: (帧数, 声道数) 浮点样本
+        """
+        if len(block) == 0:
+            return
+
+        filtered, self._zi = signal.sosfilt(self._sos, block, axis=0, zi=self._zi)
+        squared = filtered * filtered
+
+        # 补齐上一块遗留的不满 100ms 的部分
+        position = 0
+        if self._tail_frames:
+            need = self.step - self._tail_frames
+            self._tail_energy += squared[:need].sum(axis=0)
+            self._tail_frames += min(need, len(squared))
+            position = need
+            if self._tail_frames < self.step:
+                return
+            self._energies.append(self._tail_energy)
+            self._tail_energy, self._tail_frames = np.zeros(self.num_channels), 0
+
+        usable = (len(squared) - position) // self.step * self.step
+        if usable:
+            steps = squared[position:position + usable].reshape(-1, self.step, self.num_channels)
+            self._energies.extend(steps.sum(axis=1))
+
+        rest = squared[position + usable:]
+        if len(rest):
+            self._tail_energy = rest.sum(axis=0)
+            self._tail_frames = len(rest)
+
+    def integrated_loudness(self) -> float:
+        """积分响度（LUFS），静音返回 -inf"""
+        weights = channel_weights(self.num_channels)
+
+        energies = np.array(self._energies).reshape(-1, self.num_channels)
+        if len(energies) < 4:
+            # 不足一个 400ms 块时直接使用整段能量
+            total = energies.sum(axis=0) + self._tail_energy
+            frames = len(energies) * self.step + self._tail_frames
+            if frames == 0:
+                return float('-inf')
+            return self._to_lufs((weights * total / frames).sum())
+
+        # 400ms 块 = 连续 4 个 100ms 能量之和
+        cumulative = np.vstack([np.zeros(self.num_channels), np.cumsum(energies, axis=0)])
+        blocks = (cumulative[4:] - cumulative[:-4]) / (4 * self.step)
+        block_power = (blocks * weights).sum(axis=1)
+        with np.errstate(divide='ignore'):
+            block_loudness = -0.691 + 10 * np.log10(block_power)
+
+        gated = block_power[block_loudness > ABSOLUTE_GATE_LUFS]
+        if len(gated) == 0:
+            return float('-inf')
+
+        relative_gate = self._to_lufs(gated.mean()) + RELATIVE_GATE_LU
+        gated = block_power[(block_loudness > ABSOLUTE_GATE_LUFS) & (block_loudness > relative_gate)]
+        return self._to_lufs(gated.mean())
+
+    @staticmethod
+    def _to_lufs(power: float) -> float:
+        return float(-0.691 + 10 * np.log10(power)) if power > 0 else float('-inf')
+
+def measure_loudness(samples: np.ndarray, sample_rate: int, block_frames: int = DEFAULT_BLOCK_FRAMES) -> float:
+    """
+    测量积分响度
+
+    Args:
+        samples: (帧数, 声道数) 浮点样本，满幅为 1.0
+        sample_rate: 采样率
+        block_frames: 每块帧数
+
+    Returns:
+        LUFS
+    """
+    if samples.ndim == 1:
+        samples = samples[:, None]
+
+    meter = LoudnessMeter(sample_rate, samples.shape[1])
+    for start in range(0, len(samples), block_frames):
+        meter.process(samples[start:start + block_frames])
+    return meter.integrated_loudness()
+
+def _sample_true_peaks(block: np.ndarray) -> np.ndarray:
+    """每个原始样本附近（4 倍过采样）所有声道的最大绝对值"""
+    oversampled = signal.resample_poly(block, OVERSAMPLE, 1, axis=0)
+    peaks = np.abs(oversampled).reshape(len(block), OVERSAMPLE, -1).max(axis=(1, 2))
+    return np.maximum(peaks, np.abs(block).max(axis=1))
+
+def true_peak(samples: np.ndarray, block_frames: int = DEFAULT_BLOCK_FRAMES) -> float:
+    """
+    真峰值（dBTP），按 4 倍过采样估计样本间峰值
+
+    Args:
+        samples: (帧数, 声道数) 浮点样本
+        block_frames: 每块帧数
+    """
+    if samples.ndim == 1:
+        samples = samples[:, None]
+
+    # 每块两侧多取一点上下文，避免插值滤波器在块边界处失真
+    context = 32
+    peak = 0.0
+    for start in range(0, len(samples), block_frames):
+        stop = min(start + block_frames, len(samples))
+        left, right = min(context, start), min(context, len(samples) - stop)
+        peaks = _sample_true_peaks(samples[start - left:stop + right])
+        peak = max(peak, float(peaks[left:left + stop - start].max()))
+
+    return 20 * np.log10(peak) if peak > 0 else float('-inf')
+
+def limit_true_peak(
+    samples: np.ndarray,
+    sample_rate: int,
+    ceiling_db: float = DEFAULT_TRUE_PEAK_DB,
+    block_frames: int = DEFAULT_BLOCK_FRAMES
+) -> int:
+    """
+    真峰值限幅（就地修改）
+
+    对每个样本计算不超过上限所需的增益，先做前瞻窗口内的最小值滤波，
+    再做同样长度的平滑，得到的增益包络在每个峰值处都不大于所需增益，且没有突变。
+
+    Args:
+        samples: (帧数, 声道数) float32 样本，会被修改
+        sample_rate: 采样率
+        ceiling_db: 真峰值上限（dBTP）
+        block_frames: 每块帧数
+
+    Returns:
+        被压低的帧数
+    """
+    ceiling = 10 ** (ceiling_db / 20)
+    window = max(1, int(LIMITER_LOOKAHEAD * sample_rate))
+    context = 2 * window + 32
+    limited = 0
+
+    for start in range(0, len(samples), block_frames):
+        stop = min(start + block_frames, len(samples))
+        left, right = min(context, start), min(context, len(samples) - stop)
+        segment = samples[start - left:stop + right]
+
+        peaks = _sample_true_peaks(segment)
+        if peaks.max() <= ceiling:
+            continue
+
+        gain = np.minimum(1.0, ceiling / np.maximum(peaks, 1e-12))
+        gain = ndimage.minimum_filter1d(gain, size=2 * window + 1)
+        gain = ndimage.uniform_filter1d(gain, size=window | 1)
+
+        gain = gain[left:left + stop - start].astype(np.float32)
+        limited += int((gain < 1.0).sum())
+        samples[start:stop] *= gain[:, None]
+
+    return limited
+
+def normalize_loudness(
+    samples: np.ndarray,
+    sample_rate: int,
+    target_lufs: float = DEFAULT_TARGET_LUFS,
+    true_peak_db: Optional[float] = DEFAULT_TRUE_PEAK_DB,
+    block_frames: int = DEFAULT_BLOCK_FRAMES
+) -> Dict[str, float]:
+    """
+    响度归一化（就地修改）：测量积分响度 -> 整体增益 -> 真峰值限幅
+
+    Args:
+        samples: (帧数, 声道数) float32 样本，会被修改
+        sample_rate: 采样率
+        target_lufs: 目标响度
+        true_peak_db: 真峰值上限，None 表示不限幅
+        block_frames: 每块帧数
+
+    Returns:
+        {"input_lufs", "gain_db", "limited_frames"}
+    """
+    input_lufs = measure_loudness(samples, sample_rate, block_frames)
+    if not np.isfinite(input_lufs):
+        return {"input_lufs": input_lufs, "gain_db": 0.0, "limited_frames": 0}
+
+    gain_db = target_lufs - input_lufs
+    gain = np.float32(10 ** (gain_db / 20))
+    for start in range(0, len(samples), block_frames):
+        samples[start:start + block_frames] *= gain
+
+    limited = 0
+    if true_peak_db is not None:
+        limited = limit_true_peak(samples, sample_rate, true_peak_db, block_frames)
+
+    return {"input_lufs": input_lufs, "gain_db": gain_db, "limited_frames": limited}
@@ -0,0 +1,59 @@
+import os
+import mmap
+from contextlib import contextmanager
+from typing import Iterator, Optional
+import numpy as np
+from utils.lazy_import import lazy_import
+
+cv2 = lazy_import("cv2")
+
+@contextmanager
+def open_mapped(filepath: str) -> Iterator[memoryview]:
+    """
+    以内存映射方式只读打开文件（零拷贝）
+
+    返回的 memoryview 可直接传给 hashlib、np.frombuffer、cv2.imdecode 等，
+    仅在 with 块内有效；需要保留数据时请自行复制。
+
+    Args:
+        filepath: 文件路径
+
+    Yields:
+        文件内容的只读 memoryview
+    """
+    with open(filepath, 'rb') as f:
+        # 空文件无法映射
+        if os.fstat(f.fileno()).st_size == 0:
+            yield memoryview(b'')
+            return
+
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        view = memoryview(mapped)
+        try:
+            yield view
+        finally:
+            try:
+                view.release()
+                mapped.close()
+            except BufferError:
+                # 调用方仍持有基于该映射的数组时，交给垃圾回收关闭
+                pass
+
+def decode_image(filepath: str, flags: Optional[int] = None) -> Optional[np.ndarray]:
+    """
+    直接从映射的文件内容解码图片，不先把文件读成 bytes
+
+    Args:
+        filepath: 图片路径
+        flags: cv2.imdecode 的读取方式，默认 cv2.IMREAD_COLOR（BGR）
+
+    Returns:
+        解码后的数组，无法解码时返回 None
+    """
+    with open_mapped(filepath) as view:
+        if not len(view):
+            return None
+        # imdecode 返回新分配的数组，不引用映射，退出 with 后仍然有效
+        return cv2.imdecode(
+            np.frombuffer(view, np.uint8), cv2.IMREAD_COLOR if flags is None else flags
+        )
@@ -0,0 +1,183 @@
+import copy
+import time
+import hashlib
+import threading
+from typing import Any, Callable, Dict, Optional
+
+from utils.config_loader import ConfigLoader
+from utils.telemetry import annotate
+from utils.resilience import DeadlineExceeded, check_deadline, remaining_time
+
+# 拿不到令牌时最多等待的秒数（有截止时间时取更短的一个）
+DEFAULT_MAX_WAIT = 10.0
+
+class RateLimitExceeded(TimeoutError):
+    """等待令牌超时，请求未发出"""
+
+class TokenBucket:
+    """
+    令牌桶：每秒补充 rate 个令牌，最多存 burst 个
+
+    同一密钥下所有会话共用一个桶，突发请求（全班同时点“完成作品”）会排队而不是被上游限流。
+    """
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self.tokens = float(self.burst)
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _reserve(self) -> float:
+        """预订一个令牌，返回需要等待的秒数（令牌可以透支，等待期间不会被别人拿走）"""
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= 1
+            return 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+
+    def _release(self) -> None:
+        with self._lock:
+            self.tokens = min(self.burst, self.tokens + 1)
+
+    def try_acquire(self) -> bool:
+        """有令牌就取走，没有立即返回 False"""
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return True
+            return False
+
+    def acquire(self, max_wait: float = DEFAULT_MAX_WAIT) -> float:
+        """
+        取一个令牌，必要时等待
+
+        Args:
+            max_wait: 最多等待的秒数
+
+        Returns:
+            实际等待的秒数
+
+        Raises:
+            RateLimitExceeded: 需要等待的时间超过 max_wait 或调用截止时间
+        """
+        remaining = remaining_time()
+        if remaining is not None:
+            max_wait = min(max_wait, remaining)
+
+        wait = self._reserve()
+        if wait > max_wait:
+            self._release()
+            raise RateLimitExceeded(f"请求过多，需等待 {wait:.1f} 秒")
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+_limiters: Dict[str, TokenBucket] = {}
+_limiters_lock = threading.Lock()
+
+def get_limiter(provider: str) -> TokenBucket:
+    """服务商（dashscope / coze）共用的令牌桶"""
+    limiter = _limiters.get(provider)
+    if limiter is None:
+        with _limiters_lock:
+            limiter = _limiters.get(provider)
+            if limiter is None:
+                settings = ConfigLoader.get_rate_limits().get(provider, {"rate": 5.0, "burst": 10})
+                limiter = _limiters[provider] = TokenBucket(settings["rate"], settings["burst"])
+    return limiter
+
+def throttle(provider: str, max_wait: float = DEFAULT_MAX_WAIT) -> None:
+    """发请求前调用：取不到令牌时排队，排队时间记入当前调用记录"""
+    waited = get_limiter(provider).acquire(max_wait)
+    if waited > 0:
+        annotate(throttled_ms=round(waited * 1000, 1))
+
+class SingleFlight:
+    """
+    相同请求合并：同一时刻相同 key 的调用只执行一次，其余调用等待并共享结果
+
+    结果以深拷贝交给等待者，调用方可以放心修改返回的字典。
+    """
+
+    def __init__(self):
+        self._calls: Dict[str, dict] = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: str, func: Callable[[], Any]) -> Any:
+        """
+        Args:
+            key: 请求标识，通常用 request_key 生成
+            func: 真正发请求的无参函数
+
+        Returns:
+            func 的返回值（异常同样共享给所有等待者；发起者自己的截止时间或限流造成的失败除外）
+
+        Raises:
+            DeadlineExceeded: 等待期间本次调用的截止时间已过
+        """
+        while True:
+            with self._lock:
+                call = self._calls.get(key)
+                leader = call is None
+                if leader:
+                    call = self._calls[key] = {"done": threading.Event(), "result": None, "error": None}
+
+            if leader:
+                break
+
+            annotate(coalesced=True)
+            check_deadline()
+            if not call["done"].wait(timeout=remaining_time()):
+                raise DeadlineExceeded("等待相同请求的结果时截止时间已过")
+            error = call["error"]
+            if isinstance(error, (DeadlineExceeded, RateLimitExceeded)):
+                # 发起者的截止时间或排队上限与本次调用无关：重新发起，或加入新的发起者
+                continue
+            if error is not None:
+                raise error
+            return copy.deepcopy(call["result"])
+
+        try:
+            result = func()
+            # 等待者拿到的是快照，发起者之后修改返回值不影响它们
+            call["result"] = copy.deepcopy(result)
+            return result
+        except Exception as e:
+            call["error"] = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call["done"].set()
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return len(self._calls)
+
+def request_key(*parts: Any) -> str:
+    """由图片、提示词等组成请求标识（bytes 直接参与哈希，其余转成字符串）"""
+    digest = hashlib.sha256()
+    for part in parts:
+        data = part if isinstance(part, (bytes, bytearray, memoryview)) else str(part).encode('utf-8')
+        digest.update(len(data).to_bytes(8, 'little'))
+        digest.update(data)
+    return digest.hexdigest()
+
+_flights: Dict[str, SingleFlight] = {}
+_flights_lock = threading.Lock()
+
+def get_single_flight(name: str) -> SingleFlight:
+    """按用途（如 "dashscope.chat"）共享的请求合并器"""
+    with _flights_lock:
+        if name not in _flights:
+            _flights[name] = SingleFlight()
+        return _flights[name]
+
+def coalesce(name: str, key: str, func: Callable[[], Any]) -> Any:
+    """get_single_flight(name).do(key, func) 的简写"""
+    return get_single_flight(name).do(key, func)
@@ -0,0 +1,117 @@
+import numpy as np
+from functools import lru_cache
+from math import ceil, gcd
+from typing import Iterator, Tuple
+from utils.lazy_import import lazy_import
+
+signal = lazy_import("scipy.signal")
+
+# 每块处理的输入帧数（会向上取整为降采样因子的整数倍）
+DEFAULT_BLOCK_FRAMES = 65536
+
+# Kaiser 窗参数，与 scipy.signal.resample_poly 的默认值一致
+KAISER_BETA = 5.0
+
+def resample_ratio(orig_sample_rate: int, target_sample_rate: int) -> Tuple[int, int]:
+    """化简后的 (上采样因子, 降采样因子)"""
+    divisor = gcd(orig_sample_rate, target_sample_rate)
+    return target_sample_rate // divisor, orig_sample_rate // divisor
+
+@lru_cache(maxsize=16)
+def design_filter(up: int, down: int) -> np.ndarray:
+    """
+    设计多相重采样用的低通 FIR（加 Kaiser 窗的 sinc），同一组因子只设计一次
+
+    Returns:
+        float32 滤波器系数（未乘上采样增益，由 resample_poly 处理）
+    """
+    max_rate = max(up, down)
+    half_len = 10 * max_rate
+    taps = signal.firwin(2 * half_len + 1, 1.0 / max_rate, window=('kaiser', KAISER_BETA))
+    taps = taps.astype(np.float32)
+    taps.flags.writeable = False
+    return taps
+
+def output_length(num_frames: int, up: int, down: int) -> int:
+    """重采样后的帧数"""
+    return ceil(num_frames * up / down)
+
+def iter_resampled_blocks(
+    samples: np.ndarray,
+    orig_sample_rate: int,
+    target_sample_rate: int,
+    block_frames: int = DEFAULT_BLOCK_FRAMES
+) -> Iterator[np.ndarray]:
+    """
+    分块多相重采样（窗函数 sinc 插值）
+
+    每块向两侧多取一段上下文（长度覆盖滤波器半长，且是降采样因子的整数倍），
+    重采样后裁掉上下文对应的输出，因此拼接结果与整段调用 resample_poly 一致，
+    而临时内存只与块大小有关。
+
+    Args:
+        samples: (帧数, 声道数) 样本，逐声道独立处理
+        orig_sample_rate: 原采样率
+        target_sample_rate: 目标采样率
+        block_frames: 每块输入帧数
+
+    Yields:
+        (输出帧数, 声道数) 的 float32 块
+    """
+    up, down = resample_ratio(orig_sample_rate, target_sample_rate)
+    num_frames = samples.shape[0]
+
+    if up == down:
+        for start in range(0, num_frames, block_frames):
+            yield np.asarray(samples[start:start + block_frames], dtype=np.float32)
+        return
+
+    taps = design_filter(up, down)
+    half_len = (len(taps) - 1) // 2
+
+    # 上下文与块长都取 down 的整数倍，保证每块的输出与整段输出对齐
+    context = ceil((ceil(half_len / up) + 1) / down) * down
+    block_frames = max(down, block_frames // down * down)
+
+    for start in range(0, num_frames, block_frames):
+        stop = min(start + block_frames, num_frames)
+        left = min(context, start)
+        right = min(context, num_frames - stop)
+
+        chunk = np.asarray(samples[start - left:stop + right], dtype=np.float32)
+        resampled = signal.resample_poly(chunk, up, down, axis=0, window=taps.copy())
+
+        skip = left * up // down
+        yield resampled[skip:skip + output_length(stop - start, up, down)]
+
+def resample(
+    samples: np.ndarray,
+    orig_sample_rate: int,
+    target_sample_rate: int,
+    block_frames: int = DEFAULT_BLOCK_FRAMES
+) -> np.ndarray:
+    """
+    多相重采样整段音频
+
+    Args:
+        samples: (帧数, 声道数) 或一维样本
+        orig_sample_rate: 原采样率
+        target_sample_rate: 目标采样率
+        block_frames: 每块输入帧数
+
+    Returns:
+        float32 样本，形状与输入维数一致
+    """
+    mono = samples.ndim == 1
+    if mono:
+        samples = samples[:, None]
+
+    up, down = resample_ratio(orig_sample_rate, target_sample_rate)
+    result = np.empty((output_length(samples.shape[0], up, down), samples.shape[1]), dtype=np.float32)
+
+    position = 0
+    for block in iter_resampled_blocks(samples, orig_sample_rate, target_sample_rate, block_frames):
+        result[position:position + len(block)] = block
+        position += len(block)
+
+    return result[:, 0] if mono else result
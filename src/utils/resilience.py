@@ -0,0 +1,330 @@
+import time
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout, FIRST_COMPLETED, wait
+from contextlib import contextmanager
+from contextvars import ContextVar, copy_context
+from typing import Callable, Dict, Optional
+
+from utils.telemetry import annotate, percentile, record_retry
+
+# 外部接口名称（每个接口一个熔断器）
+DASHSCOPE_CHAT = "dashscope.chat"
+DASHSCOPE_TTS = "dashscope.tts"
+COZE_UPLOAD = "coze.upload"
+COZE_WORKFLOW = "coze.workflow"
+VOLCENGINE_VIDEO = "volcengine.video"
+
+CIRCUIT_OPEN_MESSAGE = "服务暂时繁忙，请稍后再试"
+
+# 熔断参数：连续失败次数、熔断后多久放行一次试探请求（秒）、超过多久算慢调用（秒，慢调用按失败计）
+DEFAULT_BREAKER_SETTINGS = {"failure_threshold": 5, "recovery_timeout": 30.0, "slow_call_seconds": 20.0}
+BREAKER_SETTINGS = {
+    COZE_WORKFLOW: {"failure_threshold": 3, "recovery_timeout": 60.0, "slow_call_seconds": 90.0},
+    VOLCENGINE_VIDEO: {"failure_threshold": 3, "recovery_timeout": 60.0, "slow_call_seconds": 20.0},
+}
+
+# 共享连接池：每个主机保留的连接数（Streamlit 每个会话一个线程，按并发会话数估计）；
+# 对冲请求的线程池与之同样大小
+HTTP_POOL_SIZE = 16
+
+# 对冲请求：至少积累这么多次成功调用的耗时后才按 p95 触发，且不早于 HEDGE_MIN_DELAY 秒
+HEDGE_MIN_SAMPLES = 20
+HEDGE_MIN_DELAY = 0.5
+LATENCY_WINDOW = 200
+
+class CircuitOpenError(RuntimeError):
+    """熔断器打开，请求未发出"""
+
+class DeadlineExceeded(TimeoutError):
+    """调用链的截止时间已过"""
+
+class _UpstreamFailure(Exception):
+    """内部使用：接口返回了限流/服务端错误"""
+
+    def __init__(self, result):
+        super().__init__("upstream failure")
+        self.result = result
+
+class CircuitBreaker:
+    """
+    熔断器：closed -> 连续失败 N 次 -> open（直接拒绝）-> 冷却后 half_open（放行一次试探）
+    -> 试探成功回到 closed，失败重新 open
+    """
+
+    def __init__(self, name: str, failure_threshold: int = 5, recovery_timeout: float = 30.0,
+                 slow_call_seconds: Optional[float] = None):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.slow_call_seconds = slow_call_seconds
+
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+        self._latencies = deque(maxlen=LATENCY_WINDOW)
+
+    def allow(self) -> bool:
+        """是否放行本次请求（half_open 时只放行一个试探请求）"""
+        with self._lock:
+            if self.state == "closed":
+                return True
+            if self.state == "open" and time.monotonic() - self.opened_at >= self.recovery_timeout:
+                self.state = "half_open"
+                self._trial_in_flight = False
+            if self.state == "half_open" and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            return False
+
+    def is_open(self) -> bool:
+        """当前是否会拒绝请求（不占用试探名额）"""
+        with self._lock:
+            if self.state == "open":
+                return time.monotonic() - self.opened_at < self.recovery_timeout
+            return self.state == "half_open" and self._trial_in_flight
+
+    def release(self) -> None:
+        """请求未完成但不能算作接口的成败（如调用方截止时间已过），只归还试探名额"""
+        with self._lock:
+            self._trial_in_flight = False
+
+    def record(self, success: bool, elapsed: float) -> None:
+        if success and self.slow_call_seconds and elapsed > self.slow_call_seconds:
+            success = False
+
+        with self._lock:
+            self._trial_in_flight = False
+            if success:
+                self._latencies.append(elapsed)
+                self.failures = 0
+                self.state = "closed"
+                return
+
+            self.failures += 1
+            if self.state == "half_open" or self.failures >= self.failure_threshold:
+                if self.state != "open":
+                    print(f"熔断器打开: {self.name}（连续失败 {self.failures} 次）")
+                self.state = "open"
+                self.opened_at = time.monotonic()
+
+    def latency_percentile(self, q: float) -> Optional[float]:
+        """最近成功调用耗时的分位数（秒），样本不足时返回 None"""
+        with self._lock:
+            if len(self._latencies) < HEDGE_MIN_SAMPLES:
+                return None
+            samples = sorted(self._latencies)
+        return float(percentile(samples, q))
+
+    def to_dict(self) -> Dict:
+        p95 = self.latency_percentile(95)
+        return {
+            "state": self.state,
+            "failures": self.failures,
+            "p95_ms": round(p95 * 1000, 1) if p95 is not None else None,
+        }
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+def get_breaker(endpoint: str) -> CircuitBreaker:
+    """获取接口的熔断器（进程内共享）"""
+    breaker = _breakers.get(endpoint)
+    if breaker is None:
+        with _breakers_lock:
+            breaker = _breakers.get(endpoint)
+            if breaker is None:
+                settings = {**DEFAULT_BREAKER_SETTINGS, **BREAKER_SETTINGS.get(endpoint, {})}
+                breaker = _breakers[endpoint] = CircuitBreaker(endpoint, **settings)
+    return breaker
+
+def breaker_states() -> Dict[str, Dict]:
+    """所有熔断器的状态，用于性能监控页面"""
+    with _breakers_lock:
+        breakers = dict(_breakers)
+    return {name: breaker.to_dict() for name, breaker in sorted(breakers.items())}
+
+def is_circuit_open(endpoint: str) -> bool:
+    """接口是否处于熔断状态，调用方可据此直接走降级逻辑"""
+    return get_breaker(endpoint).is_open()
+
+# ---- 截止时间 ----
+
+# 页面操作的总耗时上限（秒），操作内的所有外部调用共享：
+# 画画时的即时反馈、"完成作品"的整条分析链、Coze 工作流（上传 + 生成）
+INTERACTIVE_DEADLINE = 20.0
+ANALYSIS_DEADLINE = 90.0
+WORKFLOW_DEADLINE = 180.0
+
+_deadline: ContextVar[Optional[float]] = ContextVar("resilience_deadline", default=None)
+
+@contextmanager
+def deadline(seconds: float):
+    """
+    为一段调用链设置截止时间，嵌套时取更早的一个
+
+    期间所有通过 request_timeout 计算超时的请求都不会超过截止时间。
+    """
+    target = time.monotonic() + seconds
+    current = _deadline.get()
+    token = _deadline.set(target if current is None else min(current, target))
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+def remaining_time() -> Optional[float]:
+    """距离截止时间的秒数，没有截止时间时返回 None"""
+    target = _deadline.get()
+    return None if target is None else target - time.monotonic()
+
+def request_timeout(default: float) -> float:
+    """
+    本次请求可用的超时时间
+
+    Args:
+        default: 接口自身的超时时间
+
+    Returns:
+        min(default, 剩余时间)；截止时间已过时抛出 DeadlineExceeded
+    """
+    remaining = remaining_time()
+    if remaining is None:
+        return default
+    if remaining <= 0:
+        raise DeadlineExceeded("调用截止时间已过")
+    return min(default, remaining)
+
+def check_deadline() -> None:
+    """截止时间已过时抛出 DeadlineExceeded（用于流式读取等分多次等待的调用）"""
+    remaining = remaining_time()
+    if remaining is not None and remaining <= 0:
+        raise DeadlineExceeded("调用截止时间已过")
+
+# ---- 熔断 + 对冲 ----
+
+def is_upstream_error(response) -> bool:
+    """限流和服务端错误计入熔断；4xx 参数错误不算"""
+    status = getattr(response, "status_code", 200)
+    return status == 429 or status >= 500
+
+@contextmanager
+def guard(endpoint: str):
+    """
+    熔断保护一段代码：熔断时抛出 CircuitOpenError，代码块抛出异常或过慢时计为失败
+    （调用方截止时间已过引起的 DeadlineExceeded 不计）
+
+    Yields:
+        熔断器；需要按结果判定失败时可以调用 breaker.record
+    """
+    breaker = get_breaker(endpoint)
+    if not breaker.allow():
+        annotate(circuit="open")
+        raise CircuitOpenError(f"{endpoint} {CIRCUIT_OPEN_MESSAGE}")
+
+    start = time.monotonic()
+    try:
+        yield breaker
+    except DeadlineExceeded:
+        breaker.release()
+        raise
+    except BaseException:
+        breaker.record(False, time.monotonic() - start)
+        raise
+    breaker.record(True, time.monotonic() - start)
+
+_hedge_executor = ThreadPoolExecutor(max_workers=HTTP_POOL_SIZE, thread_name_prefix="hedge")
+
+def _wait_budget() -> Optional[float]:
+    """本次等待最多能用的秒数（没有截止时间时为 None），截止时间已过时抛出 DeadlineExceeded"""
+    check_deadline()
+    return remaining_time()
+
+def _hedged(func: Callable, delay: float, is_failure: Callable, gate: Optional[Callable[[], bool]]):
+    # 请求在共享线程池中执行；上游变慢时线程池会排满，所以每一步等待都不超过调用方的截止时间
+    started = threading.Event()
+
+    def first_call():
+        started.set()
+        return func()
+
+    # 从第一个请求真正开始执行时计时：突发请求在线程池里排队的时间不算，不会因排队触发多余的对冲
+    first = _hedge_executor.submit(copy_context().run, first_call)
+    if not started.wait(timeout=_wait_budget()):
+        first.cancel()
+        raise DeadlineExceeded("对冲线程池繁忙，截止时间前请求未能开始")
+    try:
+        budget = _wait_budget()
+        return first.result(timeout=delay if budget is None else min(delay, budget))
+    except FutureTimeout:
+        pass
+
+    if gate is not None and not gate():
+        # 配额不足时不对冲，继续等第一个请求
+        try:
+            return first.result(timeout=_wait_budget())
+        except FutureTimeout:
+            raise DeadlineExceeded("调用截止时间已过")
+
+    # 第一个请求超过 p95 仍未返回：再发一个，取先成功的结果（另一个在后台自然结束）
+    annotate(hedged=True)
+    record_retry()
+    pending = {first, _hedge_executor.submit(copy_context().run, func)}
+    result, error = None, None
+    while pending:
+        done, pending = wait(pending, timeout=_wait_budget(), return_when=FIRST_COMPLETED)
+        if not done:
+            raise DeadlineExceeded("调用截止时间已过")
+        for future in done:
+            try:
+                result = future.result()
+            except Exception as e:
+                error = e
+                continue
+            if not is_failure(result):
+                return result
+    if result is not None:
+        return result
+    raise error
+
+def guarded_call(
+    endpoint: str,
+    func: Callable,
+    is_failure: Callable = is_upstream_error,
+    hedge: bool = False,
+    hedge_gate: Optional[Callable[[], bool]] = None
+):
+    """
+    带熔断（可选对冲）地调用外部接口
+
+    Args:
+        endpoint: 接口名称，如 DASHSCOPE_CHAT
+        func: 发出请求的无参函数，通常返回 requests.Response
+        is_failure: 判断结果是否算失败（默认：429 或 5xx）
+        hedge: 是否在耗时超过近期 p95 后发出第二个相同请求（只用于幂等请求）
+        hedge_gate: 发对冲请求前调用，返回 False 时不发（如限流器的 try_acquire）
+
+    Returns:
+        func 的返回值
+
+    Raises:
+        CircuitOpenError: 熔断中，请求未发出
+    """
+    try:
+        with guard(endpoint) as breaker:
+            delay = breaker.latency_percentile(95) if hedge else None
+            if delay is not None:
+                delay = max(delay, HEDGE_MIN_DELAY)
+                remaining = remaining_time()
+                if remaining is not None and remaining <= delay:
+                    delay = None
+
+            result = _hedged(func, delay, is_failure, hedge_gate) if delay is not None else func()
+            if is_failure(result):
+                # 抛出让熔断器记为失败，返回值仍原样交给调用方处理
+                raise _UpstreamFailure(result)
+            return result
+    except _UpstreamFailure as failure:
+        return failure.result
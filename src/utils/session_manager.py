@@ -1,42 +1,58 @@
 import streamlit as st
 import uuid
+from utils.config_loader import ConfigLoader
+from utils.session_store import get_session_store
+
+def _default_drawing_data():
+    return {
+        'strokes': [],
+        'current_canvas': None,
+        'undo_stack': [],
+        'redo_stack': [],
+        'background_color': '#FFFFFF',
+        'stroke_width': 5,
+        'stroke_color': '#000000',
+        'revision_count': 0,
+    }
+
+# 体积大的状态（笔画、撤销栈、对话、当前作品及其分析结果）按 user_id 保存在服务端会话存储，
+# 不放进 st.session_state；第一次 get_state 时才加载，不存在时用默认值创建
+STORE_DEFAULTS = {
+    'drawing_data': _default_drawing_data,
+    'chat_history': list,
+    'current_artwork': lambda: None,
+    'generated_music': lambda: None,
+    'generated_video': lambda: None,
+}
+
+_MISSING = object()
+
+def _valid_user_id(value) -> bool:
+    # user_id 会用作目录名，只接受 UUID
+    try:
+        return str(uuid.UUID(str(value))) == value
+    except ValueError:
+        return False
 
 def init_session_state():
     """初始化会话状态"""
-    
-    # 基础配置
+
+    # 基础配置：user_id 是服务端会话存储的键。
+    # 开启 SESSION_RESUME_FROM_URL 时同时写入地址栏，刷新页面或服务重启后仍能找回；
+    # 但地址栏里的 uid 是唯一凭据，拿到链接的人都能接管会话，所以默认不读也不写地址栏
+    resume_from_url = ConfigLoader.get_session_store_config()["resume_from_url"]
     if 'user_id' not in st.session_state:
-        st.session_state.user_id = str(uuid.uuid4())
-    
+        uid = st.query_params.get('uid') if resume_from_url else None
+        st.session_state.user_id = uid if _valid_user_id(uid) else str(uuid.uuid4())
+    if resume_from_url:
+        if st.query_params.get('uid') != st.session_state.user_id:
+            st.query_params['uid'] = st.session_state.user_id
+    elif 'uid' in st.query_params:
+        # 未开启时不采用别人分享来的 uid，并从地址栏移除，避免继续传播
+        del st.query_params['uid']
+
     if 'initialized' not in st.session_state:
         st.session_state.initialized = True
-        
-    # 画板相关
-    if 'drawing_data' not in st.session_state:
-        st.session_state.drawing_data = {
-            'strokes': [],
-            'current_canvas': None,
-            'undo_stack': [],
-            'redo_stack': [],
-            'background_color': '#FFFFFF',
-            'stroke_width': 5,
-            'stroke_color': '#000000',
-            'revision_count': 0,
-        }
-    
-    # AI交互相关
-    if 'chat_history' not in st.session_state:
-        st.session_state.chat_history = []
-        
-    # 作品工坊相关
-    if 'current_artwork' not in st.session_state:
-        st.session_state.current_artwork = None
-        
-    if 'generated_music' not in st.session_state:
-        st.session_state.generated_music = None
-        
-    if 'generated_video' not in st.session_state:
-        st.session_state.generated_video = None
 
     # 设置相关
     if 'settings' not in st.session_state:
@@ -47,17 +63,35 @@ def init_session_state():
         }
 
 def get_state(key, default=None):
-    """获取session状态"""
+    """
+    获取session状态
+
+    STORE_DEFAULTS 中的键从会话存储读取（不存在时创建默认值，忽略 default），
+    其余键读取 st.session_state。
+    """
+    if key in STORE_DEFAULTS:
+        store = get_session_store()
+        user_id = st.session_state.user_id
+        value = store.get(user_id, key, _MISSING)
+        if value is _MISSING:
+            value = STORE_DEFAULTS[key]()
+            store.set(user_id, key, value)
+        return value
     return st.session_state.get(key, default)
 
 def set_state(key, value):
-    """设置session状态"""
-    st.session_state[key] = value
+    """设置session状态（原地修改了 get_state 返回的对象后也要调用，才会写入磁盘）"""
+    if key in STORE_DEFAULTS:
+        get_session_store().set(st.session_state.user_id, key, value)
+    else:
+        st.session_state[key] = value
 
 def clear_session():
     """清除会话状态"""
     # 保留user_id等核心信息，重置其他
     user_id = st.session_state.get('user_id')
+    if user_id:
+        get_session_store().delete(user_id)
     st.session_state.clear()
     st.session_state.user_id = user_id
     init_session_state()
@@ -0,0 +1,257 @@
+import time
+import atexit
+import pickle
+import sqlite3
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional
+
+from utils.config_loader import ConfigLoader
+
+# 同一用户两次写入磁盘的最短间隔（秒），期间的修改只留在内存
+FLUSH_INTERVAL = 5.0
+
+# 闲置淘汰的检查间隔（秒）
+SWEEP_INTERVAL = 60.0
+
+_MISSING = object()
+
+class MemorySessionStore:
+    """
+    进程内的会话存储：按 user_id 保存，LRU 淘汰
+
+    超过 max_users 个用户时淘汰最久未访问的，闲置超过 idle_seconds 的用户也会被淘汰；
+    淘汰时调用 on_evict(user_id, 数据)，由上层决定是否写入磁盘。
+    """
+
+    def __init__(
+        self,
+        max_users: int = 200,
+        idle_seconds: float = 1800,
+        on_evict: Optional[Callable[[str, Dict[str, Any]], None]] = None
+    ):
+        self.max_users = max_users
+        self.idle_seconds = idle_seconds
+        self.on_evict = on_evict
+        self._users: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._touched: Dict[str, float] = {}
+        self._last_sweep = time.monotonic()
+        self._lock = threading.RLock()
+
+    def _touch(self, user_id: str) -> Dict[str, Any]:
+        now = time.monotonic()
+        data = self._users.get(user_id)
+        if data is None:
+            data = self._users[user_id] = {}
+        self._users.move_to_end(user_id)
+        self._touched[user_id] = now
+
+        # 刚访问的用户已移到末尾，超出上限的部分从最久未访问的开始淘汰
+        evicted = list(self._users)[:max(0, len(self._users) - self.max_users)]
+        if now - self._last_sweep >= SWEEP_INTERVAL:
+            self._last_sweep = now
+            evicted += [uid for uid, touched in self._touched.items()
+                        if uid != user_id and now - touched > self.idle_seconds]
+        for uid in dict.fromkeys(evicted):
+            self._evict(uid)
+        return data
+
+    def _evict(self, user_id: str) -> None:
+        data = self._users.pop(user_id, None)
+        self._touched.pop(user_id, None)
+        if data is not None and self.on_evict:
+            self.on_evict(user_id, data)
+
+    def get(self, user_id: str, key: str, default: Any = None) -> Any:
+        with self._lock:
+            if user_id not in self._users:
+                return default
+            return self._touch(user_id).get(key, default)
+
+    def set(self, user_id: str, key: str, value: Any) -> None:
+        with self._lock:
+            self._touch(user_id)[key] = value
+
+    def delete(self, user_id: str, key: Optional[str] = None) -> None:
+        """删除一个键；key 为 None 时删除该用户的全部数据（不触发 on_evict）"""
+        with self._lock:
+            if key is None:
+                self._users.pop(user_id, None)
+                self._touched.pop(user_id, None)
+            elif user_id in self._users:
+                self._users[user_id].pop(key, None)
+
+    def peek(self, user_id: str) -> Optional[Dict[str, Any]]:
+        """读取用户数据但不更新访问时间（用于写盘）"""
+        with self._lock:
+            return self._users.get(user_id)
+
+    def __len__(self) -> int:
+        return len(self._users)
+
+class SQLiteSessionStore:
+    """磁盘上的会话存储：每个 (user_id, 键) 一行，值用 pickle 序列化"""
+
+    def __init__(self, path: str):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS session_state ("
+            "user_id TEXT NOT NULL, key TEXT NOT NULL, value BLOB, updated_at REAL NOT NULL, "
+            "PRIMARY KEY (user_id, key))"
+        )
+        self._lock = threading.Lock()
+
+    def get(self, user_id: str, key: str, default: Any = None) -> Any:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value FROM session_state WHERE user_id = ? AND key = ?", (user_id, key)
+            ).fetchone()
+        if row is None:
+            return default
+        try:
+            return pickle.loads(row[0])
+        except Exception as e:
+            print(f"会话读取失败 {key}: {str(e)}")
+            return default
+
+    def set_many(self, user_id: str, items: Dict[str, Any]) -> None:
+        rows = []
+        now = time.time()
+        for key, value in items.items():
+            try:
+                rows.append((user_id, key, pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL), now))
+            except Exception as e:
+                print(f"会话保存失败 {key}: {str(e)}")
+        if rows:
+            with self._lock:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO session_state (user_id, key, value, updated_at) VALUES (?, ?, ?, ?)",
+                    rows
+                )
+
+    def set(self, user_id: str, key: str, value: Any) -> None:
+        self.set_many(user_id, {key: value})
+
+    def delete(self, user_id: str, key: Optional[str] = None) -> None:
+        with self._lock:
+            if key is None:
+                self._conn.execute("DELETE FROM session_state WHERE user_id = ?", (user_id,))
+            else:
+                self._conn.execute("DELETE FROM session_state WHERE user_id = ? AND key = ?", (user_id, key))
+
+    def purge(self, older_than_seconds: float) -> int:
+        """删除超过保留期未更新的数据，返回删除的行数"""
+        with self._lock:
+            cursor = self._conn.execute(
+                "DELETE FROM session_state WHERE updated_at < ?", (time.time() - older_than_seconds,)
+            )
+            return cursor.rowcount
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+class TieredSessionStore:
+    """
+    两级会话存储：内存 LRU + 磁盘
+
+    - 读取：内存未命中时才从磁盘加载该键（懒加载）
+    - 写入：先写内存并标记为脏，同一用户每 FLUSH_INTERVAL 秒最多写一次磁盘
+    - 用户被淘汰（超出上限或闲置）时把未写入的修改写入磁盘，内存随之释放
+    disk 为 None 时只用内存（重启后数据丢失）。
+    """
+
+    def __init__(self, memory: MemorySessionStore, disk: Optional[SQLiteSessionStore] = None):
+        self.memory = memory
+        self.disk = disk
+        self.memory.on_evict = self._flush_evicted
+        self._dirty: Dict[str, set] = {}
+        self._flushed_at: Dict[str, float] = {}
+        self._lock = threading.RLock()
+
+    def get(self, user_id: str, key: str, default: Any = None) -> Any:
+        with self._lock:
+            value = self.memory.get(user_id, key, _MISSING)
+            if value is not _MISSING:
+                return value
+            if self.disk is None:
+                return default
+            value = self.disk.get(user_id, key, _MISSING)
+            if value is _MISSING:
+                return default
+            self.memory.set(user_id, key, value)
+            return value
+
+    def set(self, user_id: str, key: str, value: Any) -> None:
+        with self._lock:
+            self.memory.set(user_id, key, value)
+            self._dirty.setdefault(user_id, set()).add(key)
+            if time.monotonic() - self._flushed_at.get(user_id, 0.0) >= FLUSH_INTERVAL:
+                self.flush(user_id)
+
+    def delete(self, user_id: str, key: Optional[str] = None) -> None:
+        with self._lock:
+            self.memory.delete(user_id, key)
+            if key is None:
+                self._dirty.pop(user_id, None)
+            else:
+                self._dirty.get(user_id, set()).discard(key)
+            if self.disk is not None:
+                self.disk.delete(user_id, key)
+
+    def flush(self, user_id: Optional[str] = None) -> None:
+        """把未写入的修改写入磁盘（user_id 为 None 时写入所有用户）"""
+        with self._lock:
+            for uid in [user_id] if user_id is not None else list(self._dirty):
+                keys = self._dirty.pop(uid, set())
+                self._flushed_at[uid] = time.monotonic()
+                if not keys or self.disk is None:
+                    continue
+                data = self.memory.peek(uid) or {}
+                self.disk.set_many(uid, {key: data[key] for key in keys if key in data})
+
+    def _flush_evicted(self, user_id: str, data: Dict[str, Any]) -> None:
+        # 在 memory 的锁内被调用，数据已从内存移除，直接用传入的 data
+        keys = self._dirty.pop(user_id, set())
+        self._flushed_at.pop(user_id, None)
+        if keys and self.disk is not None:
+            self.disk.set_many(user_id, {key: data[key] for key in keys if key in data})
+
+    def close(self) -> None:
+        """写入所有修改并关闭磁盘存储"""
+        with self._lock:
+            self.flush()
+            if self.disk is not None:
+                self.disk.close()
+                self.disk = None
+
+def create_session_store() -> TieredSessionStore:
+    """按配置创建会话存储（SESSION_STORE=sqlite | memory）"""
+    config = ConfigLoader.get_session_store_config()
+    memory = MemorySessionStore(config["max_users"], config["idle_seconds"])
+    disk = None
+    if config["backend"] == "sqlite":
+        try:
+            disk = SQLiteSessionStore(config["path"])
+            disk.purge(config["retention_days"] * 86400)
+        except Exception as e:
+            print(f"会话存储初始化失败，改为仅内存: {str(e)}")
+            disk = None
+    return TieredSessionStore(memory, disk)
+
+_store = None
+_store_lock = threading.Lock()
+
+def get_session_store() -> TieredSessionStore:
+    """进程内共享的会话存储，退出时写入所有未保存的修改"""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = create_session_store()
+                atexit.register(_store.close)
+    return _store
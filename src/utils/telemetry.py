@@ -0,0 +1,400 @@
+import os
+import time
+import inspect
+import threading
+import functools
+import itertools
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Optional, Sequence
+
+# 环形缓冲区保存的最近调用数
+DEFAULT_BUFFER_SIZE = 2000
+
+# 耗时直方图的桶上界（秒），覆盖本地图片处理到远端工作流
+HISTOGRAM_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+METRIC_PREFIX = "dreamweaver"
+
+# 批量调用的子任务在多个线程里给同一个 span 计重试次数
+_retry_lock = threading.Lock()
+
+_span_ids = itertools.count(1)
+_current_span: ContextVar[Optional["Span"]] = ContextVar("telemetry_current_span", default=None)
+
+def percentile(sorted_values: Sequence[float], q: float) -> float:
+    """
+    分位数（线性插值，与 numpy.percentile 默认方式相同）
+
+    只用于启动时就会导入的模块，避免为几个分位数加载 numpy。
+
+    Args:
+        sorted_values: 已排序的非空序列
+        q: 百分位，0-100
+    """
+    position = (len(sorted_values) - 1) * q / 100
+    lower = int(position)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (position - lower)
+
+def payload_size(value) -> int:
+    """bytes / str 的字节数，其他类型记为 0"""
+    if isinstance(value, (bytes, bytearray)):
+        return len(value)
+    if isinstance(value, memoryview):
+        return value.nbytes
+    if isinstance(value, str):
+        return len(value.encode('utf-8'))
+    return 0
+
+class Span:
+    """一次调用的记录：名称、耗时、状态、收发字节数、重试次数和附加属性"""
+
+    __slots__ = ("id", "parent_id", "name", "start_time", "duration_ms", "status",
+                 "error", "bytes_in", "bytes_out", "retries", "attributes", "_start")
+
+    def __init__(self, name: str, parent: Optional["Span"] = None):
+        self.id = next(_span_ids)
+        self.parent_id = parent.id if parent else None
+        self.name = name
+        self.start_time = time.time()
+        self.duration_ms = 0.0
+        self.status = "ok"
+        self.error = None
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.retries = 0
+        self.attributes = {}
+        self._start = time.perf_counter()
+
+    def set(self, **attributes) -> "Span":
+        self.attributes.update(attributes)
+        return self
+
+    def fail(self, error) -> "Span":
+        self.status = "error"
+        self.error = str(error) if error else "failed"
+        return self
+
+    def add_retry(self) -> "Span":
+        with _retry_lock:
+            self.retries += 1
+        return self
+
+    def finish(self) -> None:
+        self.duration_ms = (time.perf_counter() - self._start) * 1000
+
+    def to_dict(self) -> Dict:
+        return {
+            "id": self.id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start_time": self.start_time,
+            "duration_ms": round(self.duration_ms, 3),
+            "status": self.status,
+            "error": self.error,
+            "bytes_in": self.bytes_in,
+            "bytes_out": self.bytes_out,
+            "retries": self.retries,
+            "attributes": dict(self.attributes),
+        }
+
+class _Metric:
+    """按调用名称累计的指标（不受环形缓冲区淘汰影响）"""
+
+    __slots__ = ("count", "errors", "duration_sum", "buckets", "bytes_in", "bytes_out", "retries")
+
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.duration_sum = 0.0
+        self.buckets = [0] * len(HISTOGRAM_BUCKETS)
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.retries = 0
+
+    def observe(self, span: Span) -> None:
+        seconds = span.duration_ms / 1000
+        self.count += 1
+        self.errors += span.status != "ok"
+        self.duration_sum += seconds
+        self.bytes_in += span.bytes_in
+        self.bytes_out += span.bytes_out
+        self.retries += span.retries
+        for i, bound in enumerate(HISTOGRAM_BUCKETS):
+            if seconds <= bound:
+                self.buckets[i] += 1
+
+class Telemetry:
+    """进程内的调用记录：最近的 span 放在环形缓冲区，累计指标按名称汇总"""
+
+    def __init__(self, buffer_size: int = DEFAULT_BUFFER_SIZE, enabled: bool = True):
+        self.enabled = enabled
+        self._spans = deque(maxlen=buffer_size)
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def record(self, span: Span) -> None:
+        with self._lock:
+            self._spans.append(span)
+            metric = self._metrics.get(span.name)
+            if metric is None:
+                metric = self._metrics[span.name] = _Metric()
+            metric.observe(span)
+
+    def spans(self, name: str = None, limit: int = None) -> List[Dict]:
+        """最近的 span（从新到旧）"""
+        with self._lock:
+            spans = list(self._spans)
+        spans.reverse()
+        if name:
+            spans = [s for s in spans if s.name == name]
+        return [s.to_dict() for s in spans[:limit]]
+
+    def summary(self) -> List[Dict]:
+        """
+        按调用名称汇总缓冲区中的 span
+
+        Returns:
+            [{"name", "count", "errors", "error_rate", "p50_ms", "p95_ms", "p99_ms", "max_ms", "bytes_in", "bytes_out", "retries"}]
+        """
+        with self._lock:
+            spans = list(self._spans)
+
+        groups = {}
+        for span in spans:
+            groups.setdefault(span.name, []).append(span)
+
+        rows = []
+        for name, group in groups.items():
+            durations = sorted(s.duration_ms for s in group)
+            errors = sum(s.status != "ok" for s in group)
+            p50, p95, p99 = (percentile(durations, q) for q in (50, 95, 99))
+            rows.append({
+                "name": name,
+                "count": len(group),
+                "errors": errors,
+                "error_rate": round(errors / len(group), 4),
+                "p50_ms": round(float(p50), 2),
+                "p95_ms": round(float(p95), 2),
+                "p99_ms": round(float(p99), 2),
+                "max_ms": round(float(durations[-1]), 2),
+                "bytes_in": sum(s.bytes_in for s in group),
+                "bytes_out": sum(s.bytes_out for s in group),
+                "retries": sum(s.retries for s in group),
+            })
+        return sorted(rows, key=lambda row: row["p95_ms"], reverse=True)
+
+    def export_openmetrics(self) -> str:
+        """累计指标的 OpenMetrics 文本（Prometheus 可直接抓取）"""
+        with self._lock:
+            metrics = {name: (m.count, m.errors, m.duration_sum, list(m.buckets), m.bytes_in, m.bytes_out, m.retries)
+                       for name, m in sorted(self._metrics.items())}
+
+        duration = f"{METRIC_PREFIX}_call_duration_seconds"
+        lines = [
+            f"# TYPE {duration} histogram",
+            f"# UNIT {duration} seconds",
+            f"# HELP {duration} Call latency by instrumented method.",
+        ]
+        for name, (count, _, total, buckets, _, _, _) in metrics.items():
+            label = _label(name)
+            for bound, value in zip(HISTOGRAM_BUCKETS, buckets):
+                lines.append(f'{duration}_bucket{{name="{label}",le="{bound}"}} {value}')
+            lines.append(f'{duration}_bucket{{name="{label}",le="+Inf"}} {count}')
+            lines.append(f'{duration}_count{{name="{label}"}} {count}')
+            lines.append(f'{duration}_sum{{name="{label}"}} {total:.6f}')
+
+        counters = (
+            ("call_errors", "Calls that raised or returned a failure result.", lambda m: [("", m[1])]),
+            ("call_retries", "Retries recorded inside calls.", lambda m: [("", m[6])]),
+            ("call_payload_bytes", "Payload bytes passed in and returned.",
+             lambda m: [(',direction="in"', m[4]), (',direction="out"', m[5])]),
+        )
+        for suffix, help_text, values in counters:
+            family = f"{METRIC_PREFIX}_{suffix}"
+            lines.append(f"# TYPE {family} counter")
+            lines.append(f"# HELP {family} {help_text}")
+            for name, metric in metrics.items():
+                for extra, value in values(metric):
+                    lines.append(f'{family}_total{{name="{_label(name)}"{extra}}} {value}')
+
+        lines.append("# EOF")
+        return "\n".join(lines) + "\n"
+
+    def clear(self) -> None:
+        with self._lock:
+            self._spans.clear()
+            self._metrics.clear()
+
+def _label(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+_telemetry = Telemetry(
+    buffer_size=int(os.getenv("TELEMETRY_BUFFER_SIZE", DEFAULT_BUFFER_SIZE)),
+    enabled=os.getenv("TELEMETRY_ENABLED", "1").lower() not in ("0", "false", "no")
+)
+
+def get_telemetry() -> Telemetry:
+    """进程内共享的 Telemetry 实例"""
+    return _telemetry
+
+def current_span() -> Optional[Span]:
+    """当前正在执行的 span（没有时返回 None）"""
+    return _current_span.get()
+
+def annotate(**attributes) -> None:
+    """给当前 span 添加属性（如 HTTP 状态码），不在 span 内时什么都不做"""
+    span = _current_span.get()
+    if span is not None:
+        span.set(**attributes)
+
+def record_retry() -> None:
+    """当前 span 的重试次数加一"""
+    span = _current_span.get()
+    if span is not None:
+        span.add_retry()
+
+@contextmanager
+def span(name: str, **attributes):
+    """
+    记录一段代码的耗时
+
+    Args:
+        name: 调用名称，如 "coze.upload_image_to_coze"
+        **attributes: 附加属性
+
+    Yields:
+        Span，可以调用 set / fail / add_retry，或设置 bytes_in / bytes_out
+    """
+    if not _telemetry.enabled:
+        yield Span(name)
+        return
+
+    current = Span(name, _current_span.get()).set(**attributes)
+    token = _current_span.set(current)
+    try:
+        yield current
+    except BaseException as e:
+        current.fail(f"{type(e).__name__}: {e}")
+        raise
+    finally:
+        _current_span.reset(token)
+        current.finish()
+        _telemetry.record(current)
+
+def is_not_none(result) -> bool:
+    return result is not None
+
+def status_ok(result) -> bool:
+    """服务返回的 {"status": ...} 字典不是 failed / unknown 时算成功"""
+    return isinstance(result, dict) and result.get("status") not in (None, "failed", "unknown")
+
+def _result_error(result) -> Optional[str]:
+    if isinstance(result, dict):
+        return result.get("error")
+    return None
+
+def instrument(name: str = None, ok: Callable = None):
+    """
+    装饰器：每次调用记录一个 span
+
+    服务方法通常捕获异常后返回默认值，这时用 ok 判断结果是否算成功，
+    例如 ok=lambda r: r is not None；返回字典中的 "error" 会记为错误信息。
+    参数和返回值中的 bytes / str 计入收发字节数。
+
+    Args:
+        name: 调用名称，默认为 "类名.方法名"
+        ok: ok(返回值) 为假时记为失败
+    """
+    def decorator(func):
+        span_name = name or func.__qualname__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _telemetry.enabled:
+                return func(*args, **kwargs)
+
+            with span(span_name) as current:
+                current.bytes_in = sum(payload_size(v) for v in itertools.chain(args, kwargs.values()))
+                result = func(*args, **kwargs)
+                current.bytes_out = payload_size(result)
+                if ok is not None and not ok(result):
+                    current.fail(_result_error(result))
+                return result
+
+        return wrapper
+
+    return decorator
+
+def instrument_class(prefix: str, exclude: tuple = ()):
+    """
+    类装饰器：为所有公开方法加上 instrument（名称为 "prefix.方法名"）
+
+    生成器和上下文管理器方法只会在创建时被调用一次，计时没有意义，跳过。
+
+    Args:
+        prefix: 调用名称前缀
+        exclude: 不记录的方法名
+    """
+    def decorator(cls):
+        for attr_name, attr in list(vars(cls).items()):
+            if attr_name.startswith('_') or attr_name in exclude:
+                continue
+
+            wrap = None
+            if isinstance(attr, (staticmethod, classmethod)):
+                func, wrap = attr.__func__, type(attr)
+            elif inspect.isfunction(attr):
+                func = attr
+            else:
+                continue
+
+            if inspect.isgeneratorfunction(inspect.unwrap(func)):
+                continue
+
+            wrapped = instrument(f"{prefix}.{attr_name}")(func)
+            setattr(cls, attr_name, wrap(wrapped) if wrap else wrapped)
+        return cls
+
+    return decorator
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        body = _telemetry.export_openmetrics().encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/openmetrics-text; version=1.0.0; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+_metrics_server = None
+
+def start_metrics_server(port: int = 9464, host: str = "127.0.0.1") -> Optional[ThreadingHTTPServer]:
+    """
+    在后台线程提供 /metrics（OpenMetrics 文本），重复调用返回同一个服务
+
+    Args:
+        port: 端口
+        host: 监听地址
+
+    Returns:
+        HTTP 服务，端口被占用时返回 None
+    """
+    global _metrics_server
+    if _metrics_server is not None:
+        return _metrics_server
+    try:
+        _metrics_server = ThreadingHTTPServer((host, port), _MetricsHandler)
+        _metrics_server.daemon_threads = True
+        threading.Thread(target=_metrics_server.serve_forever, name="metrics-server", daemon=True).start()
+        return _metrics_server
+
+    except Exception as e:
+        print(f"指标服务启动失败: {str(e)}")
+        return None
@@ -0,0 +1,244 @@
+import os
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+from utils.lazy_import import lazy_import
+
+cv2 = lazy_import("cv2")
+
+# 分块边长：每块单独处理，块间并行
+DEFAULT_TILE_SIZE = 512
+
+# 预览模式下的最长边
+PREVIEW_MAX_SIDE = 640
+
+Tile = Tuple[int, int, int, int]
+
+class ArtisticEffect:
+    """
+    艺术效果基类
+
+    apply 接收 BGR 图块及其在整图中的左上角坐标，返回同尺寸的结果。
+    halo 是效果的邻域半径：分块时每块向外多取 halo 像素，保证块边缘的结果与整图处理一致。
+
+    依赖整图的步骤（如 Canny 的滞后阈值会沿边缘跨块追踪）不能分块，放在 prepare 中：
+    它在整图上只运行一次，返回与整图同尺寸的数组，分块时按块裁剪后作为 context 传给 apply。
+    """
+
+    name = ""
+    halo = 0
+
+    def prepare(self, img: np.ndarray) -> Optional[np.ndarray]:
+        return None
+
+    def apply(
+        self,
+        img: np.ndarray,
+        origin: Tuple[int, int] = (0, 0),
+        context: Optional[np.ndarray] = None
+    ) -> np.ndarray:
+        raise NotImplementedError
+
+class OilPaintingEffect(ArtisticEffect):
+    """油画效果"""
+
+    name = "oil_painting"
+
+    def __init__(self, size: int = 7, dyn_ratio: int = 1):
+        self.size = size
+        self.dyn_ratio = dyn_ratio
+        self.halo = size
+
+    def apply(self, img, origin=(0, 0), context=None):
+        return cv2.xphoto.oilPainting(img, self.size, self.dyn_ratio)
+
+class CartoonEffect(ArtisticEffect):
+    """卡通效果：只保留边缘处的颜色"""
+
+    name = "cartoon"
+
+    def prepare(self, img):
+        gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+        return cv2.Canny(gray, 100, 200)
+
+    def apply(self, img, origin=(0, 0), context=None):
+        edges = self.prepare(img) if context is None else context
+        return cv2.bitwise_and(img, img, mask=edges)
+
+class PencilSketchEffect(ArtisticEffect):
+    """铅笔素描效果（输出灰度图）"""
+
+    name = "pencil_sketch"
+    halo = 16
+
+    def apply(self, img, origin=(0, 0), context=None):
+        gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+        inv_gray = cv2.bitwise_not(gray)
+        blurred = cv2.GaussianBlur(inv_gray, (21, 21), 0)
+        return cv2.divide(gray, 255 - blurred, scale=256)
+
+class WatercolorEffect(ArtisticEffect):
+    """水彩效果：边缘保持平滑（递归滤波没有严格的邻域半径，分块结果与整图相差不超过几个灰度级）"""
+
+    name = "watercolor"
+
+    def __init__(self, sigma_s: float = 60, sigma_r: float = 0.45):
+        self.sigma_s = sigma_s
+        self.sigma_r = sigma_r
+        # 递归滤波的影响随距离衰减，取 sigma_s 即可让块边界不可见
+        self.halo = int(sigma_s)
+
+    def apply(self, img, origin=(0, 0), context=None):
+        # 与 cv2.stylization 的做法相同：保边平滑后按梯度幅值压暗轮廓。
+        # 不直接调用它，是因为部分 OpenCV 版本的 stylization 会把平坦区域（如白底）输出成全黑
+        smoothed = cv2.edgePreservingFilter(
+            img, flags=cv2.RECURS_FILTER, sigma_s=self.sigma_s, sigma_r=self.sigma_r
+        )
+        gray = cv2.cvtColor(smoothed, cv2.COLOR_BGR2GRAY).astype(np.float32) / 255
+        magnitude = cv2.magnitude(cv2.Sobel(gray, cv2.CV_32F, 1, 0), cv2.Sobel(gray, cv2.CV_32F, 0, 1))
+        shade = 1 - np.clip(magnitude, 0, 1)
+        return (smoothed * shade[..., None]).astype(np.uint8)
+
+class CrayonEffect(ArtisticEffect):
+    """蜡笔效果：色阶压缩 + 深色轮廓 + 纸张纹理"""
+
+    name = "crayon"
+
+    def __init__(self, levels: int = 6, texture_strength: int = 28):
+        self.levels = levels
+        self.texture_strength = texture_strength
+
+    def prepare(self, img):
+        # 平滑后的图与轮廓叠成四通道：轮廓要在整图上检测，平滑结果顺便复用，不必分块再算一遍
+        smoothed = cv2.medianBlur(img, 5)
+        return np.dstack((smoothed, self._edges(smoothed)))
+
+    def apply(self, img, origin=(0, 0), context=None):
+        if context is None:
+            smoothed = cv2.medianBlur(img, 5)
+            edges = self._edges(smoothed)
+        else:
+            smoothed, edges = context[..., :3], context[..., 3]
+
+        # 色阶压缩
+        step = 256 // self.levels
+        # 用 int16 计算，接近 255 的值加上 step // 2 后不会回绕成暗色
+        posterized = np.minimum(smoothed.astype(np.int16) // step * step + step // 2, 255).astype(np.uint8)
+
+        # 纹理由整图坐标决定，分块处理与整图处理得到同样的纹理
+        texture = self._paper_texture(img.shape[:2], origin)
+        result = posterized.astype(np.int16) + texture[..., None]
+        result[edges > 0] = result[edges > 0] // 3
+        return np.clip(result, 0, 255).astype(np.uint8)
+
+    @staticmethod
+    def _edges(smoothed: np.ndarray) -> np.ndarray:
+        # 轮廓
+        gray = cv2.cvtColor(smoothed, cv2.COLOR_BGR2GRAY)
+        return cv2.dilate(cv2.Canny(gray, 60, 150), np.ones((2, 2), np.uint8))
+
+    def _paper_texture(self, shape: Tuple[int, int], origin: Tuple[int, int]) -> np.ndarray:
+        height, width = shape
+        ys, xs = np.mgrid[0:height, 0:width].astype(np.uint32)
+        xs += np.uint32(origin[0])
+        ys += np.uint32(origin[1])
+
+        # 整数哈希得到与坐标绑定的伪随机值，再叠加斜向笔触条纹
+        h = xs * np.uint32(374761393) + ys * np.uint32(668265263)
+        h = (h ^ (h >> np.uint32(13))) * np.uint32(1274126177)
+        noise = ((h >> np.uint32(24)).astype(np.int16) - 128) * self.texture_strength // 128
+        strokes = (((xs + ys * 2) % 7) < 2).astype(np.int16) * (self.texture_strength // 2)
+        return noise - strokes
+
+
+_EFFECTS: Dict[str, ArtisticEffect] = {}
+
+def register_effect(effect: ArtisticEffect) -> None:
+    """注册艺术效果（同名覆盖）"""
+    _EFFECTS[effect.name] = effect
+
+def get_effect(name: str) -> ArtisticEffect:
+    """按名称获取艺术效果"""
+    if name not in _EFFECTS:
+        raise ValueError(f"未知的艺术效果: {name}，可选: {', '.join(_EFFECTS)}")
+    return _EFFECTS[name]
+
+def available_effects() -> List[str]:
+    """获取已注册的效果名称"""
+    return list(_EFFECTS)
+
+def split_tiles(height: int, width: int, tile_size: int = DEFAULT_TILE_SIZE) -> List[Tile]:
+    """把图片划分为不重叠的块 (x0, y0, x1, y1)"""
+    return [
+        (x0, y0, min(x0 + tile_size, width), min(y0 + tile_size, height))
+        for y0 in range(0, height, tile_size)
+        for x0 in range(0, width, tile_size)
+    ]
+
+def downscale_for_preview(img: np.ndarray, max_side: int = PREVIEW_MAX_SIDE) -> np.ndarray:
+    """预览用缩小副本（不超过 max_side 时原样返回）"""
+    height, width = img.shape[:2]
+    if max(height, width) <= max_side:
+        return img
+    scale = max_side / max(height, width)
+    return cv2.resize(img, (max(1, round(width * scale)), max(1, round(height * scale))),
+                      interpolation=cv2.INTER_AREA)
+
+def apply_effect(
+    img: np.ndarray,
+    effect_type: str,
+    tiled: Optional[bool] = None,
+    tile_size: int = DEFAULT_TILE_SIZE,
+    max_workers: Optional[int] = None
+) -> np.ndarray:
+    """
+    应用艺术效果
+
+    Args:
+        img: BGR 图片
+        effect_type: 效果名称
+        tiled: 是否分块并行处理，None 表示图片大于两个块时自动启用
+        tile_size: 块边长
+        max_workers: 线程数，None 表示 CPU 核心数
+
+    Returns:
+        处理后的图片
+    """
+    effect = get_effect(effect_type)
+    height, width = img.shape[:2]
+    tiles = split_tiles(height, width, tile_size)
+
+    if tiled is None:
+        tiled = len(tiles) > 2
+    if not tiled or len(tiles) == 1:
+        return effect.apply(img)
+
+    # 依赖整图的部分先在整图上算好
+    context = effect.prepare(img)
+
+    def render(tile: Tile) -> Tuple[Tile, np.ndarray]:
+        x0, y0, x1, y1 = tile
+        # 向外扩展 halo 像素（不超出图片边界），处理后再裁掉
+        px0, py0 = max(x0 - effect.halo, 0), max(y0 - effect.halo, 0)
+        px1, py1 = min(x1 + effect.halo, width), min(y1 + effect.halo, height)
+        rendered = effect.apply(
+            img[py0:py1, px0:px1], (px0, py0),
+            None if context is None else context[py0:py1, px0:px1]
+        )
+        return tile, rendered[y0 - py0:y1 - py0, x0 - px0:x1 - px0]
+
+    # OpenCV 运算会释放 GIL，线程即可并行
+    result = None
+    with ThreadPoolExecutor(max_workers=max_workers or os.cpu_count()) as executor:
+        for (x0, y0, x1, y1), block in executor.map(render, tiles):
+            if result is None:
+                result = np.empty((height, width) + block.shape[2:], dtype=block.dtype)
+            result[y0:y1, x0:x1] = block
+
+    return result
+
+register_effect(OilPaintingEffect())
+register_effect(CartoonEffect())
+register_effect(PencilSketchEffect())
+register_effect(WatercolorEffect())
+register_effect(CrayonEffect())
@@ -0,0 +1,148 @@
+import io
+import os
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Iterable, List, Optional, Tuple
+from PIL import Image, ImageDraw, ImageFont
+
+# 水印默认样式：右下角，半透明浅灰
+DEFAULT_FILL = (200, 200, 200, 100)
+DEFAULT_OFFSET = (150, 40)
+
+Color = Tuple[int, int, int, int]
+
+@lru_cache(maxsize=32)
+def _load_font(font_path: Optional[str], font_size: Optional[int]):
+    if font_path:
+        return ImageFont.truetype(font_path, font_size or 16)
+    if font_size:
+        return ImageFont.load_default(font_size)
+    return ImageFont.load_default()
+
+@lru_cache(maxsize=64)
+def render_text_sprite(
+    text: str,
+    font_path: Optional[str] = None,
+    font_size: Optional[int] = None,
+    fill: Color = DEFAULT_FILL
+) -> Tuple[Image.Image, Tuple[int, int]]:
+    """
+    渲染水印文字贴图（相同参数只渲染一次）
+
+    Args:
+        text: 水印文本
+        font_path: 字体文件路径，None 使用默认字体
+        font_size: 字号，None 使用默认字号
+        fill: RGBA 颜色
+
+    Returns:
+        (只包含文字范围的 RGBA 贴图, 贴图相对于文字绘制起点的偏移)
+    """
+    font = _load_font(font_path, font_size)
+    left, top, right, bottom = font.getbbox(text)
+    sprite = Image.new('RGBA', (max(right - left, 1), max(bottom - top, 1)), (255, 255, 255, 0))
+    ImageDraw.Draw(sprite).text((-left, -top), text, fill=fill, font=font)
+    return sprite, (left, top)
+
+def composite_sprite(image: Image.Image, sprite: Image.Image, position: Tuple[int, int]) -> Image.Image:
+    """
+    把贴图就地合成到图片的局部区域
+
+    Args:
+        image: RGB 或 RGBA 图片（会被修改）
+        sprite: RGBA 贴图
+        position: 贴图左上角在图片中的位置，可以超出边界
+
+    Returns:
+        合成后的图片（与传入的是同一对象）
+    """
+    x, y = position
+
+    # 只保留落在图片内的部分
+    crop_box = (max(-x, 0), max(-y, 0),
+                min(sprite.width, image.width - x), min(sprite.height, image.height - y))
+    if crop_box[0] >= crop_box[2] or crop_box[1] >= crop_box[3]:
+        return image
+    if crop_box != (0, 0, sprite.width, sprite.height):
+        sprite = sprite.crop(crop_box)
+    dest = (max(x, 0), max(y, 0))
+
+    if image.mode == 'RGBA':
+        image.alpha_composite(sprite, dest=dest)
+    else:
+        # 不透明底图：按贴图 alpha 混合，结果与 alpha_composite 一致
+        image.paste(sprite, dest, mask=sprite)
+    return image
+
+def watermark_image(
+    image: Image.Image,
+    text: str = "DreamWeaver",
+    font_path: Optional[str] = None,
+    font_size: Optional[int] = None,
+    fill: Color = DEFAULT_FILL,
+    offset: Tuple[int, int] = DEFAULT_OFFSET
+) -> Image.Image:
+    """
+    在图片右下角添加水印（只处理水印所在区域）
+
+    Args:
+        image: PIL 图片
+        text: 水印文本
+        font_path: 字体文件路径
+        font_size: 字号
+        fill: RGBA 颜色
+        offset: 文字起点距右下角的距离 (x, y)
+
+    Returns:
+        添加水印后的图片；RGB/RGBA 图片会被就地修改
+    """
+    if image.mode not in ('RGB', 'RGBA'):
+        has_alpha = image.mode in ('LA', 'PA') or 'transparency' in image.info
+        image = image.convert('RGBA' if has_alpha else 'RGB')
+
+    sprite, (left, top) = render_text_sprite(text, font_path, font_size, fill)
+    text_x = image.width - offset[0]
+    text_y = image.height - offset[1]
+    return composite_sprite(image, sprite, (text_x + left, text_y + top))
+
+def watermark_bytes(image_data: bytes, text: str = "DreamWeaver", **kwargs) -> bytes:
+    """给图片字节数据添加水印，返回 PNG 字节数据"""
+    image = Image.open(io.BytesIO(image_data))
+    image.load()
+    watermarked = watermark_image(image, text, **kwargs)
+
+    output = io.BytesIO()
+    watermarked.save(output, format='PNG')
+    return output.getvalue()
+
+def watermark_batch(
+    images: Iterable[bytes],
+    text: str = "DreamWeaver",
+    max_workers: Optional[int] = None,
+    **kwargs
+) -> List[bytes]:
+    """
+    批量添加水印（导出用），所有图片共用同一张文字贴图
+
+    Args:
+        images: 图片字节数据
+        text: 水印文本
+        max_workers: 线程数，None 表示 CPU 核心数
+        **kwargs: 传给 watermark_image 的样式参数
+
+    Returns:
+        按输入顺序排列的 PNG 字节数据；单张失败时返回原图
+    """
+    # 先在主线程渲染贴图，工作线程只读缓存
+    render_text_sprite(text, kwargs.get('font_path'), kwargs.get('font_size'), kwargs.get('fill', DEFAULT_FILL))
+
+    def process(image_data: bytes) -> bytes:
+        try:
+            return watermark_bytes(image_data, text, **kwargs)
+        except Exception as e:
+            print(f"水印添加失败: {str(e)}")
+            return image_data
+
+    # PNG 解码和编码会释放 GIL
+    with ThreadPoolExecutor(max_workers=max_workers or os.cpu_count()) as executor:
+        return list(executor.map(process, images))
@@ -0,0 +1,236 @@
+import io
+import struct
+from pathlib import Path
+from typing import BinaryIO, Iterable, Optional, Tuple, Union
+
+# 无法回写长度时（管道、套接字）使用的"长度未知"标记
+UNKNOWN_SIZE = 0xFFFFFFFF
+
+# 查找首块 WAV 头时最多缓存的字节数
+MAX_HEADER_BYTES = 4096
+
+WAV_HEADER_SIZE = 44
+
+def build_wav_header(num_channels: int, sample_rate: int, sample_width: int, data_size: int) -> bytes:
+    """
+    生成 PCM WAV 文件头
+
+    Args:
+        num_channels: 声道数
+        sample_rate: 采样率
+        sample_width: 采样位宽（字节）
+        data_size: 音频数据字节数，UNKNOWN_SIZE 表示未知
+
+    Returns:
+        44 字节文件头
+    """
+    block_align = num_channels * sample_width
+    riff_size = UNKNOWN_SIZE if data_size == UNKNOWN_SIZE else 36 + data_size
+    return struct.pack(
+        '<4sI4s4sIHHIIHH4sI',
+        b'RIFF', riff_size, b'WAVE',
+        b'fmt ', 16, 1, num_channels, sample_rate, sample_rate * block_align, block_align, sample_width * 8,
+        b'data', data_size
+    )
+
+def parse_wav_header(data: bytes) -> Optional[Tuple[int, int, int, int]]:
+    """
+    解析数据开头的 WAV 头
+
+    Args:
+        data: 以 RIFF 头开始的字节数据
+
+    Returns:
+        (声道数, 采样率, 采样位宽, 音频数据起始偏移)；头不完整时返回 None
+    """
+    position = 12
+    fmt = None
+    while position + 8 <= len(data):
+        chunk_id, chunk_size = struct.unpack_from('<4sI', data, position)
+        body = position + 8
+        if chunk_id == b'fmt ':
+            if body + 16 > len(data):
+                return None
+            _, num_channels, sample_rate, _, _, bits = struct.unpack_from('<HHIIHH', data, body)
+            fmt = (num_channels, sample_rate, bits // 8)
+        elif chunk_id == b'data':
+            return fmt + (body,) if fmt else None
+        # 子块按偶数字节对齐
+        position = body + chunk_size + (chunk_size & 1)
+    return None
+
+def is_wav_header(data: bytes) -> bool:
+    return len(data) >= 12 and data[:4] == b'RIFF' and data[8:12] == b'WAVE'
+
+class StreamingWavWriter:
+    """
+    流式 WAV 写入
+
+    音频块边到边写，不在内存中累积整段音频：
+    - 先写入长度占位的文件头，关闭时回写 RIFF/data 长度；目标不可 seek（管道、套接字）时长度写为 0xFFFFFFFF
+    - 首个块如果带 WAV 头，自动使用其中的格式；之后块中重复出现的 WAV 头会被去掉
+    - 跨块的不完整采样帧会暂存到下一块，保证写入的都是完整帧
+    """
+
+    def __init__(
+        self,
+        target: Union[str, Path, BinaryIO],
+        num_channels: int = 1,
+        sample_rate: int = 16000,
+        sample_width: int = 2,
+        detect_header: bool = True
+    ):
+        """
+        Args:
+            target: 文件路径或可写的二进制流
+            num_channels: 声道数（首块没有 WAV 头时使用）
+            sample_rate: 采样率
+            sample_width: 采样位宽（字节）
+            detect_header: 是否从音频块中识别 WAV 头
+        """
+        if isinstance(target, (str, Path)):
+            self._stream = open(target, 'wb')
+            self._owns_stream = True
+        else:
+            self._stream = target
+            self._owns_stream = False
+
+        self.num_channels = num_channels
+        self.sample_rate = sample_rate
+        self.sample_width = sample_width
+        self.detect_header = detect_header
+
+        self.data_size = 0
+        self.closed = False
+        self._header_offset = None
+        self._pending = b''
+        self._remainder = b''
+
+    @property
+    def frame_size(self) -> int:
+        return self.num_channels * self.sample_width
+
+    @property
+    def num_frames(self) -> int:
+        return self.data_size // self.frame_size
+
+    @property
+    def duration(self) -> float:
+        return self.num_frames / self.sample_rate if self.sample_rate else 0.0
+
+    def write(self, chunk: bytes) -> None:
+        """写入一个音频块（裸 PCM 或完整 WAV）"""
+        if self.closed:
+            raise ValueError("WAV 写入器已关闭")
+        if not chunk:
+            return
+
+        if self.detect_header:
+            chunk = self._strip_header(chunk)
+            if chunk is None:
+                return
+
+        if self._header_offset is None:
+            self._write_header()
+
+        data = self._remainder + chunk if self._remainder else chunk
+        usable = len(data) - len(data) % self.frame_size
+        self._remainder = bytes(data[usable:])
+        if usable:
+            self._stream.write(data[:usable] if usable < len(data) else data)
+            self.data_size += usable
+
+    def write_all(self, chunks: Iterable[bytes]) -> "StreamingWavWriter":
+        """写入所有音频块（可以是生成器）"""
+        for chunk in chunks:
+            self.write(chunk)
+        return self
+
+    def close(self) -> None:
+        """回写长度并关闭（只关闭由自身打开的文件）"""
+        if self.closed:
+            return
+
+        # 首块过短、尚未凑够完整头时按裸 PCM 处理
+        if self._pending:
+            pending, self._pending = self._pending, b''
+            self.detect_header = False
+            self.write(pending)
+
+        if self._header_offset is None:
+            self._write_header()
+
+        if self._seekable():
+            end = self._stream.tell()
+            self._stream.seek(self._header_offset)
+            self._stream.write(build_wav_header(
+                self.num_channels, self.sample_rate, self.sample_width, self.data_size
+            ))
+            self._stream.seek(end)
+
+        self._stream.flush()
+        if self._owns_stream:
+            self._stream.close()
+        self.closed = True
+
+    def __enter__(self) -> "StreamingWavWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def _seekable(self) -> bool:
+        try:
+            return self._stream.seekable()
+        except (AttributeError, ValueError):
+            return False
+
+    def _write_header(self):
+        self._header_offset = self._stream.tell() if self._seekable() else 0
+        data_size = 0 if self._seekable() else UNKNOWN_SIZE
+        self._stream.write(build_wav_header(self.num_channels, self.sample_rate, self.sample_width, data_size))
+
+    def _strip_header(self, chunk: bytes) -> Optional[bytes]:
+        """识别并去掉块开头的 WAV 头；头还不完整时缓存并返回 None"""
+        if self._pending:
+            chunk, self._pending = self._pending + chunk, b''
+
+        if not is_wav_header(chunk[:12]):
+            if len(chunk) < 12 and b'RIFF'.startswith(chunk[:4]) and self._header_offset is None:
+                self._pending = chunk
+                return None
+            return chunk
+
+        parsed = parse_wav_header(chunk)
+        if parsed is None:
+            if len(chunk) < MAX_HEADER_BYTES:
+                self._pending = chunk
+                return None
+            return chunk
+
+        num_channels, sample_rate, sample_width, offset = parsed
+        if self._header_offset is None:
+            self.num_channels, self.sample_rate, self.sample_width = num_channels, sample_rate, sample_width
+        return chunk[offset:]
+
+def write_wav_stream(chunks: Iterable[bytes], target: Union[str, Path, BinaryIO], **kwargs) -> int:
+    """
+    把音频块流式写成 WAV
+
+    Args:
+        chunks: 音频块（裸 PCM 或 WAV）
+        target: 文件路径或可写的二进制流
+        **kwargs: 无 WAV 头时使用的格式 (num_channels, sample_rate, sample_width)
+
+    Returns:
+        写入的帧数
+    """
+    with StreamingWavWriter(target, **kwargs) as writer:
+        writer.write_all(chunks)
+    return writer.num_frames
+
+def chunks_to_wav_bytes(chunks: Iterable[bytes], **kwargs) -> bytes:
+    """把音频块合成为内存中的 WAV 字节数据"""
+    output = io.BytesIO()
+    write_wav_stream(chunks, output, **kwargs)
+    return output.getvalue()